@@ -0,0 +1,157 @@
+"""
+Retention and archival for routing_logs.
+
+archive_logs() moves rows older than a cutoff out of the live database into
+date-partitioned, zstd-compressed JSON Lines files, one object per row with
+every column (response_text always decompressed):
+
+  data/archive/routing_logs/date=2026-03-14/part-000000123456.jsonl.zst
+
+Dashboard totals are unaffected: metrics_rollup and the latency sketches are
+already aggregated when a row is written, so only per-row history moves.
+
+Rows go in batches. Each batch is written to a temporary file, fsynced and
+renamed into place before the same rows are deleted, so a crash leaves at
+worst a part file whose rows are still live; the next run rewrites that part
+(it is named after its first row id) instead of duplicating it.
+
+iter_archive() streams rows back for offline analysis, only opening the
+partitions that overlap the requested range.
+
+run_retention() is the backend's background task for both: it archives when
+LOG_RETENTION_DAYS is set and always prunes expired metrics_rollup buckets.
+"""
+import io
+import os
+import json
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+import zstandard
+from sqlalchemy import delete, func, select
+from config import get_settings
+from db.database import get_db
+from db.log_writer import prune_rollup
+from db.models import RoutingLog
+
+logger = logging.getLogger(__name__)
+
+ZSTD_LEVEL = 10  # archives are written once and read rarely
+COLUMNS = [c.name for c in RoutingLog.__table__.columns if c.name not in ("response_text", "response_zstd")]
+
+
+def _root(archive_dir: Optional[str]) -> Path:
+    return Path(archive_dir or get_settings().archive_dir) / "routing_logs"
+
+
+def retention_cutoff(days: int) -> datetime:
+    """Naive UTC cutoff, comparable with routing_logs.created_at."""
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+
+
+def _record(log: RoutingLog) -> dict:
+    record = {name: getattr(log, name) for name in COLUMNS}
+    record["response_text"] = log.response
+    record["created_at"] = log.created_at.isoformat()
+    return record
+
+
+def _write_part(root: Path, day: date, records: list[dict]):
+    part = root / f"date={day.isoformat()}" / f"part-{records[0]['id']:012d}.jsonl.zst"
+    part.parent.mkdir(parents=True, exist_ok=True)
+    tmp = part.with_name(part.name + ".tmp")
+    with open(tmp, "wb") as f:
+        with zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(f, closefd=False) as writer:
+            for record in records:
+                writer.write((json.dumps(record, separators=(",", ":")) + "\n").encode())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, part)
+
+
+async def count_archivable(before: datetime) -> int:
+    async with get_db() as db:
+        return await db.scalar(select(func.count()).select_from(RoutingLog).where(RoutingLog.created_at < before))
+
+
+async def archive_logs(before: datetime, archive_dir: Optional[str] = None, batch_size: int = 5000) -> int:
+    """Move routing_logs rows with created_at < `before` (naive UTC) into the archive; returns rows moved."""
+    root = _root(archive_dir)
+    moved = 0
+    while True:
+        async with get_db() as db:
+            result = await db.execute(
+                select(RoutingLog)
+                .where(RoutingLog.created_at < before)
+                .order_by(RoutingLog.created_at, RoutingLog.id)
+                .limit(batch_size)
+            )
+            logs = result.scalars().all()
+            if not logs:
+                break
+            by_day: dict[date, list[dict]] = defaultdict(list)
+            for log in logs:
+                by_day[log.created_at.date()].append(_record(log))
+            for day, records in by_day.items():
+                await asyncio.to_thread(_write_part, root, day, records)
+            await db.execute(delete(RoutingLog).where(RoutingLog.id.in_([log.id for log in logs])))
+        moved += len(logs)
+    if moved:
+        logger.info("Archived %d routing logs older than %s to %s", moved, before.isoformat(), root)
+    return moved
+
+
+def iter_archive(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    archive_dir: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Stream archived rows, oldest partition first. since/until bound
+    created_at (inclusive/exclusive, naive UTC); created_at is returned as an
+    ISO string, as stored.
+    """
+    root = _root(archive_dir)
+    if not root.exists():
+        return
+    decompressor = zstandard.ZstdDecompressor()
+    for partition in sorted(root.glob("date=*")):
+        day = date.fromisoformat(partition.name.removeprefix("date="))
+        if (since is not None and day < since.date()) or (until is not None and day > until.date()):
+            continue
+        for part in sorted(partition.glob("*.jsonl.zst")):
+            with open(part, "rb") as f, decompressor.stream_reader(f) as reader:
+                for line in io.TextIOWrapper(reader, encoding="utf-8"):
+                    record = json.loads(line)
+                    if since is not None or until is not None:
+                        created_at = datetime.fromisoformat(record["created_at"])
+                        if (since is not None and created_at < since) or (until is not None and created_at >= until):
+                            continue
+                    yield record
+
+
+def has_archive(archive_dir: Optional[str] = None) -> bool:
+    root = _root(archive_dir)
+    return root.exists() and any(root.glob("date=*/*.jsonl.zst"))
+
+
+async def run_retention(days: int, interval_s: float):
+    """
+    Background task, every `interval_s` seconds until cancelled: drop expired
+    metrics_rollup buckets and, if `days` > 0, archive rows older than `days`.
+    """
+    while True:
+        try:
+            async with get_db() as db:
+                await prune_rollup(db)
+        except Exception:
+            logger.exception("Metrics rollup pruning failed")
+        if days > 0:
+            try:
+                await archive_logs(retention_cutoff(days))
+            except Exception:
+                logger.exception("Routing log archival failed")
+        await asyncio.sleep(interval_s)
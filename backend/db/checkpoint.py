@@ -0,0 +1,101 @@
+"""
+WAL checkpointing and storage status for the SQLite database.
+
+SQLite's automatic checkpoint (wal_autocheckpoint) runs inside whichever
+commit crosses the threshold and is skipped while readers hold old
+snapshots, so under sustained writes with overlapping dashboard reads the
+WAL can keep growing. run_checkpoints() issues a PASSIVE checkpoint on a
+timer (never blocks readers or writers) and escalates to TRUNCATE, which
+waits for readers and resets the file, once the WAL passes
+SQLITE_WAL_TRUNCATE_MB.
+
+storage_status() reports file sizes, the connection profile and the last
+checkpoint result for GET /api/metrics/storage (database size and pool
+usage on PostgreSQL).
+"""
+import os
+import time
+import asyncio
+import logging
+from sqlalchemy import text
+from config import get_settings
+from db.database import engine
+
+logger = logging.getLogger(__name__)
+
+REPORTED_PRAGMAS = (
+    "journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout",
+    "temp_store", "wal_autocheckpoint", "journal_size_limit", "page_size",
+)
+
+_last_checkpoint: dict | None = None
+
+
+def _paths() -> tuple[str, str]:
+    db_path = engine.url.database or ""
+    return db_path, db_path + "-wal"
+
+
+def _size(path: str) -> int | None:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+async def checkpoint(mode: str = "PASSIVE") -> dict:
+    """Run PRAGMA wal_checkpoint(mode); returns and remembers the result."""
+    global _last_checkpoint
+    start = time.perf_counter()
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        busy, log_frames, checkpointed = (await conn.execute(text(f"PRAGMA wal_checkpoint({mode})"))).one()
+    _last_checkpoint = {
+        "mode": mode,
+        "at": time.time(),
+        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+        "busy": bool(busy),
+        "wal_frames": log_frames,
+        "checkpointed_frames": checkpointed,
+    }
+    return _last_checkpoint
+
+
+async def run_checkpoints(interval_s: float):
+    """Background task: checkpoint every `interval_s` seconds until cancelled."""
+    truncate_bytes = get_settings().sqlite_wal_truncate_mb * 1024 * 1024
+    while True:
+        await asyncio.sleep(interval_s)
+        try:
+            wal_size = _size(_paths()[1]) or 0
+            result = await checkpoint("TRUNCATE" if wal_size > truncate_bytes else "PASSIVE")
+            if result["busy"]:
+                logger.info("WAL checkpoint (%s) incomplete: %d of %d frames", result["mode"],
+                            result["checkpointed_frames"], result["wal_frames"])
+        except Exception:
+            logger.exception("WAL checkpoint failed")
+
+
+async def storage_status() -> dict:
+    if engine.dialect.name == "postgresql":
+        async with engine.connect() as conn:
+            size = (await conn.execute(text("SELECT pg_database_size(current_database())"))).scalar()
+        return {"dialect": "postgresql", "db_size_bytes": size, "pool": engine.pool.status()}
+    if engine.dialect.name != "sqlite":
+        return {"dialect": engine.dialect.name}
+    db_path, wal_path = _paths()
+    async with engine.connect() as conn:
+        pragmas = {name: (await conn.execute(text(f"PRAGMA {name}"))).scalar() for name in REPORTED_PRAGMAS}
+    last = _last_checkpoint
+    return {
+        "dialect": "sqlite",
+        "profile": get_settings().sqlite_profile,
+        "db_path": db_path,
+        "db_size_bytes": _size(db_path),
+        "wal_size_bytes": _size(wal_path),
+        "pragmas": pragmas,
+        "last_checkpoint": last,
+        # Frames the last checkpoint could not copy back, and how long ago it ran
+        "checkpoint_lag_frames": last["wal_frames"] - last["checkpointed_frames"] if last else None,
+        "seconds_since_checkpoint": round(time.time() - last["at"], 1) if last else None,
+    }
@@ -1,3 +1,6 @@
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from contextlib import asynccontextmanager
@@ -8,23 +11,87 @@ class Base(DeclarativeBase):
     pass
 
 
-engine = create_async_engine(
-    get_settings().database_url,
-    connect_args={"check_same_thread": False},  # SQLite
-    echo=False,
-)
+def database_url() -> str:
+    """DATABASE_URL with the async driver filled in (postgres:// -> postgresql+asyncpg://)."""
+    url = make_url(get_settings().database_url)
+    if url.drivername in ("postgres", "postgresql"):
+        url = url.set(drivername="postgresql+asyncpg")
+    return url.render_as_string(hide_password=False)
+
+
+def _engine_options() -> dict:
+    settings = get_settings()
+    if make_url(database_url()).get_backend_name() == "postgresql":
+        # Shared by every replica: size pool_size * replicas below max_connections
+        return {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout_s,
+            "pool_recycle": settings.db_pool_recycle_s,
+            "pool_pre_ping": True,
+        }
+    options = {"connect_args": {"check_same_thread": False}}  # SQLite
+    if settings.sqlite_profile == "tuned":
+        # aiosqlite defaults to NullPool: a new connection (and thread) per
+        # session, so the page cache and mmap are thrown away after every
+        # request. Keep a few connections open instead.
+        options.update(poolclass=AsyncAdaptedQueuePool, pool_size=settings.sqlite_pool_size, max_overflow=0)
+    return options
+
+
+engine = create_async_engine(database_url(), echo=False, **_engine_options())
+
+
+def sqlite_pragmas() -> list[str]:
+    """
+    PRAGMAs run on every new SQLite connection (SQLITE_PROFILE).
+
+    "default" only enables WAL. "tuned" adds synchronous=NORMAL (durable
+    across app crashes; a power cut can lose the last commits, never corrupt
+    the file), a larger page cache, memory-mapped reads, a busy timeout so
+    concurrent writers wait instead of failing, in-memory temp tables, and a
+    cap on the WAL file size left behind after checkpoints.
+    """
+    settings = get_settings()
+    pragmas = ["PRAGMA journal_mode=WAL"]
+    if settings.sqlite_profile == "tuned":
+        pragmas += [
+            f"PRAGMA synchronous={settings.sqlite_synchronous}",
+            f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}",  # negative = KiB
+            f"PRAGMA mmap_size={settings.sqlite_mmap_size_mb * 1024 * 1024}",
+            f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+            f"PRAGMA temp_store={settings.sqlite_temp_store}",
+            f"PRAGMA wal_autocheckpoint={settings.sqlite_wal_autocheckpoint}",
+            f"PRAGMA journal_size_limit={settings.sqlite_journal_size_limit_mb * 1024 * 1024}",
+        ]
+    return pragmas
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+        cursor.close()
+
+MIGRATION_LOCK_KEY = 0x726F7574  # arbitrary, shared by every replica
 
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def init_db():
+    # Imported here so every model is registered on Base before create_all
+    import db.models  # noqa: F401
+    from db.migrations import run_migrations
+
     async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Replicas starting together: one runs create_all + migrations, the rest wait
+            await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
         await conn.run_sync(Base.metadata.create_all)
-    # Enable WAL mode for better concurrency
-    async with engine.begin() as conn:
-        await conn.execute(
-            __import__("sqlalchemy").text("PRAGMA journal_mode=WAL")
-        )
+        # Upgrade databases created by older versions (indexes etc.)
+        await run_migrations(conn)
 
 
 @asynccontextmanager
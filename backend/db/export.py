@@ -0,0 +1,168 @@
+"""
+Bulk export of routing_logs for offline analysis.
+
+iter_chunks() reads matching rows in id order, `chunk_size` per query, each
+query in its own short session. Memory is bounded by one chunk whatever the
+table size, and no transaction stays open for the length of the export (on
+SQLite a long reader would stop WAL checkpoints). Every row carries its id,
+so an interrupted export resumes with after_id = the last id received.
+
+The serializers turn chunks into bytes:
+  - NDJSON: one JSON object per line, features as a nested object;
+  - CSV: a header line, then one row per log, features as a JSON string;
+  - Arrow IPC stream format, one record batch per chunk (needs pyarrow).
+"""
+import io
+import csv
+import json
+import importlib.util
+from datetime import datetime
+from typing import AsyncIterator, Optional
+import zstandard
+from sqlalchemy import func, select
+from db.database import get_db
+from db.models import RoutingLog
+
+CHUNK_SIZE = 5000
+
+# (column, type) in output order; response_text only with include_response
+FIELDS = [
+    ("id", "int"),
+    ("created_at", "time"),
+    ("query", "str"),
+    ("route", "str"),
+    ("confidence", "float"),
+    ("domain", "str"),
+    ("features", "json"),
+    ("latency_ms", "float"),
+    ("router_latency_ms", "float"),
+    ("input_tokens", "int"),
+    ("output_tokens", "int"),
+    ("cost_usd", "float"),
+    ("cloud_cost_usd", "float"),
+    ("savings_usd", "float"),
+    ("judge_score", "float"),
+]
+RESPONSE_FIELD = ("response_text", "str")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def arrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def fields(include_response: bool) -> list[tuple[str, str]]:
+    return FIELDS + [RESPONSE_FIELD] if include_response else FIELDS
+
+
+async def iter_chunks(
+    after_id: int = 0,
+    route: Optional[str] = None,
+    domain: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_response: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> AsyncIterator[list[dict]]:
+    """
+    Matching rows with id > after_id, in id order, as lists of at most
+    `chunk_size` dicts keyed by fields(include_response). since/until bound
+    created_at (naive UTC, inclusive/exclusive).
+    """
+    columns = [getattr(RoutingLog, name) for name, _ in FIELDS]
+    if include_response:
+        columns += [RoutingLog.response_text, RoutingLog.response_zstd]
+    conditions = []
+    if route is not None:
+        conditions.append(RoutingLog.route == route)
+    if domain is not None:
+        conditions.append(RoutingLog.domain == domain)
+    if since is not None:
+        conditions.append(RoutingLog.created_at >= since)
+    if until is not None:
+        conditions.append(RoutingLog.created_at < until)
+
+    if since is not None:
+        # Skip straight to the first id in the time range (created_at index)
+        async with get_db() as db:
+            first = await db.scalar(select(func.min(RoutingLog.id)).where(*conditions))
+        if first is None:
+            return
+        after_id = max(after_id, first - 1)
+
+    decompress = zstandard.ZstdDecompressor().decompress
+    while True:
+        async with get_db() as db:
+            rows = (await db.execute(
+                select(*columns).where(RoutingLog.id > after_id, *conditions)
+                .order_by(RoutingLog.id).limit(chunk_size)
+            )).all()
+        if not rows:
+            return
+        chunk = []
+        for row in rows:
+            record = {name: row[i] for i, (name, _) in enumerate(FIELDS)}
+            if include_response:
+                record["response_text"] = decompress(row.response_zstd).decode() \
+                    if row.response_zstd is not None else row.response_text
+            chunk.append(record)
+        yield chunk
+        after_id = rows[-1].id
+        if len(rows) < chunk_size:
+            return
+
+
+async def to_ndjson(chunks: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        lines = []
+        for record in chunk:
+            if record["created_at"] is not None:
+                record["created_at"] = record["created_at"].isoformat()
+            lines.append(json.dumps(record, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def to_csv(chunks: AsyncIterator[list[dict]], include_response: bool = False) -> AsyncIterator[bytes]:
+    spec = fields(include_response)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([name for name, _ in spec])
+    async for chunk in chunks:
+        for record in chunk:
+            writer.writerow([
+                "" if record[name] is None
+                else json.dumps(record[name], separators=(",", ":")) if kind == "json"
+                else record[name].isoformat() if kind == "time"
+                else record[name]
+                for name, kind in spec
+            ])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+async def to_arrow(chunks: AsyncIterator[list[dict]], include_response: bool = False) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string(), "json": pa.string(),
+             "time": pa.timestamp("us", tz="UTC")}
+    spec = fields(include_response)
+    schema = pa.schema([(name, types[kind]) for name, kind in spec])
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        async for chunk in chunks:
+            columns = {name: [record[name] for record in chunk] for name, _ in spec}
+            for name, kind in spec:
+                if kind == "json":
+                    columns[name] = [None if v is None else json.dumps(v, separators=(",", ":"))
+                                     for v in columns[name]]
+            writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()  # end-of-stream marker
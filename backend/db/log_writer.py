@@ -0,0 +1,202 @@
+"""
+Single write path for routing logs.
+
+write_log() adds a RoutingLog and folds it into metrics_rollup in the same
+transaction, so dashboard totals cannot drift from the log table.
+write_logs() does the same for a batch (imports, migrations), using COPY on
+PostgreSQL and one rollup upsert for the whole batch.
+rebuild_rollup() recomputes the rollup from routing_logs, for databases
+written before the rollup existed or after rows were edited by hand.
+prune_rollup() drops minute and hour buckets past their retention (run by
+db/archive.py's run_retention); the all-time rows are kept.
+"""
+import json
+import time
+from datetime import datetime, timezone
+import zstandard
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from config import get_settings
+from db.models import MetricsRollup, RoutingLog
+
+# resolution -> (bucket width, retention) in seconds, covering the longest
+# /api/metrics window read at that resolution; "all" is one bucket
+# (bucket_start = 0) per route/domain and is kept forever
+RESOLUTIONS = {"minute": (60, 2 * 3600), "hour": (3600, 8 * 86400)}
+ALL_TIME = "all"
+RESPONSE_ZSTD_LEVEL = 6
+
+_KEY = ["resolution", "bucket_start", "route", "domain"]
+_SUMMED = [
+    "count", "cost_usd", "savings_usd",
+    "latency_ms_sum", "latency_count", "router_latency_ms_sum", "router_latency_count",
+]
+_COPY_COLUMNS = [c for c in RoutingLog.__table__.columns if c.name != "id"]
+
+
+def _insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(MetricsRollup)
+
+
+def _rollup_rows(log: RoutingLog) -> list[dict]:
+    epoch = int(log.created_at.replace(tzinfo=timezone.utc).timestamp())
+    values = {
+        "route": log.route,
+        "domain": log.domain or "",
+        "count": 1,
+        "cost_usd": log.cost_usd or 0.0,
+        "savings_usd": log.savings_usd or 0.0,
+        "latency_ms_sum": log.latency_ms or 0.0,
+        "latency_count": int(log.latency_ms is not None),
+        "router_latency_ms_sum": log.router_latency_ms or 0.0,
+        "router_latency_count": int(log.router_latency_ms is not None),
+    }
+    rows = [
+        {"resolution": name, "bucket_start": epoch - epoch % width, **values}
+        for name, (width, _) in RESOLUTIONS.items()
+    ]
+    rows.append({"resolution": ALL_TIME, "bucket_start": 0, **values})
+    return rows
+
+
+def _prepare(log: RoutingLog, compress: bool):
+    if log.created_at is None:
+        # Naive UTC, matching the CURRENT_TIMESTAMP server default
+        log.created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    if log.response_text is not None and compress:
+        log.response_zstd = zstandard.compress(log.response_text.encode(), RESPONSE_ZSTD_LEVEL)
+        log.response_text = None
+
+
+async def _upsert_rollup(session: AsyncSession, rows: list[dict]):
+    # One single-row statement run as executemany: compiled once and cached,
+    # where a multi-row VALUES would be recompiled for every batch size
+    stmt = _insert(session.bind.dialect.name)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=_KEY,
+        set_={column: getattr(MetricsRollup, column) + getattr(stmt.excluded, column) for column in _SUMMED},
+    )
+    connection = await session.connection()
+    await connection.execute(stmt, rows)
+
+
+async def write_log(session: AsyncSession, log: RoutingLog):
+    """Add `log` and update its rollup buckets; committed together by the caller (get_db)."""
+    _prepare(log, get_settings().compress_response_text)
+    session.add(log)
+    await _upsert_rollup(session, _rollup_rows(log))
+
+
+def _merge_rollup_rows(logs: list[RoutingLog]) -> list[dict]:
+    merged: dict[tuple, dict] = {}
+    for log in logs:
+        for row in _rollup_rows(log):
+            key = tuple(row[k] for k in _KEY)
+            if key in merged:
+                for column in _SUMMED:
+                    merged[key][column] += row[column]
+            else:
+                merged[key] = row
+    return list(merged.values())
+
+
+def _column_value(column, log: RoutingLog):
+    value = getattr(log, column.name)
+    if value is None and column.default is not None and column.default.is_scalar:
+        return column.default.arg  # explicit None would bypass the column default
+    return value
+
+
+def _copy_value(column, log: RoutingLog):
+    value = _column_value(column, log)
+    if value is not None and column.name == "features":
+        return json.dumps(value)  # asyncpg's json codec takes text
+    return value
+
+
+async def write_logs(session: AsyncSession, logs: list[RoutingLog]):
+    """
+    Bulk version of write_log(). On PostgreSQL the rows are streamed with
+    COPY (asyncpg copy_records_to_table) on the session's connection, so they
+    commit or roll back with the rollup update; elsewhere with one
+    executemany INSERT. Row ids are not loaded back.
+    """
+    if not logs:
+        return
+    compress = get_settings().compress_response_text
+    for log in logs:
+        _prepare(log, compress)
+    # Runs first so the connection is already inside the session's transaction for COPY
+    await _upsert_rollup(session, _merge_rollup_rows(logs))
+    if session.bind.dialect.name == "postgresql":
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            RoutingLog.__tablename__,
+            records=[tuple(_copy_value(c, log) for c in _COPY_COLUMNS) for log in logs],
+            columns=[c.name for c in _COPY_COLUMNS],
+        )
+    else:
+        connection = await session.connection()
+        await connection.execute(
+            insert(RoutingLog),
+            [{c.name: _column_value(c, log) for c in _COPY_COLUMNS} for log in logs],
+        )
+
+
+def _epoch_sql(dialect: str) -> str:
+    if dialect == "postgresql":
+        return "CAST(EXTRACT(EPOCH FROM created_at) AS BIGINT)"
+    return "CAST(strftime('%s', created_at) AS INTEGER)"
+
+
+async def rebuild_rollup(conn: AsyncConnection) -> int:
+    """
+    Recompute metrics_rollup from routing_logs in the caller's transaction; returns rows written.
+
+    Only live rows are counted: rows already moved out by db/archive.py would
+    drop out of the totals, so scripts/rebuild_metrics_rollup.py refuses to
+    run once an archive exists.
+    """
+    epoch = _epoch_sql(conn.dialect.name)
+    aggregates = (
+        "COUNT(*), COALESCE(SUM(cost_usd), 0), COALESCE(SUM(savings_usd), 0), "
+        "COALESCE(SUM(latency_ms), 0), COUNT(latency_ms), "
+        "COALESCE(SUM(router_latency_ms), 0), COUNT(router_latency_ms)"
+    )
+    columns = ", ".join(_KEY + _SUMMED)
+
+    await conn.execute(text("DELETE FROM metrics_rollup"))
+    written = 0
+    now = int(time.time())
+    for name, (width, retention) in RESOLUTIONS.items():
+        since = now - retention
+        since -= since % width  # whole buckets, as prune_rollup() keeps them
+        result = await conn.execute(text(
+            f"INSERT INTO metrics_rollup ({columns}) "
+            f"SELECT '{name}', ({epoch} / {width}) * {width}, route, COALESCE(domain, ''), {aggregates} "
+            f"FROM routing_logs WHERE created_at IS NOT NULL AND {epoch} >= {since} GROUP BY 2, 3, 4"
+        ))
+        written += result.rowcount
+    result = await conn.execute(text(
+        f"INSERT INTO metrics_rollup ({columns}) "
+        f"SELECT '{ALL_TIME}', 0, route, COALESCE(domain, ''), {aggregates} "
+        f"FROM routing_logs GROUP BY 3, 4"
+    ))
+    return written + result.rowcount
+
+
+async def prune_rollup(session: AsyncSession, now: float | None = None) -> int:
+    """Delete minute and hour buckets older than their retention; returns rows deleted."""
+    now = time.time() if now is None else now
+    deleted = 0
+    for name, (_, retention) in RESOLUTIONS.items():
+        result = await session.execute(delete(MetricsRollup).where(
+            MetricsRollup.resolution == name, MetricsRollup.bucket_start < now - retention
+        ))
+        deleted += result.rowcount
+    return deleted
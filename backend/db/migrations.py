@@ -0,0 +1,94 @@
+"""
+Minimal forward-only schema migrations for existing databases.
+
+create_all() creates missing tables (with their indexes) but never alters a
+table that already exists, so older data/routing_logs.db files would keep
+their original schema. Each migration here runs once, in order, and is
+recorded in the schema_migrations table; statements are written to be
+idempotent so they are also safe on a freshly created schema.
+
+To change the schema: update db/models.py, then append a migration with the
+next version number. Never edit or reorder a migration that has shipped.
+"""
+import logging
+from typing import Awaitable, Callable
+from sqlalchemy import DateTime, Float, Integer, LargeBinary, inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from db.log_writer import rebuild_rollup
+
+logger = logging.getLogger(__name__)
+
+# A step is a SQL statement or an async callable taking the connection
+Step = str | Callable[[AsyncConnection], Awaitable]
+
+
+def _add_column(table: str, column: str, type_) -> Step:
+    """ALTER TABLE ... ADD COLUMN, skipped when create_all already made it."""
+    async def step(conn: AsyncConnection):
+        columns = await conn.run_sync(lambda sync: [c["name"] for c in inspect(sync).get_columns(table)])
+        if column not in columns:
+            ddl = type_.compile(dialect=conn.dialect)
+            await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+# (version, name, steps)
+MIGRATIONS: list[tuple[int, str, list[Step]]] = [
+    (1, "routing_logs indexes", [
+        "CREATE INDEX IF NOT EXISTS ix_routing_logs_created_at ON routing_logs (created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_routing_logs_route ON routing_logs (route)",
+        "CREATE INDEX IF NOT EXISTS ix_routing_logs_domain_route ON routing_logs (domain, route)",
+    ]),
+    # create_all adds the empty table; fill it from the existing logs
+    (2, "backfill metrics_rollup", [rebuild_rollup]),
+    # Totals moved to metrics_rollup; route/domain indexes now serve history filters
+    (3, "routing_logs history indexes", [
+        "DROP INDEX IF EXISTS ix_routing_logs_route",
+        "CREATE INDEX IF NOT EXISTS ix_routing_logs_route_created_at ON routing_logs (route, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_routing_logs_domain_created_at ON routing_logs (domain, created_at, id)",
+    ]),
+    (4, "routing_logs compressed response", [_add_column("routing_logs", "response_zstd", LargeBinary())]),
+    (5, "routing_logs judge scores", [
+        _add_column("routing_logs", "judge_score", Float()),
+        "CREATE INDEX IF NOT EXISTS ix_routing_logs_judged ON routing_logs (created_at) "
+        "WHERE judge_score IS NOT NULL",
+    ]),
+    # Queued runs (services/experiment_scheduler.py) also count as active
+    (6, "experiment_runs scheduling", [
+        _add_column("experiment_runs", "priority", Integer()),
+        _add_column("experiment_runs", "timeout_s", Float()),
+        _add_column("experiment_runs", "queued_at", DateTime()),
+        "UPDATE experiment_runs SET priority = 0 WHERE priority IS NULL",
+        "UPDATE experiment_runs SET queued_at = started_at WHERE queued_at IS NULL",
+        "DROP INDEX IF EXISTS uq_experiment_runs_running",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_experiment_runs_active ON experiment_runs (experiment_id) "
+        "WHERE status IN ('queued', 'running')",
+    ]),
+]
+
+
+async def run_migrations(conn: AsyncConnection) -> list[int]:
+    """Apply pending migrations inside the caller's transaction; returns the versions applied."""
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+        "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    applied = set((await conn.execute(text("SELECT version FROM schema_migrations"))).scalars())
+
+    newly_applied = []
+    for version, name, steps in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info("Applying schema migration %d: %s", version, name)
+        for step in steps:
+            if callable(step):
+                await step(conn)
+            else:
+                await conn.execute(text(step))
+        await conn.execute(
+            text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+            {"version": version, "name": name},
+        )
+        newly_applied.append(version)
+    return newly_applied
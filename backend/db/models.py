@@ -1,10 +1,33 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
-from sqlalchemy.sql import func
+import zstandard
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index, LargeBinary, PrimaryKeyConstraint
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.sql import func, text
 from db.database import Base
 
+# SQLite keeps DATETIME as text and compares it as text. Store Python-side
+# values (and bind parameters) in the same format as CURRENT_TIMESTAMP so
+# range filters and (created_at, id) keyset cursors compare like with like.
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
+
 
 class RoutingLog(Base):
     __tablename__ = "routing_logs"
+    # Keep in sync with db/migrations.py, which adds these to existing databases
+    __table_args__ = (
+        Index("ix_routing_logs_created_at", "created_at"),          # recent history
+        Index("ix_routing_logs_domain_route", "domain", "route"),   # covers the domain breakdown
+        # Keyset pagination of /api/metrics/history filtered by route or domain
+        Index("ix_routing_logs_route_created_at", "route", "created_at", "id"),
+        Index("ix_routing_logs_domain_created_at", "domain", "created_at", "id"),
+        # The few sampled, judged rows (live Pareto calibration)
+        Index(
+            "ix_routing_logs_judged", "created_at",
+            sqlite_where=text("judge_score IS NOT NULL"), postgresql_where=text("judge_score IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     query = Column(String, nullable=False)
@@ -12,6 +35,7 @@ class RoutingLog(Base):
     confidence = Column(Float, nullable=False)
     features = Column(JSON, nullable=True)
     response_text = Column(String, nullable=True)
+    response_zstd = Column(LargeBinary, nullable=True)  # response_text when COMPRESS_RESPONSE_TEXT is on
     latency_ms = Column(Float, nullable=True)
     router_latency_ms = Column(Float, nullable=True)
     input_tokens = Column(Integer, nullable=True)
@@ -20,4 +44,83 @@ class RoutingLog(Base):
     cloud_cost_usd = Column(Float, default=0.0)     # what it would have cost on cloud
     savings_usd = Column(Float, default=0.0)
     domain = Column(String, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
+    judge_score = Column(Float, nullable=True)      # 1-10, sampled by scripts/score_routing_logs.py
+    created_at = Column(Timestamp, server_default=func.now())
+
+    @property
+    def response(self) -> str | None:
+        """The response text, whichever column it was stored in."""
+        if self.response_zstd is not None:
+            return zstandard.decompress(self.response_zstd).decode()
+        return self.response_text
+
+
+class MetricsRollup(Base):
+    """
+    Pre-aggregated routing_logs totals, maintained by db/log_writer.py.
+
+    Each log is added to three buckets: its minute, its hour, and a single
+    all-time bucket (bucket_start = 0), so dashboard totals read a handful of
+    rows instead of scanning routing_logs.
+    """
+    __tablename__ = "metrics_rollup"
+    __table_args__ = (PrimaryKeyConstraint("resolution", "bucket_start", "route", "domain"),)
+
+    resolution = Column(String, nullable=False)     # "minute", "hour" or "all"
+    bucket_start = Column(Integer, nullable=False)  # UTC epoch seconds (0 for "all")
+    route = Column(String, nullable=False)
+    domain = Column(String, nullable=False, default="")  # "" = no domain
+    count = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    savings_usd = Column(Float, nullable=False, default=0.0)
+    latency_ms_sum = Column(Float, nullable=False, default=0.0)
+    latency_count = Column(Integer, nullable=False, default=0)
+    router_latency_ms_sum = Column(Float, nullable=False, default=0.0)
+    router_latency_count = Column(Integer, nullable=False, default=0)
+
+
+class LatencySketch(Base):
+    """Persisted DDSketch for one (resolution, bucket, metric, route, domain); see services/latency_sketch.py."""
+    __tablename__ = "latency_sketches"
+    __table_args__ = (PrimaryKeyConstraint("resolution", "bucket_start", "metric", "route", "domain"),)
+
+    resolution = Column(String, nullable=False)     # "5min", "hour" or "all"
+    bucket_start = Column(Integer, nullable=False)  # UTC epoch seconds (0 for "all")
+    metric = Column(String, nullable=False)         # router_latency_ms, latency_ms, ttft_ms
+    route = Column(String, nullable=False)
+    domain = Column(String, nullable=False, default="")
+    sketch = Column(JSON, nullable=False)
+    updated_at = Column(Float, nullable=False)
+
+
+class ExperimentRun(Base):
+    """One run of an experiment script; see services/experiment_runs.py."""
+    __tablename__ = "experiment_runs"
+    __table_args__ = (
+        Index("ix_experiment_runs_experiment_id", "experiment_id", "id"),  # run history
+        # At most one queued or running run per experiment, whichever worker submits it
+        Index(
+            "uq_experiment_runs_active", "experiment_id", unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    experiment_id = Column(String, nullable=False)
+    status = Column(String, nullable=False)         # queued, running, completed, failed, cancelled
+    config = Column(JSON, nullable=True)            # ExperimentConfig overrides
+    priority = Column(Integer, nullable=False, default=0)
+    timeout_s = Column(Float, nullable=True)
+    progress_current = Column(Integer, nullable=True)
+    progress_total = Column(Integer, nullable=True)
+    queued_at = Column(Timestamp, server_default=func.now())
+    started_at = Column(Timestamp, nullable=True)
+    completed_at = Column(Timestamp, nullable=True)
+    exit_code = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    owner = Column(String, nullable=True)           # "instance:pid" of the backend worker running it
+    pid = Column(Integer, nullable=True)            # the script's process
+    log_path = Column(String, nullable=True)
+    log_lines = Column(Integer, nullable=False, default=0)
+    result_files = Column(JSON, nullable=True)      # files the run wrote (EXPERIMENT_RESULTS)
@@ -1,14 +1,47 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from db.database import init_db
+from config import get_settings
+from db.database import engine, init_db
+from db.checkpoint import run_checkpoints
+from db.archive import run_retention
 from routers import chat, compare, metrics, experiments
+from services.experiment_workers import get_experiment_workers
+from services.latency_sketch import get_latency_sketches
+from services import telemetry
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(name)s - %(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    settings = get_settings()
     await init_db()
+    if settings.experiment_runner == "worker":
+        # Workers import the experiment scripts now rather than on the first run
+        get_experiment_workers().start(experiments.EXPERIMENT_SCRIPTS.values())
+    # Runs left behind by a backend process that is gone (e.g. --reload)
+    await experiments.restore_queue()
+    sketches = get_latency_sketches()
+    await sketches.load()
+    tasks = [asyncio.create_task(sketches.run_snapshots(settings.sketch_snapshot_interval_s))]
+    if engine.dialect.name == "sqlite":
+        tasks.append(asyncio.create_task(run_checkpoints(settings.sqlite_checkpoint_interval_s)))
+    # Prunes expired metrics_rollup buckets, and archives logs if LOG_RETENTION_DAYS is set
+    tasks.append(asyncio.create_task(run_retention(settings.log_retention_days, settings.archive_interval_s)))
     yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await sketches.snapshot()
+    get_experiment_workers().close()
+    telemetry.mark_worker_dead()
+    # Pooled aiosqlite connections (tuned profile) each hold a thread that
+    # keeps the process alive until the pool is closed
+    await engine.dispose()
 
 
 app = FastAPI(title="Hybrid LLM Router", lifespan=lifespan)
@@ -30,3 +63,9 @@ app.include_router(experiments.router)
 @app.get("/health")
 async def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    body, content_type = telemetry.render()
+    return Response(body, media_type=content_type)
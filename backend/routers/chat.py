@@ -1,17 +1,29 @@
 """Main chat endpoint with SSE streaming and routing."""
 import json
+import logging
+import time
 from fastapi import APIRouter
 from sse_starlette.sse import EventSourceResponse
 from schemas.api import ChatRequest, Route
 from services.router_model import get_router
 from services.ollama_client import get_ollama
 from services.openai_client import get_openai
+from services.stream_coalescer import coalesce_chunks, single_frames
+from services.sse import close_on_disconnect
+from services.latency_sketch import get_latency_sketches
+from services.metrics_broadcaster import get_metrics_broadcaster
+from services.response_cache import get_metrics_cache
+from services.telemetry import CLOUD_SAVINGS, CLOUD_SPEND, DB_WRITE, ROUTED_REQUESTS
+from config import get_settings
 from db.database import get_db
 from db.models import RoutingLog
+from db.log_writer import write_log
 import sys
 sys.path.insert(0, ".")
 from utils.cost_model import compute_cost
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -36,11 +48,19 @@ async def chat(request: ChatRequest):
     else:
         decision = rt.predict(request.message, threshold=request.threshold)
 
+    ROUTED_REQUESTS.labels(decision.route.value).inc()
     if decision.route == Route.LOCAL:
         result = await get_ollama().generate(request.message)
     else:
         result = await get_openai().generate(request.message)
 
+    domain = decision.features.get("domain", "general")
+    get_latency_sketches().record(
+        decision.route.value, domain,
+        router_latency_ms=decision.router_latency_ms,
+        latency_ms=result["latency_ms"],
+    )
+
     cost = compute_cost(
         route=decision.route,
         input_tokens=result["input_tokens"],
@@ -52,24 +72,30 @@ async def chat(request: ChatRequest):
         output_tokens=result["output_tokens"],
     )
 
+    CLOUD_SPEND.inc(cost)
+    CLOUD_SAVINGS.inc(cloud_cost - cost)
+
     # Log to database
-    async with get_db() as db:
-        log = RoutingLog(
-            query=request.message,
-            route=decision.route.value,
-            confidence=decision.confidence,
-            features=decision.features,
-            response_text=result["text"],
-            latency_ms=result["latency_ms"],
-            router_latency_ms=decision.router_latency_ms,
-            input_tokens=result["input_tokens"],
-            output_tokens=result["output_tokens"],
-            cost_usd=cost,
-            cloud_cost_usd=cloud_cost,
-            savings_usd=cloud_cost - cost,
-            domain=decision.features.get("domain", "general"),
-        )
-        db.add(log)
+    with DB_WRITE.time():
+        async with get_db() as db:
+            log = RoutingLog(
+                query=request.message,
+                route=decision.route.value,
+                confidence=decision.confidence,
+                features=decision.features,
+                response_text=result["text"],
+                latency_ms=result["latency_ms"],
+                router_latency_ms=decision.router_latency_ms,
+                input_tokens=result["input_tokens"],
+                output_tokens=result["output_tokens"],
+                cost_usd=cost,
+                cloud_cost_usd=cloud_cost,
+                savings_usd=cloud_cost - cost,
+                domain=domain,
+            )
+            await write_log(db, log)
+    get_metrics_cache().invalidate()
+    get_metrics_broadcaster().publish(log)
 
     return {
         "response": result["text"],
@@ -91,6 +117,11 @@ async def chat_stream(request: ChatRequest):
     """
     rt = get_router()
     decision = rt.predict(request.message, threshold=request.threshold)
+    ROUTED_REQUESTS.labels(decision.route.value).inc()
+
+    settings = get_settings()
+    coalesce_ms = request.coalesce_ms if request.coalesce_ms is not None else settings.stream_coalesce_ms
+    coalesce_bytes = request.coalesce_bytes or settings.stream_coalesce_bytes
 
     async def event_generator():
         # Send routing decision first
@@ -106,9 +137,41 @@ async def chat_stream(request: ChatRequest):
         else:
             gen = get_openai().stream(request.message)
 
-        async for chunk in gen:
-            full_text.append(chunk)
-            yield {"event": "token", "data": json.dumps({"text": chunk})}
+        # Group chunks into frames; the first chunk is always sent alone (TTFT)
+        if coalesce_ms > 0:
+            frames = coalesce_chunks(gen, coalesce_ms, coalesce_bytes)
+        else:
+            frames = single_frames(gen)
+
+        start = time.perf_counter()
+        ttft_ms = None
+        completed = False
+        try:
+            async for frame in frames:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start) * 1000
+                full_text.extend(frame)
+                yield {"event": "token", "data": json.dumps({"text": "".join(frame)})}
+            completed = True
+            get_latency_sketches().record(
+                decision.route.value, decision.features.get("domain", "general"),
+                router_latency_ms=decision.router_latency_ms,
+                ttft_ms=ttft_ms,
+                latency_ms=(time.perf_counter() - start) * 1000,
+            )
+        finally:
+            if not completed:
+                # Client disconnected (or the upstream failed): close the backend
+                # stream right away so the model stops decoding tokens nobody reads.
+                await frames.aclose()
+                await gen.aclose()
+                logger.info(
+                    "Stream aborted after %.0f ms: route=%s, ~%d tokens (%d chars) sent",
+                    (time.perf_counter() - start) * 1000,
+                    decision.route.value,
+                    len(full_text),
+                    sum(len(c) for c in full_text),
+                )
 
         # Send completion event
         yield {
@@ -116,4 +179,7 @@ async def chat_stream(request: ChatRequest):
             "data": json.dumps({"full_text": "".join(full_text)}),
         }
 
-    return EventSourceResponse(event_generator())
+    # EventSourceResponse stops iterating on disconnect but leaves the generator
+    # suspended; closing it in the background task runs the cleanup above.
+    events = event_generator()
+    return EventSourceResponse(events, background=close_on_disconnect(events))
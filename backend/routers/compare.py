@@ -1,19 +1,41 @@
 """Compare mode: run both models on the same query, side by side."""
 import asyncio
+import json
+import logging
+import time
 from fastapi import APIRouter
+from sse_starlette.sse import EventSourceResponse
 from schemas.api import CompareRequest, CompareResponse
 from services.router_model import get_router
 from services.ollama_client import get_ollama
 from services.openai_client import get_openai
-from services.judge import Judge
+from services.judge import RESPONSE_LABEL, Judge, JudgeParseError
+from services.sse import close_on_disconnect
 import sys
 sys.path.insert(0, ".")
 from utils.cost_model import compute_cost
 from schemas.api import Route
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+VERDICT_SIDES = {"A": "local", "B": "cloud", "TIE": "tie"}
+
+
+def side_reasoning(reasoning: str) -> str:
+    """Reword the judge's "Response A/B" as the local/cloud model for display."""
+    return RESPONSE_LABEL.sub(lambda m: "the local model" if m.group(2) == "A" else "the cloud model", reasoning)
+
+
+async def judge_side(judge: Judge, query: str, response: str, include_reasoning: bool) -> dict:
+    """Score one side on its own."""
+    if include_reasoning:
+        return await judge.score_with_reasoning(query, response)
+    return {"score": await judge.score(query, response, mode="score_only")}
+
+
 @router.post("/api/compare", response_model=CompareResponse)
 async def compare(request: CompareRequest):
     """Run query through both models simultaneously, return side-by-side."""
@@ -25,28 +47,163 @@ async def compare(request: CompareRequest):
     cloud_task = asyncio.create_task(get_openai().generate(request.message))
     local_result, cloud_result = await asyncio.gather(local_task, cloud_task)
 
-    # Judge both responses with reasoning
-    judge = Judge()
-    local_judge_task = asyncio.create_task(
-        judge.score_with_reasoning(request.message, local_result["text"])
-    )
-    cloud_judge_task = asyncio.create_task(
-        judge.score_with_reasoning(request.message, cloud_result["text"])
-    )
-    local_judge, cloud_judge = await asyncio.gather(local_judge_task, cloud_judge_task)
-
-    # Combine reasoning from both judgments
-    judge_reasoning = f"Local model: {local_judge.get('reasoning', 'N/A')}\n\nCloud model: {cloud_judge.get('reasoning', 'N/A')}"
+    # Judge both responses in one comparative call (A = local, B = cloud)
+    try:
+        judged = await Judge().compare(
+            request.message, local_result["text"], cloud_result["text"], reasoning=request.include_reasoning
+        )
+    except JudgeParseError as e:
+        # Still return both responses, unscored
+        logger.warning("Compare judge reply unusable: %s", e)
+        judged = {"score_a": None, "score_b": None, "verdict": None}
 
     return CompareResponse(
         query=request.message,
         local_response=local_result["text"],
         cloud_response=cloud_result["text"],
-        local_score=local_judge.get("score", 0.0),
-        cloud_score=cloud_judge.get("score", 0.0),
+        local_score=judged["score_a"],
+        cloud_score=judged["score_b"],
         local_latency_ms=local_result["latency_ms"],
         cloud_latency_ms=cloud_result["latency_ms"],
         local_tokens=local_result.get("output_tokens", 0),
         cloud_tokens=cloud_result.get("output_tokens", 0),
-        judge_reasoning=judge_reasoning,
+        judge_reasoning=side_reasoning(judged.get("reasoning", "")),
+        judge_verdict=VERDICT_SIDES.get(judged["verdict"]),
     )
+
+
+@router.post("/api/compare/stream")
+async def compare_stream(request: CompareRequest):
+    """
+    SSE compare: interleave local and cloud tokens as they arrive, score
+    each side as soon as its own generation finishes, then ask the judge
+    which side won once both have finished.
+
+    Events:
+      routing          router decision for the query
+      token            {side, text}
+      generation_done  {side, latency_ms, ttft_ms, tokens}  (tokens = streamed chunks)
+      score            {side, score}
+      reasoning        {side, reasoning}  (include_reasoning only)
+      verdict          {verdict: "local" | "cloud" | "tie"}
+      error            {side, detail}  (side "judge" when the verdict call fails)
+      done             CompareResponse fields
+
+    Scores arrive at ~each side's own latency + one judge call and the
+    verdict at ~max(local, cloud) + one judge call. The verdict call is the
+    score-only comparative prompt; reasoning, when asked for, comes from the
+    per-side calls. If a side's judge reply is unusable, an error event is
+    sent and its score in done is null.
+    """
+    rt = get_router()
+    decision = rt.predict(request.message)
+    judge = Judge()
+    queue: asyncio.Queue = asyncio.Queue()
+    texts: dict[str, str] = {}
+
+    async def run_side(side: str, gen):
+        start = time.perf_counter()
+        ttft_ms = None
+        chunks = []
+        try:
+            async for chunk in gen:
+                if ttft_ms is None:
+                    ttft_ms = (time.perf_counter() - start) * 1000
+                chunks.append(chunk)
+                await queue.put(("token", {"side": side, "text": chunk}))
+            texts[side] = "".join(chunks)
+            await queue.put(("generation_done", {
+                "side": side,
+                "latency_ms": (time.perf_counter() - start) * 1000,
+                "ttft_ms": ttft_ms,
+                "tokens": len(chunks),
+            }))
+
+            judged = await judge_side(judge, request.message, texts[side], request.include_reasoning)
+            await queue.put(("score", {"side": side, "score": judged["score"]}))
+            if request.include_reasoning:
+                await queue.put(("reasoning", {"side": side, "reasoning": judged.get("reasoning", "N/A")}))
+        except Exception as e:
+            await queue.put(("error", {"side": side, "detail": str(e)}))
+        finally:
+            await gen.aclose()
+            await queue.put(("side_finished", {"side": side}))
+
+    async def judge_verdict():
+        try:
+            judged = await judge.compare(request.message, texts["local"], texts["cloud"], reasoning=False)
+            await queue.put(("verdict", {"verdict": VERDICT_SIDES[judged["verdict"]]}))
+        except Exception as e:
+            await queue.put(("error", {"side": "judge", "detail": str(e)}))
+        finally:
+            await queue.put(("side_finished", {"side": "judge"}))
+
+    tasks: list[asyncio.Task] = []
+
+    async def event_generator():
+        try:
+            yield {"event": "routing", "data": json.dumps(decision.model_dump())}
+
+            tasks.extend([
+                asyncio.create_task(run_side("local", get_ollama().stream(request.message))),
+                asyncio.create_task(run_side("cloud", get_openai().stream(request.message))),
+            ])
+
+            summary = {
+                side: {"text": [], "score": None, "reasoning": None, "latency_ms": 0.0, "tokens": 0}
+                for side in ("local", "cloud")
+            }
+            verdict = None
+            verdict_started = False
+            remaining = 2
+            while remaining:
+                event, data = await queue.get()
+                if event == "side_finished":
+                    remaining -= 1
+                    continue
+                if event == "token":
+                    summary[data["side"]]["text"].append(data["text"])
+                elif event == "generation_done":
+                    summary[data["side"]]["latency_ms"] = data["latency_ms"]
+                    summary[data["side"]]["tokens"] = data["tokens"]
+                    if len(texts) == 2 and not verdict_started:
+                        # Both generations are in: one comparative call for the verdict,
+                        # alongside the slower side's score
+                        verdict_started = True
+                        remaining += 1
+                        tasks.append(asyncio.create_task(judge_verdict()))
+                elif event in ("score", "reasoning"):
+                    summary[data["side"]][event] = data[event]
+                elif event == "verdict":
+                    verdict = data["verdict"]
+                yield {"event": event, "data": json.dumps(data)}
+
+            local, cloud = summary["local"], summary["cloud"]
+            yield {
+                "event": "done",
+                "data": CompareResponse(
+                    query=request.message,
+                    local_response="".join(local["text"]),
+                    cloud_response="".join(cloud["text"]),
+                    local_score=local["score"],
+                    cloud_score=cloud["score"],
+                    local_latency_ms=local["latency_ms"],
+                    cloud_latency_ms=cloud["latency_ms"],
+                    local_tokens=local["tokens"],
+                    cloud_tokens=cloud["tokens"],
+                    judge_reasoning="\n\n".join(
+                        f"{side.title()} model: {summary[side]['reasoning']}"
+                        for side in ("local", "cloud") if summary[side]["reasoning"] is not None
+                    ),
+                    judge_verdict=verdict,
+                ).model_dump_json(),
+            }
+        finally:
+            # Client went away before both sides finished: stop generation/judging
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.wait(tasks)
+
+    events = event_generator()
+    return EventSourceResponse(events, background=close_on_disconnect(events))
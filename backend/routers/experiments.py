@@ -6,14 +6,25 @@ Endpoints for running and monitoring evaluation experiments.
 import asyncio
 import json
 import re
-from collections import deque
-from datetime import datetime
+import time
+from contextlib import aclosing
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Header, HTTPException, Query
 from pydantic import BaseModel
+from sse_starlette.sse import EventSourceResponse
+
+from db.models import ExperimentRun
+from services.experiment_logs import ExperimentLog, event_id, resume_point
+from config import get_settings
+from services.experiment_runs import (
+    RunLogFile, create_run, finish_run, get_run, latest_runs, list_runs, reconcile_runs, start_run, update_run,
+)
+from services.experiment_scheduler import Job, get_experiment_scheduler, terminate_process_group
+from services.experiment_workers import ExperimentWorkerError, get_experiment_workers
+from services.sse import close_on_disconnect
 
 router = APIRouter(prefix="/api/experiments", tags=["experiments"])
 
@@ -29,6 +40,31 @@ EXPERIMENT_SCRIPTS = {
     "e6_error_analysis": "scripts/eval_error_analysis.py",
 }
 
+# Entry function of each script, called directly when EXPERIMENT_RUNNER=worker
+EXPERIMENT_ENTRYPOINTS = {
+    "e1_baselines": "run_baselines",
+    "e2_judge_validation": "main",
+    "e3_label_data": "main",
+    "e3_train_router": "main",
+    "e3_train_feature": "main",
+    "e3_routellm": "main",
+    "e4_evaluation": "main",
+    "e6_error_analysis": "main",
+}
+
+# Shared resources each experiment uses, for the scheduler's per-resource limits:
+# gpu = Ollama or torch, judge = judge model calls, cloud = cloud model calls
+EXPERIMENT_RESOURCES = {
+    "e1_baselines": {"gpu", "cloud", "judge"},
+    "e2_judge_validation": {"gpu", "judge"},
+    "e3_label_data": {"gpu", "judge"},
+    "e3_train_router": {"gpu"},
+    "e3_train_feature": set(),
+    "e3_routellm": {"cloud"},
+    "e4_evaluation": {"gpu", "judge"},
+    "e6_error_analysis": {"gpu"},
+}
+
 # Experiment ID to results file mapping
 EXPERIMENT_RESULTS = {
     "e1_baselines": ["data/results/mtbench_local_scores.json", "data/results/mtbench_cloud_scores.json"],
@@ -52,7 +88,7 @@ ExperimentId = Literal[
     "e6_error_analysis",
 ]
 
-ExperimentStatus = Literal["idle", "running", "completed", "failed"]
+ExperimentStatus = Literal["idle", "queued", "running", "completed", "failed", "cancelled"]
 
 
 class ExperimentProgress(BaseModel):
@@ -69,12 +105,41 @@ class ExperimentState(BaseModel):
     completed_at: Optional[str] = None
     results: Optional[dict] = None
     error: Optional[str] = None
+    run_id: Optional[int] = None
+
+
+class ExperimentRunInfo(BaseModel):
+    run_id: int
+    experiment_id: str
+    status: ExperimentStatus
+    config: Optional[dict] = None
+    priority: int = 0
+    timeout_s: Optional[float] = None
+    progress: Optional[ExperimentProgress] = None
+    queued_at: Optional[str] = None
+    started_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    exit_code: Optional[int] = None
+    error: Optional[str] = None
+    result_files: Optional[list[str]] = None
+    log_lines: int = 0
 
 
 class ExperimentConfig(BaseModel):
     judge_model: Optional[str] = None
     limit: Optional[int] = None
     threshold: Optional[float] = None
+    priority: int = 0                  # higher runs first among queued runs
+    timeout_s: Optional[float] = None  # default: EXPERIMENT_TIMEOUT_S
+
+
+class QueuedJob(BaseModel):
+    run_id: int
+    experiment_id: str
+    status: ExperimentStatus
+    priority: int
+    resources: list[str]
+    timeout_s: Optional[float] = None
 
 
 class CostEstimate(BaseModel):
@@ -84,10 +149,16 @@ class CostEstimate(BaseModel):
     model: str
 
 
-# In-memory state storage
-experiments_state: dict[str, ExperimentState] = {}
-experiments_logs: dict[str, deque] = {}
-experiments_processes: dict[str, asyncio.subprocess.Process] = {}
+# Runs are persisted in experiment_runs (services/experiment_runs.py). Only the
+# script handles and live log buffers of runs started by this worker are kept
+# in memory, keyed by run id.
+experiments_processes: dict[int, asyncio.subprocess.Process] = {}
+experiments_logs: dict[int, ExperimentLog] = {}
+
+PROGRESS_PATTERN = re.compile(r"\[PROGRESS\]\s*(\d+)/(\d+)")
+PROGRESS_WRITE_INTERVAL_S = 1.0  # progress updates can come much faster than this
+LOG_POLL_S = 0.5                 # following another worker's run
+LOG_READ_LINES = 1000
 
 
 def get_initial_state(experiment_id: str) -> ExperimentState:
@@ -123,14 +194,59 @@ def load_results(experiment_id: str) -> Optional[dict]:
     return results if results else None
 
 
-async def run_experiment_process(experiment_id: str, config: ExperimentConfig):
-    """Run an experiment script as a subprocess."""
-    script_path = EXPERIMENT_SCRIPTS.get(experiment_id)
-    if not script_path:
-        return
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.replace(tzinfo=timezone.utc).isoformat() if value else None
 
+
+def _progress(run: ExperimentRun) -> Optional[ExperimentProgress]:
+    if run.progress_total is None:
+        return None
+    current, total = run.progress_current or 0, run.progress_total
+    return ExperimentProgress(current=current, total=total, percent=(current / total * 100) if total > 0 else 0)
+
+
+def run_state(run: ExperimentRun) -> ExperimentState:
+    """ExperimentState of an experiment's latest run."""
+    return ExperimentState(
+        experiment_id=run.experiment_id,
+        status=run.status,
+        progress=_progress(run),
+        started_at=_iso(run.started_at),
+        completed_at=_iso(run.completed_at),
+        results=load_results(run.experiment_id) if run.status == "completed" else None,
+        error=run.error,
+        run_id=run.id,
+    )
+
+
+def run_info(run: ExperimentRun) -> ExperimentRunInfo:
+    return ExperimentRunInfo(
+        run_id=run.id,
+        experiment_id=run.experiment_id,
+        status=run.status,
+        config=run.config,
+        priority=run.priority or 0,
+        timeout_s=run.timeout_s,
+        progress=_progress(run),
+        queued_at=_iso(run.queued_at),
+        started_at=_iso(run.started_at),
+        completed_at=_iso(run.completed_at),
+        exit_code=run.exit_code,
+        error=run.error,
+        result_files=run.result_files,
+        log_lines=run.log_lines or 0,
+    )
+
+
+def _timestamped(line: str) -> str:
+    return f"[{datetime.now().strftime('%H:%M:%S')}] {line}"
+
+
+async def _run_script(run: ExperimentRun, config: ExperimentConfig, log: ExperimentLog,
+                      record_progress, outcome: dict) -> Optional[str]:
+    """Run the experiment as `python scripts/...`, parsing progress from its output; returns an error or None."""
     # Build command with optional config overrides
-    cmd = ["python", script_path]
+    cmd = ["python", EXPERIMENT_SCRIPTS[run.experiment_id]]
     if config.judge_model:
         cmd.extend(["--judge-model", config.judge_model])
     if config.limit:
@@ -138,102 +254,209 @@ async def run_experiment_process(experiment_id: str, config: ExperimentConfig):
     if config.threshold:
         cmd.extend(["--threshold", str(config.threshold)])
 
-    # Initialize log buffer
-    experiments_logs[experiment_id] = deque(maxlen=1000)
-
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        cwd=Path(__file__).parent.parent.parent,  # Project root
+        start_new_session=True,  # own process group, so cancel also stops its children
+    )
+    experiments_processes[run.id] = process
     try:
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.STDOUT,
-            cwd=Path(__file__).parent.parent.parent,  # Project root
-        )
-        experiments_processes[experiment_id] = process
+        await update_run(run.id, pid=process.pid)
 
         # Read output line by line
-        progress_pattern = re.compile(r"\[PROGRESS\]\s*(\d+)/(\d+)")
-
         async for line in process.stdout:
             line_text = line.decode().strip()
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            log_entry = f"[{timestamp}] {line_text}"
-            experiments_logs[experiment_id].append(log_entry)
-
-            # Parse progress updates
-            match = progress_pattern.search(line_text)
+            log.append(_timestamped(line_text))
+            match = PROGRESS_PATTERN.search(line_text)
             if match:
-                current = int(match.group(1))
-                total = int(match.group(2))
-                percent = (current / total * 100) if total > 0 else 0
-
-                state = experiments_state.get(experiment_id)
-                if state:
-                    state.progress = ExperimentProgress(
-                        current=current,
-                        total=total,
-                        percent=percent,
-                    )
+                await record_progress(int(match.group(1)), int(match.group(2)))
 
         # Wait for process to complete
         await process.wait()
+    except asyncio.CancelledError:
+        await terminate_process_group(process, get_settings().experiment_cancel_grace_s)
+        raise
+    finally:
+        experiments_processes.pop(run.id, None)
+        outcome["exit_code"] = process.returncode
+
+    return None if process.returncode == 0 else f"Process exited with code {process.returncode}"
+
+
+def _worker_options(config: ExperimentConfig) -> dict:
+    """
+    Keyword arguments for an entry function: the config overrides that are
+    set. The worker passes those the function accepts; every other parameter
+    keeps its default, the same as the script's command-line default.
+    """
+    return config.model_dump(exclude_none=True, exclude={"priority", "timeout_s"})
 
-        # Update state based on exit code
-        state = experiments_state.get(experiment_id)
-        if state:
-            if process.returncode == 0:
-                state.status = "completed"
-                state.results = load_results(experiment_id)
-            else:
-                state.status = "failed"
-                state.error = f"Process exited with code {process.returncode}"
-            state.completed_at = datetime.now().isoformat()
 
+async def _run_in_worker(run: ExperimentRun, config: ExperimentConfig, log: ExperimentLog,
+                         record_progress) -> Optional[str]:
+    """Call the script's entry function in a warm worker process; returns an error or None."""
+    messages = get_experiment_workers().run(
+        EXPERIMENT_SCRIPTS[run.experiment_id], EXPERIMENT_ENTRYPOINTS[run.experiment_id], _worker_options(config)
+    )
+    try:
+        # aclosing: a cancel between messages must still stop the worker
+        async with aclosing(messages):
+            async for message in messages:
+                if message[0] == "log":
+                    log.append(_timestamped(message[1]))
+                else:
+                    await record_progress(message[1], message[2])
+    except ExperimentWorkerError as e:
+        return str(e)
+    return None
+
+
+async def run_experiment_process(job: Job):
+    """
+    Scheduler runner: run the job's experiment (as a subprocess, or in a
+    worker with EXPERIMENT_RUNNER=worker), recording its output and outcome
+    on the run.
+    """
+    log = experiments_logs[job.run_id]
+    status = "failed"
+    progress: dict = {}
+    outcome: dict = {}
+    last_write = 0.0
+
+    async def record_progress(current: int, total: int):
+        nonlocal progress, last_write
+        progress = {"progress_current": current, "progress_total": total}
+        if time.monotonic() - last_write >= PROGRESS_WRITE_INTERVAL_S:
+            await update_run(job.run_id, log_lines=log.last_seq, **progress)
+            last_write = time.monotonic()
+
+    try:
+        run = await get_run(job.run_id)
+        await start_run(run.id)
+        config = ExperimentConfig(**(run.config or {}))
+
+        if get_settings().experiment_runner == "worker":
+            error = await _run_in_worker(run, config, log, record_progress)
+        else:
+            error = await _run_script(run, config, log, record_progress, outcome)
+
+        # Record the outcome
+        if error is None:
+            status = "completed"
+            outcome["result_files"] = [f for f in EXPERIMENT_RESULTS.get(job.experiment_id, []) if Path(f).exists()]
+        else:
+            outcome["error"] = error
+
+    except asyncio.CancelledError:
+        # Cancelled or timed out by the scheduler (or the backend is shutting down);
+        # the script or worker has been stopped
+        if job.stop_reason == "cancelled":
+            status, outcome["error"] = "cancelled", "Cancelled"
+        elif job.stop_reason == "timeout":
+            outcome["error"] = f"Timed out after {job.timeout_s:g}s"
+        else:
+            outcome["error"] = "Interrupted: the backend shut down"
     except Exception as e:
-        state = experiments_state.get(experiment_id)
-        if state:
-            state.status = "failed"
-            state.error = str(e)
-            state.completed_at = datetime.now().isoformat()
+        outcome["error"] = str(e)
     finally:
-        experiments_processes.pop(experiment_id, None)
+        await finish_run(job.run_id, status, log_lines=log.last_seq, **progress, **outcome)
+        log.close(status)
+        experiments_logs.pop(job.run_id, None)
+
+
+def _submit(run: ExperimentRun):
+    """Queue a run with the scheduler; its log is created now so clients can subscribe while it waits."""
+    experiments_logs[run.id] = ExperimentLog(run.id, RunLogFile(run.log_path), max_lines=LOG_READ_LINES)
+    scheduler = get_experiment_scheduler()
+    scheduler.set_runner(run_experiment_process)
+    scheduler.submit(Job(
+        run_id=run.id,
+        experiment_id=run.experiment_id,
+        resources=frozenset(EXPERIMENT_RESOURCES.get(run.experiment_id, ())),
+        priority=run.priority or 0,
+        timeout_s=run.timeout_s,
+    ))
+
+
+async def restore_queue():
+    """At startup: settle runs left behind by a previous backend process and queue its waiting ones again."""
+    for run in await reconcile_runs():
+        _submit(run)
 
 
 @router.post("/{experiment_id}/run", response_model=ExperimentState)
 async def run_experiment(experiment_id: ExperimentId, config: ExperimentConfig = None):
-    """Trigger an experiment to run."""
+    """Queue an experiment run; it starts when the scheduler's limits allow."""
     if config is None:
         config = ExperimentConfig()
 
-    # Check if already running
-    current_state = experiments_state.get(experiment_id)
-    if current_state and current_state.status == "running":
-        raise HTTPException(status_code=409, detail="Experiment is already running")
-
-    # Initialize state
-    state = ExperimentState(
-        experiment_id=experiment_id,
-        status="running",
-        progress=None,
-        started_at=datetime.now().isoformat(),
-        completed_at=None,
-        results=None,
-        error=None,
-    )
-    experiments_state[experiment_id] = state
+    # The insert fails if the experiment is already queued or running, on any worker
+    timeout_s = config.timeout_s or get_settings().experiment_timeout_s or None
+    run = await create_run(experiment_id, config.model_dump(exclude_none=True), config.priority, timeout_s)
+    if run is None:
+        raise HTTPException(status_code=409, detail="Experiment is already queued or running")
+    _submit(run)
+
+    return run_state(run)
+
+
+@router.post("/{experiment_id}/cancel", response_model=ExperimentState)
+async def cancel_experiment(experiment_id: ExperimentId):
+    """
+    Cancel the experiment's queued or running run. A running script's
+    process group gets SIGTERM, then SIGKILL after EXPERIMENT_CANCEL_GRACE_S;
+    the run is marked cancelled once it has exited.
+    """
+    run = await _latest_run(experiment_id)
+    if run is None or run.status not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail="Experiment is not queued or running")
+
+    stopped = get_experiment_scheduler().cancel(run.id)
+    if stopped is None:
+        raise HTTPException(status_code=409, detail="Run is managed by another backend process")
+    if stopped == "queued":
+        await finish_run(run.id, "cancelled", error="Cancelled before it started")
+        log = experiments_logs.pop(run.id, None)
+        if log is not None:
+            log.close("cancelled")
+    else:
+        job = next(job for job in get_experiment_scheduler().running if job.run_id == run.id)
+        await asyncio.shield(job.task)  # wait for the script to exit and the outcome to be recorded
+    return run_state(await get_run(run.id))
+
+
+@router.get("/queue", response_model=list[QueuedJob])
+async def get_queue():
+    """Runs this backend process is running or has queued, in the order they will start."""
+    scheduler = get_experiment_scheduler()
+    return [
+        QueuedJob(
+            run_id=job.run_id,
+            experiment_id=job.experiment_id,
+            status=status,
+            priority=job.priority,
+            resources=sorted(job.resources),
+            timeout_s=job.timeout_s,
+        )
+        for status, jobs in (("running", scheduler.running), ("queued", scheduler.queued))
+        for job in jobs
+    ]
 
-    # Start experiment in background
-    asyncio.create_task(run_experiment_process(experiment_id, config))
 
-    return state
+async def _latest_run(experiment_id: str) -> Optional[ExperimentRun]:
+    runs = await list_runs(experiment_id, limit=1)
+    return runs[0] if runs else None
 
 
 @router.get("/{experiment_id}/status", response_model=ExperimentState)
 async def get_experiment_status(experiment_id: ExperimentId):
-    """Get the current status of an experiment."""
-    state = experiments_state.get(experiment_id)
+    """Get the status of an experiment's latest run."""
+    run = await _latest_run(experiment_id)
 
-    if not state:
-        # Check if results exist from a previous run
+    if not run:
+        # Check if results exist from a run that predates run history
         results = load_results(experiment_id)
         if results:
             return ExperimentState(
@@ -243,51 +466,94 @@ async def get_experiment_status(experiment_id: ExperimentId):
             )
         return get_initial_state(experiment_id)
 
-    return state
+    return run_state(run)
+
+
+@router.get("/{experiment_id}/runs", response_model=list[ExperimentRunInfo])
+async def get_experiment_runs(
+    experiment_id: ExperimentId,
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[int] = None,
+):
+    """Run history, newest first. Pass the last run_id as `before` for the next page."""
+    return [run_info(run) for run in await list_runs(experiment_id, limit, before)]
 
 
 @router.get("/{experiment_id}/logs")
-async def stream_experiment_logs(experiment_id: ExperimentId):
-    """Stream live log output from a running experiment."""
-    async def generate():
-        sent_count = 0
-        logs = experiments_logs.get(experiment_id, deque())
+async def stream_experiment_logs(
+    experiment_id: ExperimentId,
+    run_id: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Stream the log output of a run (default: the latest) over SSE.
+
+    Each line is sent once with an event id; after a reconnect with
+    Last-Event-ID the stream continues from the next line. A run started by
+    this worker pushes lines as they are read (services/experiment_logs.py);
+    otherwise the run's log file is followed. Ends with a `complete` message.
+    """
+    if run_id is not None:
+        run = await get_run(run_id)
+        if run is None or run.experiment_id != experiment_id:
+            raise HTTPException(status_code=404, detail="Run not found")
+    else:
+        run = await _latest_run(experiment_id)
+
+    def complete(status: str) -> dict:
+        return {"data": json.dumps({"type": "complete", "status": status})}
+
+    def entry(seq: int, line: str) -> dict:
+        return {"id": event_id(run.id, seq), "data": json.dumps({"type": "log", "message": line})}
 
+    async def generate():
+        if run is None:
+            yield complete("idle")
+            return
+        seq = resume_point(last_event_id, run.id)
+
+        log = experiments_logs.get(run.id)
+        if log is not None:
+            while True:
+                dropped, lines = log.after(seq)
+                if dropped:
+                    yield {"data": json.dumps({"type": "gap", "dropped": dropped})}
+                for seq, line in lines:
+                    yield entry(seq, line)
+                if not lines and log.status is not None:
+                    yield complete(log.status)
+                    return
+                await log.wait(seq)
+
+        file = RunLogFile(run.log_path)
+        status = run.status
         while True:
-            # Send any new log entries
-            current_logs = list(logs)
-            for i, line in enumerate(current_logs[sent_count:], start=sent_count):
-                yield f"data: {json.dumps({'type': 'log', 'message': line})}\n\n"
-            sent_count = len(current_logs)
-
-            # Check if experiment is still running
-            state = experiments_state.get(experiment_id)
-            if state and state.status in ("completed", "failed"):
-                yield f"data: {json.dumps({'type': 'complete', 'status': state.status})}\n\n"
-                break
-
-            await asyncio.sleep(0.5)
-
-    return StreamingResponse(
-        generate(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-        },
-    )
+            lines = file.read(seq, LOG_READ_LINES)
+            for seq, line in lines:
+                yield entry(seq, line)
+            if lines:
+                continue
+            if status not in ("queued", "running"):
+                yield complete(status)
+                return
+            await asyncio.sleep(LOG_POLL_S)
+            status = (await get_run(run.id)).status
+
+    events = generate()
+    return EventSourceResponse(events, background=close_on_disconnect(events))
 
 
 @router.get("/results")
 async def get_all_results():
     """Get all available experiment results."""
     results = {}
+    runs = await latest_runs()
 
     for experiment_id in EXPERIMENT_SCRIPTS.keys():
-        state = experiments_state.get(experiment_id)
+        run = runs.get(experiment_id)
 
-        if state:
-            results[experiment_id] = state
+        if run:
+            results[experiment_id] = run_state(run)
         else:
             # Check for existing results
             data = load_results(experiment_id)
@@ -1,19 +1,152 @@
 """Dashboard metrics and Pareto curve data."""
 import json
+import time
+import asyncio
+import base64
+import binascii
+from datetime import datetime, timezone
 from pathlib import Path
-from fastapi import APIRouter, Query
-from sqlalchemy import select, func
+from typing import Literal, Optional
+import numpy as np
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, func, literal, tuple_
+from sse_starlette.sse import EventSourceResponse
+from config import get_settings
+from db.checkpoint import storage_status
 from db.database import get_db
-from db.models import RoutingLog
+from db.export import MEDIA_TYPES, arrow_available, iter_chunks, to_arrow, to_csv, to_ndjson
+from db.models import MetricsRollup, RoutingLog
+from services.latency_sketch import get_latency_sketches
+from services.live_pareto import BANDS, band_quality, get_live_pareto, judged_samples, sweep
+from services.metrics_broadcaster import RESYNC, build_delta, get_metrics_broadcaster
+from services.response_cache import etag_response, get_metrics_cache, get_pareto_cache
+from services.sse import close_on_disconnect
 
 router = APIRouter()
 
+# window -> (rollup resolution, length in seconds); day/week are hour-aligned
+WINDOWS = {
+    "hour": ("minute", 3600),
+    "day": ("hour", 86400),
+    "week": ("hour", 7 * 86400),
+}
+
+# Only what the dashboard shows; response_text/features are never loaded
+HISTORY_COLUMNS = (
+    RoutingLog.id,
+    func.substr(RoutingLog.query, 1, 100).label("query"),
+    RoutingLog.route,
+    RoutingLog.confidence,
+    RoutingLog.domain,
+    RoutingLog.latency_ms,
+    RoutingLog.cost_usd,
+    RoutingLog.created_at,
+)
+NEWEST_FIRST = (RoutingLog.created_at.desc(), RoutingLog.id.desc())
+
+RESULTS_PATH = Path("data/results/evaluation_results.json")
+LOCAL_SCORES_PATH = Path("data/results/mtbench_local_scores.json")
+CLOUD_SCORES_PATH = Path("data/results/mtbench_cloud_scores.json")
+
+
+def _history_entry(row) -> dict:
+    """RoutingLogEntry for the frontend."""
+    return {
+        "id": row.id,
+        "query": row.query,
+        "route": row.route,
+        "confidence": row.confidence,
+        "domain": row.domain,
+        "latency_ms": row.latency_ms,
+        "cost_usd": row.cost_usd,
+        "timestamp": row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def _encode_cursor(row) -> str:
+    payload = json.dumps([row.created_at.isoformat(), row.id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(log_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """created_at is stored as naive UTC; accept aware or naive (assumed UTC) bounds."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
 
 @router.get("/api/metrics")
-async def get_metrics(limit: int = Query(100, le=500), offset: int = Query(0)):
-    """Aggregated metrics for the dashboard - matches frontend MetricsSummary type."""
+async def get_metrics(
+    limit: int = Query(100, le=500),
+    offset: int = Query(0),
+    window: Optional[Literal["hour", "day", "week"]] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Aggregated metrics for the dashboard - matches frontend MetricsSummary type.
+
+    Served from a short-lived cache that new routing logs invalidate, with an
+    ETag so unchanged polls get 304 (services/response_cache.py).
+    """
+    entry = await get_metrics_cache().get(
+        (limit, offset, window), lambda: metrics_summary(limit, offset, window)
+    )
+    return etag_response(entry, if_none_match)
+
+
+async def metrics_summary(limit: int = 100, offset: int = 0, window: Optional[str] = None) -> dict:
+    """The /api/metrics payload, computed from metrics_rollup and routing_logs."""
+    if window is None:
+        resolution, since = "all", 0
+    else:
+        resolution, length = WINDOWS[window]
+        width = 60 if resolution == "minute" else 3600
+        since = int(time.time()) - length
+        since -= since % width  # include the partially elapsed first bucket
+
     async with get_db() as db:
-        total = await db.scalar(select(func.count(RoutingLog.id))) or 0
+        # Totals come from metrics_rollup (maintained by db/log_writer.py):
+        # one row per (route, domain) for all-time, a bounded number of
+        # minute/hour buckets for a window, independent of routing_logs size
+        groups = await db.execute(
+            select(
+                MetricsRollup.route,
+                MetricsRollup.domain,
+                func.sum(MetricsRollup.count),
+                func.sum(MetricsRollup.cost_usd),
+                func.sum(MetricsRollup.savings_usd),
+                func.sum(MetricsRollup.router_latency_ms_sum),
+                func.sum(MetricsRollup.router_latency_count),
+            )
+            .where(MetricsRollup.resolution == resolution, MetricsRollup.bucket_start >= since)
+            .group_by(MetricsRollup.route, MetricsRollup.domain)
+        )
+        total = local_count = router_lat_count = 0
+        total_cost = total_savings = router_lat_sum = 0.0
+        # Per-domain breakdown: Record<string, {local: number, cloud: number}>
+        domain_breakdown = {}
+        for route, domain, count, cost, savings, lat_sum, lat_count in groups.all():
+            total += count
+            if route == "local":
+                local_count += count
+            total_cost += cost
+            total_savings += savings
+            router_lat_sum += lat_sum
+            router_lat_count += lat_count
+            domain = domain or None  # the rollup stores a missing domain as ""
+            if domain not in domain_breakdown:
+                domain_breakdown[domain] = {"local": 0, "cloud": 0}
+            domain_breakdown[domain][route] = count
+
         if total == 0:
             return {
                 "total_queries": 0,
@@ -23,37 +156,17 @@ async def get_metrics(limit: int = Query(100, le=500), offset: int = Query(0)):
                 "total_saved": 0.0,
                 "avg_router_latency_ms": 0.0,
                 "domain_breakdown": {},
+                "latency_percentiles": get_latency_sketches().percentiles(window),
                 "recent_history": [],
             }
 
-        local_count = await db.scalar(
-            select(func.count(RoutingLog.id)).where(RoutingLog.route == "local")
-        ) or 0
-
-        total_cost = await db.scalar(select(func.sum(RoutingLog.cost_usd))) or 0.0
-        total_savings = await db.scalar(select(func.sum(RoutingLog.savings_usd))) or 0.0
-        avg_router_lat = await db.scalar(select(func.avg(RoutingLog.router_latency_ms))) or 0.0
-
-        # Per-domain breakdown: Record<string, {local: number, cloud: number}>
-        domains = await db.execute(
-            select(
-                RoutingLog.domain,
-                RoutingLog.route,
-                func.count(RoutingLog.id).label("count"),
-            ).group_by(RoutingLog.domain, RoutingLog.route)
-        )
-        domain_breakdown = {}
-        for domain, route, count in domains.all():
-            if domain not in domain_breakdown:
-                domain_breakdown[domain] = {"local": 0, "cloud": 0}
-            domain_breakdown[domain][route] = count
-
-        # Recent history
+        # First page of history on the same connection (deep paging: /api/metrics/history)
         history = await db.execute(
-            select(RoutingLog).order_by(RoutingLog.created_at.desc()).limit(limit).offset(offset)
+            select(*HISTORY_COLUMNS).order_by(*NEWEST_FIRST).limit(limit).offset(offset)
         )
-        logs = history.scalars().all()
+        logs = history.all()
 
+    avg_router_lat = router_lat_sum / router_lat_count if router_lat_count else 0.0
     return {
         "total_queries": total,
         "local_count": local_count,
@@ -62,32 +175,206 @@ async def get_metrics(limit: int = Query(100, le=500), offset: int = Query(0)):
         "total_saved": round(total_savings, 6),
         "avg_router_latency_ms": round(avg_router_lat, 2),
         "domain_breakdown": domain_breakdown,
-        "recent_history": [
-            {
-                "id": log.id,
-                "query": log.query[:100],
-                "route": log.route,
-                "confidence": log.confidence,
-                "domain": log.domain,
-                "latency_ms": log.latency_ms,
-                "cost_usd": log.cost_usd,
-                "timestamp": log.created_at.isoformat() if log.created_at else None,
-            }
-            for log in logs
-        ],
+        # p50/p90/p99 from in-process DDSketches (services/latency_sketch.py)
+        "latency_percentiles": get_latency_sketches().percentiles(window),
+        "recent_history": [_history_entry(log) for log in logs],
+    }
+
+
+@router.get("/api/metrics/stream")
+async def stream_metrics(limit: int = Query(100, ge=1, le=500)):
+    """
+    Live dashboard updates over SSE.
+
+    Sends a `snapshot` event (the /api/metrics payload), then `delta` events
+    as requests are logged: counter increments to add and new
+    recent_history rows to prepend (services/metrics_broadcaster.py). A fresh
+    snapshot follows every METRICS_STREAM_SNAPSHOT_S (refreshing averages and
+    percentiles) or as soon as the client has fallen too far behind.
+    Snapshots are computed for each stream rather than served from the
+    /api/metrics cache.
+    """
+    settings = get_settings()
+    coalesce_s = settings.metrics_stream_coalesce_ms / 1000
+    loop = asyncio.get_running_loop()
+
+    async def event_generator():
+        with get_metrics_broadcaster().subscribe() as subscriber:
+            while True:
+                # Read after subscribing, so no log falls in between: not from the
+                # metrics cache, whose entry may predate the subscription. Deltas
+                # skip logs the snapshot already counted
+                summary = await metrics_summary(limit, 0, None)
+                yield {"event": "snapshot", "data": json.dumps(summary)}
+                after_id = max((row["id"] for row in summary["recent_history"]), default=None)
+
+                deadline = loop.time() + settings.metrics_stream_snapshot_s
+                while (remaining := deadline - loop.time()) > 0:
+                    pending = await subscriber.next(coalesce_s, remaining)
+                    if pending == RESYNC:
+                        break
+                    if pending and (delta := build_delta(pending, after_id, limit)):
+                        yield {"event": "delta", "data": json.dumps(delta)}
+
+    events = event_generator()
+    return EventSourceResponse(events, background=close_on_disconnect(events))
+
+
+@router.get("/api/metrics/history")
+async def get_history(
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    route: Optional[Literal["local", "cloud"]] = None,
+    domain: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    Routing history, newest first, with keyset pagination.
+
+    Pass the returned next_cursor to get the following page; it is null on
+    the last page. Each page is an index range scan on (created_at, id)
+    (or (route|domain, created_at, id) when filtered), so page 1000 costs
+    the same as page 1. since/until bound created_at (inclusive/exclusive).
+    """
+    stmt = select(*HISTORY_COLUMNS)
+    if route is not None:
+        stmt = stmt.where(RoutingLog.route == route)
+    if domain is not None:
+        stmt = stmt.where(RoutingLog.domain == domain)
+    if since is not None:
+        stmt = stmt.where(RoutingLog.created_at >= _naive_utc(since))
+    if until is not None:
+        stmt = stmt.where(RoutingLog.created_at < _naive_utc(until))
+    if cursor is not None:
+        created_at, log_id = _decode_cursor(cursor)
+        # Bind with the column type so the timestamp is formatted like the stored values
+        after = tuple_(literal(created_at, RoutingLog.created_at.type), literal(log_id))
+        stmt = stmt.where(tuple_(RoutingLog.created_at, RoutingLog.id) < after)
+    # One extra row tells us whether another page exists
+    stmt = stmt.order_by(*NEWEST_FIRST).limit(limit + 1)
+
+    async with get_db() as db:
+        rows = (await db.execute(stmt)).all()
+
+    page = rows[:limit]
+    return {
+        "entries": [_history_entry(row) for row in page],
+        "next_cursor": _encode_cursor(page[-1]) if len(rows) > limit else None,
     }
 
 
+@router.get("/api/metrics/export")
+async def export_logs(
+    format: Literal["ndjson", "csv", "arrow"] = "ndjson",
+    after_id: int = Query(0, ge=0),
+    route: Optional[Literal["local", "cloud"]] = None,
+    domain: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_response: bool = False,
+):
+    """
+    Stream routing logs, oldest id first, as NDJSON, CSV or Arrow IPC.
+
+    Rows are read in chunks (db/export.py), so any number of rows can be
+    exported in constant memory. To resume an interrupted export, repeat the
+    request with after_id set to the last id received. since/until bound
+    created_at (inclusive/exclusive).
+    """
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(status_code=501, detail="Arrow export needs pyarrow installed on the server")
+    chunks = iter_chunks(after_id, route, domain, _naive_utc(since), _naive_utc(until), include_response)
+    if format == "ndjson":
+        body = to_ndjson(chunks)
+    elif format == "csv":
+        body = to_csv(chunks, include_response)
+    else:
+        body = to_arrow(chunks, include_response)
+    extension = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="routing_logs.{extension}"'},
+    )
+
+
+@router.get("/api/metrics/storage")
+async def get_storage_status():
+    """Database file and WAL sizes, connection PRAGMAs and the last WAL checkpoint."""
+    return await storage_status()
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
 @router.get("/api/metrics/pareto")
-async def get_pareto_data():
+async def get_pareto_data(if_none_match: Optional[str] = Header(None)):
     """
     Fix 9: Pareto curve data endpoint - matches frontend ParetoData type.
 
     Reads pre-computed evaluation results from data/results/evaluation_results.json
     and returns the pareto_sweep array along with cloud_quality and local_quality baselines.
     If the file doesn't exist (evaluation hasn't been run), returns null data.
+    The parsed result is cached until one of the files' mtime changes.
+    """
+    key = tuple(_mtime(path) for path in (RESULTS_PATH, LOCAL_SCORES_PATH, CLOUD_SCORES_PATH))
+
+    async def compute():
+        return _load_pareto()
+
+    return etag_response(await get_pareto_cache().get(key, compute), if_none_match)
+
+
+@router.get("/api/metrics/pareto/live")
+async def get_live_pareto_data(
+    days: int = Query(7, ge=1, le=365),
+    step: float = Query(0.05, ge=0.001, le=0.5),
+    if_none_match: Optional[str] = Header(None),
+):
     """
-    results_path = Path("data/results/evaluation_results.json")
+    Threshold sweep over the last `days` of production routing logs.
+
+    Same point shape as /api/metrics/pareto, plus projected_cost_usd (cloud
+    spend at that threshold). Quality comes from sampled judge scores per
+    confidence band where available, else the offline MT-Bench baselines
+    (quality_source says which). Cached like /api/metrics.
+    """
+    store = get_live_pareto()
+    days = min(days, store.max_days)
+
+    async def compute():
+        await store.refresh()
+        samples = await judged_samples(days)
+        baseline = _load_pareto()
+        local_band, local_judged = band_quality(samples, True, baseline["local_quality"])
+        cloud_band, cloud_judged = band_quality(samples, False, baseline["cloud_quality"])
+        hist = store.histogram(days)
+        thresholds = np.round(np.arange(0.0, 1.0 + step / 2, step), 4)
+        if hist[0].sum() == 0:
+            result = {"queries": 0, "sweep": [], "local_quality": None, "cloud_quality": None,
+                      "recommended_threshold": None}
+        else:
+            result = sweep(hist, thresholds, local_band, cloud_band)
+        judged = local_judged + cloud_judged
+        return {
+            **result,
+            "days": days,
+            "judged_queries": len(samples),
+            "quality_source": "judge" if judged == 2 * BANDS else "mixed" if judged else "offline",
+            "current_threshold": get_settings().routing_threshold,
+        }
+
+    entry = await get_metrics_cache().get(("pareto_live", days, step), compute)
+    return etag_response(entry, if_none_match)
+
+
+def _load_pareto() -> dict:
+    results_path = RESULTS_PATH
 
     if not results_path.exists():
         # Return null-like structure that frontend handles gracefully
@@ -103,8 +390,8 @@ async def get_pareto_data():
             results = json.load(f)
 
         # Load baseline scores for reference lines
-        local_scores_path = Path("data/results/mtbench_local_scores.json")
-        cloud_scores_path = Path("data/results/mtbench_cloud_scores.json")
+        local_scores_path = LOCAL_SCORES_PATH
+        cloud_scores_path = CLOUD_SCORES_PATH
 
         cloud_quality = None
         local_quality = None
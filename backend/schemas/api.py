@@ -13,6 +13,8 @@ class ChatRequest(BaseModel):
     conversation_id: Optional[str] = None
     threshold: Optional[float] = None  # override default
     force_route: Optional[Route] = None  # force local or cloud
+    coalesce_ms: Optional[int] = None  # /api/chat/stream frame interval; 0 disables
+    coalesce_bytes: Optional[int] = None  # /api/chat/stream max frame size
 
 
 class RoutingDecision(BaseModel):
@@ -32,6 +34,7 @@ class ChatResponse(BaseModel):
 
 class CompareRequest(BaseModel):
     message: str
+    include_reasoning: bool = True  # False = cheaper score-only judging, empty judge_reasoning
 
 
 class CompareResponse(BaseModel):
@@ -39,13 +42,14 @@ class CompareResponse(BaseModel):
     query: str
     local_response: str
     cloud_response: str
-    local_score: float
-    cloud_score: float
+    local_score: Optional[float] = None  # None when the judge reply could not be used
+    cloud_score: Optional[float] = None
     local_latency_ms: float
     cloud_latency_ms: float
     local_tokens: int
     cloud_tokens: int
     judge_reasoning: str
+    judge_verdict: Optional[str] = None  # "local" | "cloud" | "tie" from the comparative judge
 
 
 class DomainBreakdown(BaseModel):
@@ -0,0 +1,87 @@
+"""
+Output of a running experiment, fanned out to /api/experiments/{id}/logs.
+
+Lines are numbered 1, 2, 3, ... for the whole run, and the buffer keeps the
+last max_lines of them in memory. A subscriber remembers the last number it
+sent rather than a position in the buffer, so dropping old lines never
+makes it skip or repeat one, and each wake-up costs O(new lines) however
+long the buffer is. append() is O(1) and wakes every waiting subscriber at
+once by setting a shared asyncio.Event, which is then replaced for the next
+line.
+
+Lines are also appended to the run's log file (services/experiment_runs.py).
+A subscriber further behind than the memory buffer reads from that file.
+
+SSE event ids are "<run id>:<seq>". A client reconnecting with that
+Last-Event-ID continues after that line.
+"""
+import asyncio
+import itertools
+from collections import deque
+from typing import Optional
+from services.experiment_runs import RunLogFile
+
+
+class ExperimentLog:
+    def __init__(self, run: int, file: Optional[RunLogFile] = None, max_lines: int = 1000):
+        self.run = run
+        self.file = file
+        self.lines: deque[tuple[int, str]] = deque(maxlen=max_lines)
+        self.last_seq = 0
+        self.status: Optional[str] = None  # final status, set by close()
+        self._changed = asyncio.Event()
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest line still buffered."""
+        return self.lines[0][0] if self.lines else self.last_seq + 1
+
+    def append(self, line: str):
+        self.last_seq += 1
+        self.lines.append((self.last_seq, line))
+        if self.file is not None:
+            self.file.append(line)
+        self._notify()
+
+    def close(self, status: str):
+        self.status = status
+        if self.file is not None:
+            self.file.close()
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def after(self, seq: int) -> tuple[int, list[tuple[int, str]]]:
+        """
+        (how many lines after `seq` are no longer available, the next lines
+        after `seq`): the buffered ones, or up to max_lines from the log file
+        when `seq` is older than the buffer.
+        """
+        if self.file is not None and seq + 1 < self.first_seq:
+            return 0, self.file.read(seq, self.lines.maxlen)
+        new = min(self.last_seq - seq, len(self.lines))
+        if new <= 0:
+            return 0, []
+        lines = list(itertools.islice(reversed(self.lines), new))
+        lines.reverse()
+        return max(0, self.first_seq - seq - 1), lines
+
+    async def wait(self, seq: int):
+        """Return once there are lines after `seq` or the run has ended."""
+        if self.last_seq <= seq and self.status is None:
+            await self._changed.wait()
+
+
+def event_id(run: int, seq: int) -> str:
+    return f"{run}:{seq}"
+
+
+def resume_point(last_event_id: Optional[str], run: int) -> int:
+    """Sequence number to continue after; 0 (the start) for a missing id or one from another run."""
+    try:
+        run_id, seq = (int(part) for part in (last_event_id or "").split(":"))
+    except ValueError:
+        return 0
+    return seq if run_id == run else 0
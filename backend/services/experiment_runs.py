@@ -0,0 +1,226 @@
+"""
+Persistent experiment runs for routers/experiments.py.
+
+Each run is a row in experiment_runs: config, status, progress, timings,
+exit code and the result files it wrote. Status and history therefore
+survive a restart and read the same on every worker. A partial unique index
+allows only one queued or running run per experiment.
+
+A run's output goes to <experiment_runs_dir>/<run id>.log. Next to it,
+<run id>.idx holds the end offset of every line as a little-endian uint64,
+so line n is bytes [idx[n-1], idx[n]) of the log. Reading from any line is
+two seeks, never a scan. The worker running a run (its owner,
+"<instance>:<pid>") also keeps recent lines in memory (services/experiment_logs.py) and wakes
+its subscribers directly; other workers tail the files.
+
+reconcile_runs() runs at startup and looks for runs whose owning backend
+process of this instance no longer exists (e.g. after --reload, or after
+the container was recreated). Orphaned running runs are marked failed, and
+their script's process group is stopped if it is still running. Orphaned
+queued runs have not started yet, so this process adopts them to queue
+again. Runs owned by other instances are left alone.
+
+The instance is INSTANCE_ID, or the hostname when that is unset. A
+container gets a new hostname when it is recreated, so deployments set
+INSTANCE_ID (one per replica) to keep ownership across recreation.
+"""
+import os
+import signal
+import socket
+import struct
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from config import get_settings
+from db.database import get_db
+from db.models import ExperimentRun
+
+logger = logging.getLogger(__name__)
+
+OFFSET = struct.Struct("<Q")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def instance_id() -> str:
+    return get_settings().instance_id or socket.gethostname()
+
+
+def owner() -> str:
+    """Identifies this backend process; evaluated per call since workers fork."""
+    return f"{instance_id()}:{os.getpid()}"
+
+
+class RunLogFile:
+    """Append-only run log with a line-end offset index."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+        self._log = None
+        self._index = None
+        self._end = 0
+
+    def append(self, line: str):
+        if self._log is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._log = open(self.path, "ab")
+            self._index = open(self.index_path, "ab")
+            self._end = self._log.seek(0, os.SEEK_END)
+        data = (line + "\n").encode()
+        self._log.write(data)
+        self._log.flush()
+        self._end += len(data)
+        # Indexed only once the line is complete, so readers never see half a line
+        self._index.write(OFFSET.pack(self._end))
+        self._index.flush()
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._index.close()
+            self._log = self._index = None
+
+    def count(self) -> int:
+        try:
+            return self.index_path.stat().st_size // OFFSET.size
+        except FileNotFoundError:
+            return 0
+
+    def read(self, after: int, limit: int) -> list[tuple[int, str]]:
+        """Up to `limit` (seq, line) pairs after line `after` (lines are numbered from 1)."""
+        try:
+            with open(self.index_path, "rb") as index:
+                index.seek(max(after - 1, 0) * OFFSET.size)
+                raw = index.read((limit + (1 if after else 0)) * OFFSET.size)
+        except FileNotFoundError:
+            return []
+        ends = [end for (end,) in OFFSET.iter_unpack(raw[:len(raw) - len(raw) % OFFSET.size])]
+        start = ends.pop(0) if after and ends else 0
+        if not ends:
+            return []
+        with open(self.path, "rb") as log:
+            log.seek(start)
+            data = log.read(ends[-1] - start)
+        lines, pos = [], 0
+        for i, end in enumerate(ends):
+            lines.append((after + 1 + i, data[pos:end - start - 1].decode(errors="replace")))
+            pos = end - start
+        return lines
+
+
+def log_path(run_id: int) -> Path:
+    return Path(get_settings().experiment_runs_dir) / f"{run_id}.log"
+
+
+async def create_run(
+    experiment_id: str, config: dict, priority: int = 0, timeout_s: Optional[float] = None
+) -> Optional[ExperimentRun]:
+    """Insert a queued run owned by this process; None if the experiment is already queued or running."""
+    try:
+        async with get_db() as db:
+            run = ExperimentRun(experiment_id=experiment_id, status="queued", config=config, priority=priority,
+                                timeout_s=timeout_s, queued_at=_now(), owner=owner())
+            db.add(run)
+            await db.flush()
+            run.log_path = str(log_path(run.id))
+    except IntegrityError:
+        return None
+    return run
+
+
+async def update_run(run_id: int, **values):
+    async with get_db() as db:
+        await db.execute(update(ExperimentRun).where(ExperimentRun.id == run_id).values(**values))
+
+
+async def start_run(run_id: int):
+    await update_run(run_id, status="running", started_at=_now())
+
+
+async def finish_run(run_id: int, status: str, **values):
+    await update_run(run_id, status=status, completed_at=_now(), **values)
+
+
+async def get_run(run_id: int) -> Optional[ExperimentRun]:
+    async with get_db() as db:
+        return await db.get(ExperimentRun, run_id)
+
+
+async def latest_runs() -> dict[str, ExperimentRun]:
+    """The most recent run of each experiment that has one."""
+    async with get_db() as db:
+        latest = select(func.max(ExperimentRun.id)).group_by(ExperimentRun.experiment_id)
+        runs = await db.scalars(select(ExperimentRun).where(ExperimentRun.id.in_(latest)))
+        return {run.experiment_id: run for run in runs}
+
+
+async def list_runs(experiment_id: str, limit: int = 20, before: Optional[int] = None) -> list[ExperimentRun]:
+    """Run history, newest first; pass the last id as `before` for the next page."""
+    stmt = select(ExperimentRun).where(ExperimentRun.experiment_id == experiment_id)
+    if before is not None:
+        stmt = stmt.where(ExperimentRun.id < before)
+    async with get_db() as db:
+        return list(await db.scalars(stmt.order_by(ExperimentRun.id.desc()).limit(limit)))
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _stop_script(pid: int, log: Optional[str]):
+    """SIGTERM an orphaned script's process group, only if /proc shows it is still our script (pids get reused)."""
+    try:
+        cmdline = Path(f"/proc/{pid}/cmdline").read_bytes().split(b"\0")
+    except OSError:
+        return
+    if cmdline and b"python" in cmdline[0] and any(arg.startswith(b"scripts/") for arg in cmdline):
+        logger.warning("Stopping orphaned experiment script (pid %d, log %s)", pid, log)
+        try:
+            # Scripts are started in their own session, so the group id is the pid
+            os.killpg(pid, signal.SIGTERM)
+        except OSError:
+            pass
+
+
+async def reconcile_runs() -> list[ExperimentRun]:
+    """
+    Fail running runs whose backend process of this instance is gone, and
+    adopt its queued runs; returns the adopted runs, for the caller to queue again.
+    """
+    instance = instance_id()
+    adopted = []
+    failed = 0
+    async with get_db() as db:
+        active = await db.scalars(select(ExperimentRun).where(ExperimentRun.status.in_(("queued", "running"))))
+        for run in list(active):
+            run_instance, _, run_pid = (run.owner or "").rpartition(":")
+            if run_instance != instance or (run_pid.isdigit() and int(run_pid) != os.getpid() and _alive(int(run_pid))):
+                continue
+            if run.status == "queued":
+                run.owner = owner()
+                adopted.append(run)
+                continue
+            if run.pid is not None:
+                _stop_script(run.pid, run.log_path)
+            run.status = "failed"
+            run.error = "Interrupted: the backend restarted while the experiment was running"
+            run.completed_at = _now()
+            run.log_lines = RunLogFile(run.log_path).count() if run.log_path else 0
+            failed += 1
+    if failed:
+        logger.warning("Marked %d orphaned experiment run(s) as failed", failed)
+    if adopted:
+        logger.info("Re-queued %d experiment run(s) left queued by a previous backend process", len(adopted))
+    return adopted
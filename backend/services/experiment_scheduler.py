@@ -0,0 +1,154 @@
+"""
+Job scheduler for experiment runs (routers/experiments.py).
+
+Runs are queued and started here instead of as soon as they are submitted:
+at most max_concurrent run at once, and at most resource_limits[r] of the
+running jobs may use resource r. Each experiment declares what it loads:
+"gpu" (Ollama or torch), "judge" (judge model calls) or "cloud" (cloud model
+calls). Queued jobs start in priority order (higher first, then FIFO). A
+job that does not fit reserves its resources for the rest of the pass, so a
+stream of small lower-priority jobs cannot starve it.
+
+A running job is stopped by cancel() or when its timeout expires, by
+cancelling its task; the runner then terminates the script's process group
+(see terminate_process_group). Limits apply within one backend process.
+"""
+import os
+import heapq
+import signal
+import asyncio
+import itertools
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    run_id: int
+    experiment_id: str
+    resources: frozenset[str]
+    priority: int = 0
+    timeout_s: Optional[float] = None
+    stop_reason: Optional[str] = None   # "cancelled" or "timeout", set before the task is cancelled
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class ExperimentScheduler:
+    def __init__(self, max_concurrent: int, resource_limits: dict[str, int]):
+        self.max_concurrent = max_concurrent
+        self.resource_limits = resource_limits
+        self._queue: list[tuple[int, int, Job]] = []   # (-priority, submit order, job)
+        self._queued: dict[int, Job] = {}
+        self._running: dict[int, Job] = {}
+        self._in_use: Counter[str] = Counter()
+        self._order = itertools.count()
+        self._runner: Optional[Callable[[Job], Awaitable[None]]] = None
+
+    def set_runner(self, runner: Callable[[Job], Awaitable[None]]):
+        """Coroutine that runs a job to completion; it must handle cancellation."""
+        self._runner = runner
+
+    @property
+    def queued(self) -> list[Job]:
+        return [job for _, _, job in sorted(self._queue) if job.run_id in self._queued]
+
+    @property
+    def running(self) -> list[Job]:
+        return list(self._running.values())
+
+    def submit(self, job: Job):
+        self._queued[job.run_id] = job
+        heapq.heappush(self._queue, (-job.priority, next(self._order), job))
+        self._dispatch()
+
+    def cancel(self, run_id: int) -> Optional[str]:
+        """Stop a job: "queued" if it had not started (the caller records it), "running", or None if unknown."""
+        if self._queued.pop(run_id, None) is not None:
+            return "queued"  # its heap entry is skipped when reached
+        job = self._running.get(run_id)
+        if job is None:
+            return None
+        self._stop(job, "cancelled")
+        return "running"
+
+    def _stop(self, job: Job, reason: str):
+        if job.stop_reason is None and job.task is not None:
+            job.stop_reason = reason
+            job.task.cancel()
+
+    def _fits(self, job: Job, reserved: set[str]) -> bool:
+        return all(
+            r not in reserved and self._in_use[r] < self.resource_limits.get(r, self.max_concurrent)
+            for r in job.resources
+        )
+
+    def _dispatch(self):
+        reserved: set[str] = set()
+        waiting = []
+        while self._queue and len(self._running) < self.max_concurrent:
+            entry = heapq.heappop(self._queue)
+            job = entry[2]
+            if job.run_id not in self._queued:
+                continue  # cancelled while queued
+            if self._fits(job, reserved):
+                self._start(job)
+            else:
+                reserved |= job.resources
+                waiting.append(entry)
+        for entry in waiting:
+            heapq.heappush(self._queue, entry)
+
+    def _start(self, job: Job):
+        del self._queued[job.run_id]
+        self._running[job.run_id] = job
+        self._in_use.update(job.resources)
+        job.task = asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Job):
+        timer = None
+        if job.timeout_s:
+            timer = asyncio.get_running_loop().call_later(job.timeout_s, self._stop, job, "timeout")
+        try:
+            await self._runner(job)
+        except asyncio.CancelledError:
+            pass  # the runner has recorded the outcome
+        except Exception:
+            logger.exception("Experiment run %d failed in the scheduler", job.run_id)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            del self._running[job.run_id]
+            self._in_use.subtract(job.resources)
+            self._dispatch()
+
+
+async def terminate_process_group(process: asyncio.subprocess.Process, grace_s: float):
+    """SIGTERM the process group started with start_new_session=True, then SIGKILL after grace_s."""
+    if process.returncode is not None:
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), grace_s)
+        except asyncio.TimeoutError:
+            logger.warning("Experiment process %d ignored SIGTERM; killing", process.pid)
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+    except ProcessLookupError:
+        pass
+
+
+_scheduler: ExperimentScheduler | None = None
+
+
+def get_experiment_scheduler() -> ExperimentScheduler:
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        _scheduler = ExperimentScheduler(settings.experiment_max_concurrent, settings.experiment_resource_limits)
+    return _scheduler
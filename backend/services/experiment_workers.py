@@ -0,0 +1,253 @@
+"""
+Warm worker processes for experiment runs (EXPERIMENT_RUNNER=worker).
+
+Starting `python scripts/<script>.py` for every run re-imports torch,
+transformers and sklearn and reloads DistilBERT from disk, which dominates
+short runs. A worker is a long-lived process that imports the experiment
+scripts once and calls their entry functions directly, on one event loop
+kept for the worker's lifetime. The singletons the scripts use therefore stay
+loaded between runs: the router model and its tokenizer (get_router), the
+Ollama and OpenAI clients, and the judge's HTTP client. A worker drops the
+router when train_router.py has saved a new model.
+
+A worker runs one experiment at a time and reports back over a pipe:
+("log", line) for every line the experiment prints, ("progress", current,
+total) from its on_progress callback (utils/progress.py), then
+("done", error), where error is None on success. Stopping a run (cancel or
+timeout) terminates the worker's process group, and a fresh worker takes
+its place.
+
+Workers are started with "spawn": a fork would copy the backend's event
+loop, threads and database connections.
+"""
+import os
+import io
+import sys
+import signal
+import asyncio
+import inspect
+import importlib
+import threading
+import traceback
+import contextlib
+import multiprocessing
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Optional
+from config import get_settings
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Working directory of a run, as for the subprocess runner: scripts use data/... paths
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+
+class ExperimentWorkerError(RuntimeError):
+    """The experiment raised, or its worker died."""
+
+
+class _LineWriter(io.TextIOBase):
+    """stdout/stderr during a run: sends every complete line to the backend."""
+
+    def __init__(self, send):
+        self.send = send
+        self._pending = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._pending += text
+        if "\n" in self._pending:
+            *lines, self._pending = self._pending.split("\n")
+            for line in lines:
+                # tqdm redraws its bar with \r: keep what a terminal would show
+                self.send(("log", line.rsplit("\r", 1)[-1].strip()))
+        return len(text)
+
+    def close(self):
+        if self._pending:
+            self.write("\n")
+        super().close()
+
+
+def _router_version() -> Optional[float]:
+    """Newest file time in the router model directory; changes when a new model is saved."""
+    try:
+        return max((f.stat().st_mtime for f in Path(get_settings().router_model_path).iterdir()), default=None)
+    except OSError:
+        return None
+
+
+def _drop_router():
+    # Scripts import the router module as backend.services.* locally and services.* in Docker
+    for name in ("services.router_model", "backend.services.router_model"):
+        module = sys.modules.get(name)
+        if module is not None:
+            module._router = None
+
+
+def worker_main(conn, project_root: str, preload: list[str]):
+    """Worker process: import the scripts, then run jobs sent over `conn` until it closes."""
+    os.setsid()  # own process group, so stopping a run also stops processes it started
+    os.chdir(project_root)
+    sys.path[:0] = [os.path.join(project_root, "scripts"), project_root, str(BACKEND_DIR)]
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    lock = threading.Lock()
+
+    def send(message):
+        # Experiments may print from other threads (e.g. tqdm's monitor)
+        with lock:
+            conn.send(message)
+
+    for script in preload:
+        try:
+            importlib.import_module(Path(script).stem)
+        except Exception as e:
+            # Reported again, in the run's log, if the experiment is started
+            print(f"Experiment worker could not preload {script}: {type(e).__name__}: {e}", file=sys.stderr)
+
+    router_version = _router_version()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return  # the backend has gone
+        if job is None:
+            return
+        script, function, options = job
+        if _router_version() != router_version:
+            _drop_router()
+            router_version = _router_version()
+
+        error = None
+        writer = _LineWriter(send)
+        with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+            try:
+                entry = getattr(importlib.import_module(Path(script).stem), function)
+                params = inspect.signature(entry).parameters
+                kwargs = {name: value for name, value in options.items() if name in params}
+                if "on_progress" in params:
+                    kwargs["on_progress"] = lambda current, total: send(("progress", current, total))
+                result = entry(**kwargs)
+                if inspect.isawaitable(result):
+                    loop.run_until_complete(result)
+            except SystemExit as e:
+                # A script's early exit: failed unless the code is 0
+                if e.code not in (0, None):
+                    error = str(e.code) if isinstance(e.code, str) else f"Exited with code {e.code}"
+            except Exception as e:
+                traceback.print_exc()
+                error = f"{type(e).__name__}: {e}"
+            writer.close()
+        send(("done", error))
+
+
+class ExperimentWorker:
+    def __init__(self, context, preload: list[str]):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=worker_main, args=(child, str(PROJECT_ROOT), preload), name="experiment-worker"
+        )
+        self.process.start()
+        child.close()
+
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def terminate(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            # Not yet in its own process group, or already gone
+            self.process.terminate()
+
+    async def stop(self, grace_s: float):
+        """SIGTERM the worker's process group, then SIGKILL after grace_s."""
+        self.terminate()
+        await asyncio.to_thread(self.process.join, grace_s)
+        if self.process.exitcode is None:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            await asyncio.to_thread(self.process.join)
+        self.conn.close()
+
+
+class ExperimentWorkerPool:
+    def __init__(self, size: int, grace_s: float):
+        self.size = size
+        self.grace_s = grace_s
+        self.preload: list[str] = []
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: list[ExperimentWorker] = []
+        self._busy: set[ExperimentWorker] = set()
+        self._closed = False
+
+    def start(self, preload: Iterable[str]):
+        """Start the workers now, so they have imported the scripts before the first run."""
+        self.preload = list(preload)
+        self._fill()
+
+    def _fill(self):
+        while not self._closed and len(self._idle) + len(self._busy) < self.size:
+            self._idle.append(ExperimentWorker(self._context, self.preload))
+
+    def _acquire(self) -> ExperimentWorker:
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive():
+                break
+        else:
+            worker = ExperimentWorker(self._context, self.preload)
+        self._busy.add(worker)
+        return worker
+
+    async def run(self, script: str, function: str, options: dict) -> AsyncIterator[tuple]:
+        """
+        Call `function` of `script` in a worker, with the `options` its
+        signature accepts, yielding ("log", line) and ("progress", current,
+        total) messages. Raises ExperimentWorkerError if the experiment fails.
+        """
+        worker = self._acquire()
+        error, finished = None, False
+        try:
+            worker.conn.send((script, function, options))
+            while True:
+                try:
+                    message = await asyncio.to_thread(worker.conn.recv)
+                except EOFError:
+                    await asyncio.to_thread(worker.process.join, self.grace_s)
+                    raise ExperimentWorkerError(f"Experiment worker exited with code {worker.process.exitcode}")
+                if message[0] == "done":
+                    error, finished = message[1], True
+                    break
+                yield message
+        finally:
+            self._busy.discard(worker)
+            if finished and not self._closed:
+                self._idle.append(worker)
+            else:
+                # Cancelled, timed out or died mid-run
+                await worker.stop(self.grace_s)
+            self._fill()
+        if error is not None:
+            raise ExperimentWorkerError(error)
+
+    def close(self):
+        self._closed = True
+        for worker in self._idle:
+            with contextlib.suppress(OSError):
+                worker.conn.send(None)
+        for worker in self._busy:
+            worker.terminate()
+        self._idle.clear()
+
+
+_pool: ExperimentWorkerPool | None = None
+
+
+def get_experiment_workers() -> ExperimentWorkerPool:
+    global _pool
+    if _pool is None:
+        settings = get_settings()
+        _pool = ExperimentWorkerPool(settings.experiment_max_concurrent, settings.experiment_cancel_grace_s)
+    return _pool
@@ -1,6 +1,20 @@
 """LLM-as-Judge: scores response quality on 1-10 scale."""
-from openai import AsyncOpenAI
-from config import get_settings
+import re
+import json
+import asyncio
+import hashlib
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from openai import AsyncOpenAI, RateLimitError
+from config import JudgeMode, get_settings
+from services.judge_cache import JudgeCache, get_judge_cache
+from services.rate_limiter import Ticket, get_judge_limiter
+from services.telemetry import JUDGE_CALLS, JUDGE_TOKENS
+
+# Bump when a prompt changes so cached judgements from the old prompt are not reused
+JUDGE_PROMPT_VERSION = "score-v1"
+PAIRWISE_PROMPT_VERSION = "pairwise-v1"
+SCORE_ONLY_PROMPT_VERSION = "score-json-v1"
+COMPARE_PROMPT_VERSION = "compare-json-v1"
 
 JUDGE_PROMPT = """You are an expert evaluator. Given a user query and an AI assistant's response, rate the response quality.
 
@@ -25,61 +39,440 @@ Which response better addresses the user's needs?
 First, explain your reasoning in 2-3 sentences.
 Then output exactly one of: A, B, or TIE on the last line."""
 
+SCORE_ONLY_PROMPT = """You are an expert evaluator. Given a user query and an AI assistant's response, rate the response quality.
+
+Consider: accuracy, completeness, helpfulness, coherence.
+
+Respond with only a JSON object of the form {{"score": X}} where X is an integer from 1 to 10. Do not explain.
+
+[User Query]: {query}
+[Assistant Response]: {response}"""
+
+COMPARE_PROMPT = """You are an expert evaluator. Compare two AI assistant responses to the same user query.
+
+Consider: accuracy, completeness, helpfulness, coherence.
+
+Rate each response from 1-10 and decide which one better addresses the user's needs.
+Respond with only a JSON object of the form:
+{{{reasoning_field}"score_a": X, "score_b": Y, "verdict": "A" or "B" or "TIE"}}
+
+[User Query]: {query}
+
+[Response A]: {response_a}
+
+[Response B]: {response_b}"""
+
+COMPARE_REASONING_FIELD = '"reasoning": "<2-3 sentences comparing Response A and Response B>", '
+
+# {"score": 10} is 6 tokens; leave headroom for whitespace variants
+SCORE_ONLY_MAX_TOKENS = 16
+# Two scores and a verdict without reasoning
+COMPARE_SCORE_ONLY_MAX_TOKENS = 40
+
+_JSON_OBJECT = re.compile(r"\{.*?\}", re.DOTALL)
+# Reasoning text may itself contain braces, so take the outermost object
+_JSON_OBJECT_GREEDY = re.compile(r"\{.*\}", re.DOTALL)
+# "Response A" / "Response B" in comparative reasoning; group 2 is the letter
+RESPONSE_LABEL = re.compile(r"\b(Response |response )([AB])\b")
+
+
+class JudgeParseError(ValueError):
+    """The judge reply did not contain a usable score."""
+
+
+def parse_score_json(text: str | None) -> float:
+    """Extract the 1-10 score from a score-only reply, tolerating code fences and stray text."""
+    match = _JSON_OBJECT.search(text or "")
+    if match is None:
+        raise JudgeParseError(f"No JSON object in judge reply: {text!r}")
+    try:
+        score = float(json.loads(match.group(0))["score"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise JudgeParseError(f"Malformed judge reply: {text!r}") from e
+    if not 1.0 <= score <= 10.0:
+        raise JudgeParseError(f"Judge score out of range: {score}")
+    return score
+
+
+def _check_score(value) -> float:
+    score = float(value)
+    if not 1.0 <= score <= 10.0:
+        raise JudgeParseError(f"Judge score out of range: {score}")
+    return score
+
+
+def parse_verbose_score(text: str | None) -> tuple[float, str]:
+    """Split a verbose reply into (score, reasoning); the score comes from the last "Score:" line."""
+    lines = (text or "").strip().split("\n")
+    for line in reversed(lines):
+        if "score:" in line.lower():
+            try:
+                score = _check_score(line.split(":")[-1].strip())
+            except ValueError:
+                continue  # JudgeParseError included: an earlier line may still hold the score
+            reasoning = "\n".join(l for l in lines if "score:" not in l.lower()).strip()
+            return score, reasoning
+    raise JudgeParseError(f"No 'Score:' line in judge reply: {text!r}")
+
+
+def parse_compare_json(text: str | None) -> dict:
+    """Extract {score_a, score_b, verdict[, reasoning]} from a comparative judge reply."""
+    match = _JSON_OBJECT_GREEDY.search(text or "")
+    if match is None:
+        raise JudgeParseError(f"No JSON object in judge reply: {text!r}")
+    try:
+        data = json.loads(match.group(0))
+        result = {
+            "score_a": _check_score(data["score_a"]),
+            "score_b": _check_score(data["score_b"]),
+            "verdict": str(data["verdict"]).strip().upper(),
+        }
+    except (ValueError, KeyError, TypeError) as e:
+        raise JudgeParseError(f"Malformed judge reply: {text!r}") from e
+    if result["verdict"] not in ("A", "B", "TIE"):
+        raise JudgeParseError(f"Unknown verdict in judge reply: {text!r}")
+    if "reasoning" in data:
+        result["reasoning"] = str(data["reasoning"]).strip()
+    return result
+
+
+def _swap_labels(text: str) -> str:
+    """Swap "Response A" and "Response B" mentions in judge reasoning."""
+    return RESPONSE_LABEL.sub(lambda m: m.group(1) + ("B" if m.group(2) == "A" else "A"), text)
+
+
+def _presented_swapped(query: str, response_a: str, response_b: str) -> bool:
+    """
+    Position-bias mitigation: show the pair as (B, A) for about half of all pairs.
+
+    The order is a hash of the content rather than a coin flip, so it is
+    balanced across a dataset yet reproducible between runs.
+    """
+    digest = hashlib.sha256("\0".join((query, response_a, response_b)).encode()).digest()
+    return bool(digest[0] & 1)
+
+# Rough output allowance per call for rate-limit budgeting (settled with real usage)
+ESTIMATED_OUTPUT_TOKENS = 150
+MAX_RATE_LIMIT_RETRIES = 3
+
+ProgressCallback = Callable[[int, int | None], None]
+
+_client: AsyncOpenAI | None = None
+
+
+def get_judge_client() -> AsyncOpenAI:
+    """One client, and so one connection pool, for every Judge in the process."""
+    global _client
+    if _client is None:
+        settings = get_settings()
+        _client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url or None,  # e.g. scripts/stub_llm_server.py
+        )
+    return _client
+
 
 class Judge:
-    def __init__(self):
+    def __init__(self, use_cache: bool | None = None, mode: JudgeMode | None = None):
         self.settings = get_settings()
-        self.client = AsyncOpenAI(api_key=self.settings.openai_api_key)
+        self.client = get_judge_client()
         # Read judge model from settings (allows switching via .env)
         self.judge_model = self.settings.judge_model
+        # Results cache shared with every other Judge in the process (and on disk)
+        self.use_cache = self.settings.judge_cache_enabled if use_cache is None else use_cache
+        self.cache: JudgeCache = get_judge_cache()
+        # Rate limiter shared by all bulk calls in the process
+        self.limiter = get_judge_limiter()
+        # Default mode for score()/score_many(); score_with_reasoning is always verbose
+        self.mode: JudgeMode = mode or self.settings.judge_mode
+        # Token usage of API calls made by this instance, per method (cache hits excluded)
+        self.usage: dict[str, dict] = {}
 
-    async def score(self, query: str, response: str) -> float:
-        """Score a single response on 1-10 scale."""
-        result = await self.score_with_reasoning(query, response)
-        return result["score"]
+    async def _cached(self, key: str | None) -> dict | None:
+        if key is None:
+            return None
+        return await self.cache.aget(key)
 
-    async def score_with_reasoning(self, query: str, response: str) -> dict:
-        """Score a single response on 1-10 scale and return reasoning."""
+    def _cache_key(self, use_cache: bool | None, template_version: str, method: str,
+                   query: str, *responses: str) -> str | None:
+        """Cache key for this call, or None when caching is bypassed."""
+        if not (self.use_cache if use_cache is None else use_cache):
+            return None
+        # A non-default endpoint (e.g. the benchmark stub) must not share cache entries
+        model = f"{self.settings.openai_base_url}|{self.judge_model}" if self.settings.openai_base_url \
+            else self.judge_model
+        return JudgeCache.make_key(model, template_version, method, query, *responses)
+
+    async def _complete(self, prompt: str, method: str, ticket: Ticket | None = None, **params) -> str:
         resp = await self.client.chat.completions.create(
             model=self.judge_model,
-            messages=[{"role": "user", "content": JUDGE_PROMPT.format(
-                query=query, response=response
-            )}],
+            messages=[{"role": "user", "content": prompt}],
             temperature=0.0,
+            **params,
         )
-        text = resp.choices[0].message.content
-        score = 5.0  # fallback
-        reasoning = text.strip()
-
-        # Extract score from last line
-        lines = text.strip().split("\n")
-        for line in reversed(lines):
-            if "score:" in line.lower():
-                try:
-                    score = float(line.split(":")[-1].strip())
-                    # Remove score line from reasoning
-                    reasoning = "\n".join(l for l in lines if "score:" not in l.lower()).strip()
-                    break
-                except ValueError:
-                    continue
+        JUDGE_CALLS.labels(method).inc()
+        if resp.usage is not None:
+            JUDGE_TOKENS.labels(method, "input").inc(resp.usage.prompt_tokens)
+            JUDGE_TOKENS.labels(method, "output").inc(resp.usage.completion_tokens)
+            if ticket is not None:
+                ticket.settle(resp.usage.total_tokens)
+            usage = self.usage.setdefault(method, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+            usage["calls"] += 1
+            usage["input_tokens"] += resp.usage.prompt_tokens
+            usage["output_tokens"] += resp.usage.completion_tokens
+        return resp.choices[0].message.content
 
-        return {"score": score, "reasoning": reasoning}
+    async def score(self, query: str, response: str, use_cache: bool | None = None,
+                    mode: JudgeMode | None = None) -> float:
+        """Score a single response on 1-10 scale."""
+        if (mode or self.mode) == "score_only":
+            key = self._cache_key(use_cache, SCORE_ONLY_PROMPT_VERSION, "score_only", query, response)
+            if (cached := await self._cached(key)) is not None:
+                return cached["score"]
+            result = await self._judge_score_only(query, response, key)
+            return result["score"]
+        result = await self.score_with_reasoning(query, response, use_cache=use_cache)
+        return result["score"]
 
-    async def pairwise(self, query: str, response_a: str, response_b: str) -> str:
-        """Compare two responses. Returns 'A', 'B', or 'TIE'."""
-        resp = await self.client.chat.completions.create(
-            model=self.judge_model,
-            messages=[{"role": "user", "content": PAIRWISE_PROMPT.format(
-                query=query, response_a=response_a, response_b=response_b
-            )}],
-            temperature=0.0,
+    async def _judge_score_only(self, query: str, response: str, key: str | None,
+                                ticket: Ticket | None = None) -> dict:
+        text = await self._complete(
+            SCORE_ONLY_PROMPT.format(query=query, response=response), "score_only", ticket,
+            max_tokens=SCORE_ONLY_MAX_TOKENS,
+            response_format={"type": "json_object"},
         )
-        text = resp.choices[0].message.content.strip()
+        result = {"score": parse_score_json(text)}  # raises JudgeParseError, never guesses
+        if key is not None:
+            await self.cache.aput(key, result)
+        return result
+
+    async def score_with_reasoning(self, query: str, response: str,
+                                   use_cache: bool | None = None) -> dict:
+        """Score a single response on 1-10 scale and return reasoning."""
+        key = self._cache_key(use_cache, JUDGE_PROMPT_VERSION, "score", query, response)
+        if (cached := await self._cached(key)) is not None:
+            return dict(cached)
+        return await self._judge_score(query, response, key)
+
+    async def _judge_score(self, query: str, response: str, key: str | None,
+                           ticket: Ticket | None = None) -> dict:
+        text = await self._complete(JUDGE_PROMPT.format(query=query, response=response), "score", ticket)
+        score, reasoning = parse_verbose_score(text)  # raises JudgeParseError, never guesses
+        result = {"score": score, "reasoning": reasoning}
+        if key is not None:
+            await self.cache.aput(key, result)
+        return result
+
+    async def pairwise(self, query: str, response_a: str, response_b: str,
+                       use_cache: bool | None = None) -> str:
+        """Compare two responses. Returns 'A', 'B', or 'TIE'."""
+        key = self._cache_key(use_cache, PAIRWISE_PROMPT_VERSION, "pairwise", query, response_a, response_b)
+        if (cached := await self._cached(key)) is not None:
+            return cached["verdict"]
+        return await self._judge_pairwise(query, response_a, response_b, key)
+
+    async def _judge_pairwise(self, query: str, response_a: str, response_b: str,
+                              key: str | None, ticket: Ticket | None = None) -> str:
+        text = await self._complete(PAIRWISE_PROMPT.format(
+            query=query, response_a=response_a, response_b=response_b
+        ), "pairwise", ticket)
+        text = text.strip()
         last_line = text.split("\n")[-1].strip().upper()
         if "TIE" in last_line:
-            return "TIE"
+            verdict = "TIE"
         elif "A" in last_line and "B" not in last_line:
-            return "A"
+            verdict = "A"
         elif "B" in last_line:
-            return "B"
-        return "TIE"  # fallback
+            verdict = "B"
+        else:
+            return "TIE"  # fallback (not cached)
+
+        if key is not None:
+            await self.cache.aput(key, {"verdict": verdict})
+        return verdict
+
+    async def compare(self, query: str, response_a: str, response_b: str,
+                      use_cache: bool | None = None, reasoning: bool = True) -> dict:
+        """
+        Judge two responses in one call: both scores, a pairwise verdict and
+        (optionally) comparative reasoning.
+
+        Returns {"score_a", "score_b", "verdict": 'A' | 'B' | 'TIE', "reasoning"?,
+        "swapped"} in the caller's A/B order; "swapped" records whether the
+        judge saw the pair in reverse order.
+        """
+        key = self._compare_key(use_cache, reasoning, query, response_a, response_b)
+        if (cached := await self._cached(key)) is not None:
+            return dict(cached)
+        return await self._judge_compare(query, response_a, response_b, reasoning, key)
+
+    def _compare_key(self, use_cache: bool | None, reasoning: bool, query: str,
+                     response_a: str, response_b: str) -> str | None:
+        method = "compare" if reasoning else "compare_score_only"
+        return self._cache_key(use_cache, COMPARE_PROMPT_VERSION, method, query, response_a, response_b)
+
+    async def _judge_compare(self, query: str, response_a: str, response_b: str, reasoning: bool,
+                             key: str | None, ticket: Ticket | None = None) -> dict:
+        swapped = _presented_swapped(query, response_a, response_b)
+        first, second = (response_b, response_a) if swapped else (response_a, response_b)
+        params = {} if reasoning else {"max_tokens": COMPARE_SCORE_ONLY_MAX_TOKENS}
+        text = await self._complete(
+            COMPARE_PROMPT.format(
+                reasoning_field=COMPARE_REASONING_FIELD if reasoning else "",
+                query=query, response_a=first, response_b=second,
+            ),
+            "compare", ticket,
+            response_format={"type": "json_object"},
+            **params,
+        )
+        parsed = parse_compare_json(text)  # raises JudgeParseError, never guesses
+        if swapped:
+            parsed["score_a"], parsed["score_b"] = parsed["score_b"], parsed["score_a"]
+            parsed["verdict"] = {"A": "B", "B": "A"}.get(parsed["verdict"], "TIE")
+            if "reasoning" in parsed:
+                parsed["reasoning"] = _swap_labels(parsed["reasoning"])
+        parsed["swapped"] = swapped
+        if key is not None:
+            await self.cache.aput(key, parsed)
+        return parsed
+
+    # ── Bulk API ──
+
+    def score_many(
+        self,
+        items: Iterable[tuple[str, str]] | AsyncIterable[tuple[str, str]],
+        use_cache: bool | None = None,
+        on_progress: ProgressCallback | None = None,
+        mode: JudgeMode | None = None,
+    ) -> AsyncIterator[tuple[int, dict | Exception]]:
+        """
+        Score many (query, response) pairs under the shared rate limiter.
+
+        Yields (index, {"score", ...}) in completion order, where index is the
+        item's position in `items`; verbose mode also returns "reasoning". A
+        failed item yields its exception instead of a result. Cache hits skip
+        the limiter entirely.
+        """
+        score_only = (mode or self.mode) == "score_only"
+
+        async def run(query: str, response: str) -> dict:
+            if score_only:
+                key = self._cache_key(use_cache, SCORE_ONLY_PROMPT_VERSION, "score_only", query, response)
+                call, prompt, output = self._judge_score_only, SCORE_ONLY_PROMPT, SCORE_ONLY_MAX_TOKENS
+            else:
+                key = self._cache_key(use_cache, JUDGE_PROMPT_VERSION, "score", query, response)
+                call, prompt, output = self._judge_score, JUDGE_PROMPT, ESTIMATED_OUTPUT_TOKENS
+            if (cached := await self._cached(key)) is not None:
+                return dict(cached)
+            estimate = (len(prompt) + len(query) + len(response)) // 4 + output
+            return await self._limited(estimate, lambda t: call(query, response, key, t))
+
+        return self._run_many(items, run, on_progress)
+
+    def pairwise_many(
+        self,
+        items: Iterable[tuple[str, str, str]] | AsyncIterable[tuple[str, str, str]],
+        use_cache: bool | None = None,
+        on_progress: ProgressCallback | None = None,
+    ) -> AsyncIterator[tuple[int, str | Exception]]:
+        """Bulk pairwise(): yields (index, 'A' | 'B' | 'TIE') in completion order."""
+        async def run(query: str, response_a: str, response_b: str) -> str:
+            key = self._cache_key(use_cache, PAIRWISE_PROMPT_VERSION, "pairwise", query, response_a, response_b)
+            if (cached := await self._cached(key)) is not None:
+                return cached["verdict"]
+            estimate = (len(PAIRWISE_PROMPT) + len(query) + len(response_a) + len(response_b)) // 4 \
+                + ESTIMATED_OUTPUT_TOKENS
+            return await self._limited(
+                estimate, lambda t: self._judge_pairwise(query, response_a, response_b, key, t)
+            )
+
+        return self._run_many(items, run, on_progress)
+
+    def compare_many(
+        self,
+        items: Iterable[tuple[str, str, str]] | AsyncIterable[tuple[str, str, str]],
+        use_cache: bool | None = None,
+        on_progress: ProgressCallback | None = None,
+        reasoning: bool = True,
+    ) -> AsyncIterator[tuple[int, dict | Exception]]:
+        """Bulk compare(): yields (index, {"score_a", "score_b", "verdict", ...}) in completion order."""
+        async def run(query: str, response_a: str, response_b: str) -> dict:
+            key = self._compare_key(use_cache, reasoning, query, response_a, response_b)
+            if (cached := await self._cached(key)) is not None:
+                return dict(cached)
+            output = ESTIMATED_OUTPUT_TOKENS if reasoning else COMPARE_SCORE_ONLY_MAX_TOKENS
+            estimate = (len(COMPARE_PROMPT) + len(query) + len(response_a) + len(response_b)) // 4 + output
+            return await self._limited(
+                estimate, lambda t: self._judge_compare(query, response_a, response_b, reasoning, key, t)
+            )
+
+        return self._run_many(items, run, on_progress)
+
+    async def _limited(self, estimated_tokens: int, call: Callable[[Ticket], Awaitable]):
+        """Run one judge call inside a limiter slot, backing off on 429s."""
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            try:
+                async with self.limiter.slot(estimated_tokens) as ticket:
+                    return await call(ticket)
+            except RateLimitError:
+                if attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                # Pause every worker, not just this one: we are over the ceiling
+                self.limiter.backoff(2.0 * (attempt + 1))
+
+    async def _run_many(self, items, fn, on_progress: ProgressCallback | None):
+        """Run fn(*item) over items with bounded concurrency, yielding (index, result)."""
+        total = len(items) if hasattr(items, "__len__") else None
+        source = aiter(items) if hasattr(items, "__aiter__") else _as_async(items)
+        pull_lock = asyncio.Lock()
+        results: asyncio.Queue = asyncio.Queue()
+        next_index = 0
+        source_error: Exception | None = None
+
+        async def worker():
+            nonlocal next_index, source_error
+            try:
+                while True:
+                    async with pull_lock:
+                        if source_error is not None:
+                            return
+                        try:
+                            item = await anext(source)
+                        except StopAsyncIteration:
+                            return
+                        except Exception as e:
+                            source_error = e
+                            return
+                        index = next_index
+                        next_index += 1
+                    try:
+                        result = await fn(*item)
+                    except Exception as e:
+                        result = e
+                    await results.put((index, result))
+            finally:
+                await results.put(None)  # worker finished
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.settings.judge_max_concurrency)]
+        try:
+            running, done = len(workers), 0
+            while running:
+                entry = await results.get()
+                if entry is None:
+                    running -= 1
+                    continue
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, total)
+                yield entry
+            if source_error is not None:
+                raise source_error
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def _as_async(items: Iterable):
+    for item in items:
+        yield item
@@ -0,0 +1,119 @@
+"""
+Content-addressed cache for judge results, shared by the API and scripts.
+
+Keys are SHA-256 hashes of (judge model, prompt template version, method,
+query, responses). Results are stored in a small SQLite file with an
+in-memory LRU tier in front, so re-running an experiment (or re-judging the
+same pair from /api/compare) does not pay for the same judgement twice.
+Judge calls run at temperature 0, so a cached result is as good as a fresh one.
+"""
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from config import get_settings
+from services.telemetry import JUDGE_CACHE_DISK_HIT, JUDGE_CACHE_MEMORY_HIT, JUDGE_CACHE_MISS
+
+
+class JudgeCache:
+    def __init__(self, path: str, memory_size: int = 4096):
+        self.path = Path(path)
+        self.memory_size = memory_size
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, template_version: str, method: str, query: str, *responses: str) -> str:
+        """Hash everything that determines the judge output."""
+        payload = json.dumps([model, template_version, method, query, *responses], ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS judge_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _remember(self, key: str, value: dict):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                JUDGE_CACHE_MEMORY_HIT.inc()
+                return value
+            row = self._db().execute("SELECT value FROM judge_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                JUDGE_CACHE_MISS.inc()
+                return None
+            value = json.loads(row[0])
+            self._remember(key, value)
+            self.disk_hits += 1
+            JUDGE_CACHE_DISK_HIT.inc()
+            return value
+
+    def put(self, key: str, value: dict):
+        with self._lock:
+            self._remember(key, value)
+            self._db().execute(
+                "INSERT OR REPLACE INTO judge_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+
+    async def aget(self, key: str) -> dict | None:
+        # Memory tier is checked inline; only disk lookups leave the event loop
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                JUDGE_CACHE_MEMORY_HIT.inc()
+                return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, value: dict):
+        await asyncio.to_thread(self.put, key, value)
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
+
+
+_judge_cache: JudgeCache | None = None
+
+
+def get_judge_cache() -> JudgeCache:
+    global _judge_cache
+    if _judge_cache is None:
+        settings = get_settings()
+        _judge_cache = JudgeCache(settings.judge_cache_path, settings.judge_cache_memory_size)
+    return _judge_cache
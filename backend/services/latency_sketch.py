@@ -0,0 +1,331 @@
+"""
+Streaming latency percentiles for the dashboard.
+
+Every routed request adds its router latency, generation latency and (for
+streamed responses) TTFT to DDSketches keyed by (metric, route, domain).
+Each value goes into three time buckets (5-minute, hourly, all-time), the
+same tiering as metrics_rollup, so p50/p90/p99 for a window are a merge
+of a bounded number of small sketches rather than a sort over routing_logs.
+
+The store lives in the API process (like the experiment registry) and is
+snapshotted to the latency_sketches table periodically and on shutdown,
+then reloaded at startup, so percentiles survive restarts. Replicas sharing
+a database each add their new samples to the stored sketches, so the table
+holds every replica's samples.
+"""
+import math
+import time
+import asyncio
+import logging
+from sqlalchemy import bindparam, delete, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_settings
+from db.database import get_db
+from db.models import LatencySketch
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("router_latency_ms", "latency_ms", "ttft_ms")
+QUANTILES = {"p50": 0.50, "p90": 0.90, "p99": 0.99}
+
+# resolution -> (bucket width, retention) in seconds; "all" is bucket 0, kept forever
+RESOLUTIONS = {"5min": (300, 2 * 3600), "hour": (3600, 8 * 86400)}
+ALL_TIME = "all"
+# window -> (resolution, length in seconds)
+WINDOWS = {"hour": ("5min", 3600), "day": ("hour", 86400), "week": ("hour", 7 * 86400)}
+
+_MIN_INDEXABLE = 1e-6  # values at or below this (in ms) are counted as zero
+
+
+class DDSketch:
+    """
+    Relative-error quantile sketch (Masson et al., "DDSketch", VLDB 2019).
+
+    Positive values are counted in logarithmic bins of ratio
+    gamma = (1 + a) / (1 - a), so every quantile is returned within relative
+    accuracy `a` of the true value, and two sketches merge exactly by adding
+    bin counts. Latencies only need the positive side.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        if value <= _MIN_INDEXABLE:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + 1
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "DDSketch"):
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _collapse(self):
+        # Fold the lowest bins together; only the low tail loses accuracy
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        folded = sum(self.bins.pop(k) for k in keys[:excess + 1])
+        self.bins[keys[excess]] = folded
+
+    def quantile(self, q: float) -> float | None:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "bins": [[k, n] for k, n in self.bins.items()],
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DDSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.bins = {int(k): int(n) for k, n in data["bins"]}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if data["count"]:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+SketchKey = tuple[str, int, str, str, str]  # (resolution, bucket_start, metric, route, domain)
+_KEY = ("resolution", "bucket_start", "metric", "route", "domain")
+_MERGE_BATCH = 500  # keys per SELECT ... FOR UPDATE
+
+
+class LatencySketchStore:
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.sketches: dict[SketchKey, DDSketch] = {}
+        self._pending: dict[SketchKey, DDSketch] = {}  # samples since the last snapshot
+
+    def record(self, route: str, domain: str | None, now: float | None = None, **values: float | None):
+        """Add one request's latencies, e.g. record("local", "math", router_latency_ms=4.2, latency_ms=830)."""
+        now = time.time() if now is None else now
+        buckets = [(name, int(now) - int(now) % width) for name, (width, _) in RESOLUTIONS.items()]
+        buckets.append((ALL_TIME, 0))
+        for metric, value in values.items():
+            if value is None:
+                continue
+            for resolution, bucket_start in buckets:
+                key = (resolution, bucket_start, metric, route, domain or "")
+                sketch = self.sketches.get(key)
+                if sketch is None:
+                    sketch = self.sketches[key] = DDSketch(self.relative_accuracy)
+                sketch.add(value)
+                delta = self._pending.get(key)
+                if delta is None:
+                    delta = self._pending[key] = DDSketch(self.relative_accuracy)
+                delta.add(value)
+
+    def merged(self, window: str | None = None, now: float | None = None) -> dict[tuple[str, str, str], DDSketch]:
+        """Merge the buckets covering `window` (None = all time) into one sketch per (metric, route, domain)."""
+        if window is None:
+            resolution, since = ALL_TIME, 0
+        else:
+            resolution, length = WINDOWS[window]
+            width = RESOLUTIONS[resolution][0]
+            since = int(time.time() if now is None else now) - length
+            since -= since % width  # include the partially elapsed first bucket
+        out: dict[tuple[str, str, str], DDSketch] = {}
+        for (res, bucket_start, metric, route, domain), sketch in self.sketches.items():
+            if res != resolution or bucket_start < since:
+                continue
+            target = out.get((metric, route, domain))
+            if target is None:
+                target = out[(metric, route, domain)] = DDSketch(self.relative_accuracy)
+            target.merge(sketch)
+        return out
+
+    def percentiles(self, window: str | None = None) -> dict:
+        """
+        {metric: {p50, p90, p99, count}} overall, plus the same per route and
+        per domain under "by_route" / "by_domain". Metrics with no samples are omitted.
+        """
+        overall: dict[str, DDSketch] = {}
+        by_route: dict[str, dict[str, DDSketch]] = {}
+        by_domain: dict[str, dict[str, DDSketch]] = {}
+        for (metric, route, domain), sketch in self.merged(window).items():
+            for group in (
+                overall,
+                by_route.setdefault(route, {}),
+                by_domain.setdefault(domain or "unknown", {}),
+            ):
+                if metric not in group:
+                    group[metric] = DDSketch(self.relative_accuracy)
+                group[metric].merge(sketch)
+
+        def summarize(group: dict[str, DDSketch]) -> dict:
+            return {
+                metric: {
+                    **{name: round(sketch.quantile(q), 2) for name, q in QUANTILES.items()},
+                    "count": sketch.count,
+                }
+                for metric, sketch in group.items()
+            }
+
+        return {
+            **summarize(overall),
+            "by_route": {route: summarize(group) for route, group in by_route.items()},
+            "by_domain": {domain: summarize(group) for domain, group in by_domain.items()},
+        }
+
+    def _expired(self, now: float) -> list[SketchKey]:
+        cutoffs = {name: now - retention for name, (_, retention) in RESOLUTIONS.items()}
+        return [key for key in self.sketches if key[0] in cutoffs and key[1] < cutoffs[key[0]]]
+
+    async def snapshot(self):
+        """
+        Merge the samples recorded since the last snapshot into the stored
+        sketches and drop expired buckets. The written buckets are then
+        replaced by the stored ones, which include other replicas' samples.
+        """
+        now = time.time()
+        for key in self._expired(now):
+            self.sketches.pop(key, None)
+            self._pending.pop(key, None)
+        pending, self._pending = self._pending, {}
+        try:
+            async with get_db() as db:
+                stored = await _merge_stored(db, pending, now) if pending else {}
+                for name, (_, retention) in RESOLUTIONS.items():
+                    await db.execute(delete(LatencySketch).where(
+                        LatencySketch.resolution == name, LatencySketch.bucket_start < now - retention
+                    ))
+        except Exception:
+            # Retry on the next snapshot, together with anything recorded meanwhile
+            for key, delta in pending.items():
+                if key in self._pending:
+                    delta.merge(self._pending[key])
+                self._pending[key] = delta
+            raise
+        for key, sketch in stored.items():
+            if key in self._pending:
+                sketch.merge(self._pending[key])  # recorded while the snapshot ran
+            self.sketches[key] = sketch
+
+    async def load(self):
+        """Restore persisted sketches that are still within retention."""
+        now = time.time()
+        async with get_db() as db:
+            result = await db.execute(select(LatencySketch))
+            for row in result.scalars():
+                if row.resolution in RESOLUTIONS and row.bucket_start < now - RESOLUTIONS[row.resolution][1]:
+                    continue
+                key = (row.resolution, row.bucket_start, row.metric, row.route, row.domain)
+                self.sketches[key] = DDSketch.from_dict(row.sketch)
+        logger.info("Loaded %d latency sketches", len(self.sketches))
+
+    async def run_snapshots(self, interval_s: float):
+        """Background task: snapshot every `interval_s` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                await self.snapshot()
+            except Exception:
+                logger.exception("Latency sketch snapshot failed")
+
+
+def _insert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(LatencySketch)
+
+
+async def _merge_stored(db: AsyncSession, deltas: dict[SketchKey, DDSketch], now: float) -> dict[SketchKey, DDSketch]:
+    """
+    Add `deltas` to the stored sketches (read-merge-write under a row lock);
+    returns the merged sketches.
+
+    Missing rows are created first. On PostgreSQL that gives SELECT ... FOR
+    UPDATE a row to lock; on SQLite the insert takes the database write lock
+    for the rest of the transaction, so no other writer can merge in between.
+    Keys are locked in sorted order, the same for every replica.
+    """
+    keys = sorted(deltas)
+    connection = await db.connection()
+    empty = DDSketch(next(iter(deltas.values())).relative_accuracy).to_dict()
+    await connection.execute(
+        _insert(connection.dialect.name).on_conflict_do_nothing(index_elements=list(_KEY)),
+        [{**dict(zip(_KEY, key)), "sketch": empty, "updated_at": now} for key in keys],
+    )
+
+    columns = [getattr(LatencySketch, name) for name in _KEY]
+    merged: dict[SketchKey, DDSketch] = {}
+    for i in range(0, len(keys), _MERGE_BATCH):
+        result = await connection.execute(
+            select(*columns, LatencySketch.sketch)
+            .where(tuple_(*columns).in_(keys[i:i + _MERGE_BATCH]))
+            .order_by(*columns)
+            .with_for_update()
+        )
+        for *key, data in result:
+            key = tuple(key)
+            sketch = DDSketch.from_dict(data)
+            if sketch.gamma != deltas[key].gamma:
+                sketch = DDSketch(deltas[key].relative_accuracy)  # SKETCH_RELATIVE_ACCURACY changed
+            sketch.merge(deltas[key])
+            merged[key] = sketch
+
+    table = LatencySketch.__table__
+    await connection.execute(
+        update(table).where(*(table.c[name] == bindparam(f"key_{name}") for name in _KEY)),
+        [
+            {**{f"key_{name}": value for name, value in zip(_KEY, key)}, "sketch": sketch.to_dict(), "updated_at": now}
+            for key, sketch in merged.items()
+        ],
+    )
+    return merged
+
+
+_store: LatencySketchStore | None = None
+
+
+def get_latency_sketches() -> LatencySketchStore:
+    global _store
+    if _store is None:
+        _store = LatencySketchStore(get_settings().sketch_relative_accuracy)
+    return _store
@@ -0,0 +1,212 @@
+"""
+Threshold sweep over production traffic for /api/metrics/pareto/live.
+
+The router sends a query to the local model when its confidence >= the
+threshold, so for every threshold the local share, the projected spend
+(cloud cost of the queries below it) and the expected quality follow from
+the distribution of logged confidences. The store keeps one histogram per
+UTC hour over BINS equal-width confidence bins (query count and
+cloud_cost_usd per bin), folding in new routing_logs rows by id on each
+refresh: after the first load a sweep costs O(new rows + OVERLAP_IDS + BINS)
+whatever the table size. Prefix sums over the bins answer every threshold at once, and
+thresholds on the 1/BINS grid are exact.
+
+Expected quality is estimated per confidence band and model: the mean
+sampled judge score (routing_logs.judge_score, see
+scripts/score_routing_logs.py) of queries in that band served by that
+model, or the offline MT-Bench baseline where fewer than MIN_SAMPLES were
+judged. Forced-route requests (logged with confidence 1.0) are left out.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import numpy as np
+from sqlalchemy import func, select
+from config import get_settings
+from db.database import get_db
+from db.models import RoutingLog
+
+logger = logging.getLogger(__name__)
+
+BINS = 1000
+BANDS = 10
+MIN_SAMPLES = 5
+HOUR = 3600
+CHUNK = 50_000
+# On PostgreSQL an id is taken when a row is inserted, so a row can commit
+# after rows with higher ids and be passed over by an id > last_id scan.
+# Each refresh re-reads this many ids below last_id and skips those already
+# counted; a row committing more than OVERLAP_IDS ids late is still missed.
+OVERLAP_IDS = 10_000
+FORCED_CONFIDENCE = 1.0
+
+
+def _since(days: int) -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+
+
+def _bins(confidence: np.ndarray) -> np.ndarray:
+    # Confidences are stored to 4 decimals; the epsilon keeps 0.6 in bin 600, not 599
+    return np.clip(np.floor(confidence * BINS + 1e-6).astype(np.int64), 0, BINS - 1)
+
+
+def _prefix(values: np.ndarray) -> np.ndarray:
+    """prefix[k] = sum of values[:k], for k = 0..len(values)."""
+    return np.concatenate(([0.0], np.cumsum(values)))
+
+
+class LiveParetoStore:
+    def __init__(self, max_days: int = 30):
+        self.max_days = max_days
+        self.last_id: Optional[int] = None
+        self._counted: set[int] = set()  # ids above last_id - OVERLAP_IDS already folded in
+        self.hours: dict[int, np.ndarray] = {}  # hour start (epoch s) -> [counts, cloud_cost] x BINS
+        self._lock = asyncio.Lock()
+
+    async def refresh(self):
+        """Fold routing_logs rows added since the last refresh into the histograms."""
+        async with self._lock:
+            since = _since(self.max_days)
+            async with get_db() as db:
+                top = await db.scalar(select(func.max(RoutingLog.id))) or 0
+                if self.last_id is None:
+                    # First load: start at the lowest id inside the window (a created_at
+                    # index range scan; ids of copied or imported rows need not follow time)
+                    first = await db.scalar(select(func.min(RoutingLog.id)).where(RoutingLog.created_at >= since))
+                    self.last_id = cursor = first - 1 if first is not None else top
+                else:
+                    cursor = self.last_id - OVERLAP_IDS
+                remember = top - OVERLAP_IDS  # only ids the next refresh re-reads are kept
+                while True:
+                    rows = (await db.execute(
+                        select(RoutingLog.id, RoutingLog.created_at, RoutingLog.confidence, RoutingLog.cloud_cost_usd)
+                        .where(RoutingLog.id > cursor)
+                        .order_by(RoutingLog.id)
+                        .limit(CHUNK)
+                    )).all()
+                    if not rows:
+                        break
+                    cursor = rows[-1].id
+                    new = [r for r in rows if r.id not in self._counted]
+                    self._counted.update(r.id for r in new if r.id > remember)
+                    self._add(new, since)
+                self.last_id = max(self.last_id, cursor)
+            floor = self.last_id - OVERLAP_IDS
+            self._counted = {i for i in self._counted if i > floor}
+            cutoff = int(since.replace(tzinfo=timezone.utc).timestamp()) - HOUR
+            for hour in [h for h in self.hours if h < cutoff]:
+                del self.hours[hour]
+
+    def _add(self, rows, since: datetime):
+        rows = [r for r in rows if r.created_at is not None and r.created_at >= since
+                and r.confidence < FORCED_CONFIDENCE]
+        if not rows:
+            return
+        epoch = np.array([r.created_at for r in rows], dtype="datetime64[s]").astype(np.int64)
+        hours = epoch - epoch % HOUR
+        bins = _bins(np.array([r.confidence for r in rows], dtype=np.float64))
+        cost = np.array([r.cloud_cost_usd or 0.0 for r in rows], dtype=np.float64)
+        for hour in np.unique(hours):
+            mask = hours == hour
+            hist = self.hours.setdefault(int(hour), np.zeros((2, BINS)))
+            hist[0] += np.bincount(bins[mask], minlength=BINS)
+            hist[1] += np.bincount(bins[mask], weights=cost[mask], minlength=BINS)
+
+    def histogram(self, days: int) -> np.ndarray:
+        """Summed [counts, cloud_cost] since the start of the UTC hour `days` ago."""
+        start = int(_since(days).replace(tzinfo=timezone.utc).timestamp())
+        start -= start % HOUR
+        total = np.zeros((2, BINS))
+        for hour, hist in self.hours.items():
+            if hour >= start:
+                total += hist
+        return total
+
+
+async def judged_samples(days: int) -> np.ndarray:
+    """(confidence, is_local, judge_score) rows for the judged queries in the window."""
+    async with get_db() as db:
+        rows = (await db.execute(
+            select(RoutingLog.confidence, RoutingLog.route, RoutingLog.judge_score).where(
+                RoutingLog.judge_score.is_not(None),
+                RoutingLog.created_at >= _since(days),
+                RoutingLog.confidence < FORCED_CONFIDENCE,
+            )
+        )).all()
+    return np.array([(c, route == "local", s) for c, route, s in rows], dtype=np.float64).reshape(-1, 3)
+
+
+def band_quality(samples: np.ndarray, local: bool, baseline: Optional[float]) -> tuple[np.ndarray, int]:
+    """Expected score per confidence band for one model, and how many bands used judge samples."""
+    quality = np.full(BANDS, np.nan if baseline is None else baseline)
+    rows = samples[samples[:, 1] == float(local)]
+    bands = _bins(rows[:, 0]) * BANDS // BINS
+    counts = np.bincount(bands, minlength=BANDS)
+    sums = np.bincount(bands, weights=rows[:, 2], minlength=BANDS)
+    judged = counts >= MIN_SAMPLES
+    quality[judged] = sums[judged] / counts[judged]
+    return quality, int(judged.sum())
+
+
+def sweep(
+    hist: np.ndarray,
+    thresholds: np.ndarray,
+    local_band: np.ndarray,
+    cloud_band: np.ndarray,
+) -> dict:
+    """Local %, projected cost and expected quality for every threshold."""
+    counts, costs = hist
+    n = counts.sum()
+    total_cost = costs.sum()
+    band = np.arange(BINS) * BANDS // BINS
+    k = np.clip(np.rint(thresholds * BINS).astype(np.int64), 0, BINS)
+
+    below = _prefix(counts)                       # queries routed to cloud at threshold k/BINS
+    cloud_cost = _prefix(costs)
+    local_score = _prefix(counts * local_band[band])
+    cloud_score = _prefix(counts * cloud_band[band])
+    local_score_at = local_score[-1] - local_score[k]  # bins >= k go local
+    quality = (local_score_at + cloud_score[k]) / n
+
+    local_quality = local_score[-1] / n           # everything local
+    cloud_quality = cloud_score[-1] / n           # everything cloud
+    gap = cloud_quality - local_quality
+    pgr = (quality - local_quality) / gap * 100 if gap else np.full(len(k), 100.0)
+    local_pct = (n - below[k]) / n * 100
+
+    def num(value, digits):
+        return None if np.isnan(value) else round(float(value), digits) + 0.0  # no -0.0
+
+    points = [
+        {
+            "threshold": round(float(t), 4),
+            "local_pct": round(float(local_pct[i]), 1),
+            "cost_pct": round(float(cloud_cost[k[i]] / total_cost * 100), 1) if total_cost else 0.0,
+            "projected_cost_usd": round(float(cloud_cost[k[i]]), 6),
+            "quality": num(quality[i], 3),
+            "pgr": num(pgr[i], 1),
+        }
+        for i, t in enumerate(thresholds)
+    ]
+    recommended = None
+    if not np.isnan(quality).any():
+        # Same operating point rule as scripts/eval_router.py: maximise PGR x savings
+        recommended = points[int(np.argmax(pgr * local_pct / 100))]["threshold"]
+    return {
+        "queries": int(n),
+        "sweep": points,
+        "local_quality": num(local_quality, 3),
+        "cloud_quality": num(cloud_quality, 3),
+        "recommended_threshold": recommended,
+    }
+
+
+_store: LiveParetoStore | None = None
+
+
+def get_live_pareto() -> LiveParetoStore:
+    global _store
+    if _store is None:
+        _store = LiveParetoStore(get_settings().live_pareto_max_days)
+    return _store
@@ -0,0 +1,135 @@
+"""
+In-process fan-out of routing log events to /api/metrics/stream clients.
+
+/api/chat publishes each log after it is committed. publish() only appends
+to every subscriber's pending list, so its cost is independent of how fast
+clients read. Each subscriber turns what accumulated into one delta event:
+after the first pending log it waits coalesce_ms for more, so a burst of
+requests becomes one message rather than one per log. A client that falls
+more than max_pending logs behind is not sent the backlog: its pending list
+is dropped and it gets a fresh snapshot instead.
+
+Deltas carry new history rows and counter increments. Averages and latency
+percentiles are refreshed by the periodic snapshot the stream sends.
+"""
+import asyncio
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from config import get_settings
+from db.models import RoutingLog
+
+RESYNC = "resync"
+
+
+def log_event(log: RoutingLog) -> dict:
+    """What a subscriber needs from one log: a history row plus counter inputs."""
+    return {
+        "id": log.id,
+        "query": log.query[:100],
+        "route": log.route,
+        "confidence": log.confidence,
+        "domain": log.domain,
+        "latency_ms": log.latency_ms,
+        "cost_usd": log.cost_usd or 0.0,
+        "savings_usd": log.savings_usd or 0.0,
+        "timestamp": log.created_at.isoformat() if log.created_at else None,
+    }
+
+
+class Subscriber:
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        self.pending: list[dict] = []
+        self.overflowed = False
+        self.wakeup = asyncio.Event()
+
+    def push(self, event: dict):
+        if self.overflowed:
+            return
+        if len(self.pending) >= self.max_pending:
+            self.pending.clear()
+            self.overflowed = True
+        else:
+            self.pending.append(event)
+        self.wakeup.set()
+
+    async def next(self, coalesce_s: float, timeout: float) -> list[dict] | str | None:
+        """
+        Pending events (oldest first), RESYNC if this subscriber fell too far
+        behind, or None if nothing arrived within `timeout` seconds.
+        """
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        await asyncio.sleep(coalesce_s)
+        self.wakeup.clear()
+        if self.overflowed:
+            self.overflowed = False
+            return RESYNC
+        events, self.pending = self.pending, []
+        return events
+
+
+class MetricsBroadcaster:
+    def __init__(self, max_pending: int = 1000):
+        self.max_pending = max_pending
+        self._subscribers: set[Subscriber] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, log: RoutingLog):
+        if not self._subscribers:
+            return
+        event = log_event(log)
+        for subscriber in self._subscribers:
+            subscriber.push(event)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[Subscriber]:
+        subscriber = Subscriber(self.max_pending)
+        self._subscribers.add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            self._subscribers.discard(subscriber)
+
+
+def build_delta(events: list[dict], after_id: Optional[int], limit: int) -> Optional[dict]:
+    """
+    Counter increments and new history rows (newest first, at most `limit`)
+    for the events newer than `after_id`; None if nothing is left.
+    """
+    if after_id is not None:
+        events = [e for e in events if e["id"] is not None and e["id"] > after_id]
+    if not events:
+        return None
+    local = sum(1 for e in events if e["route"] == "local")
+    domains: dict[str, dict[str, int]] = {}
+    for e in events:
+        counts = domains.setdefault(e["domain"] or "null", {"local": 0, "cloud": 0})
+        counts[e["route"]] += 1
+    return {
+        "total_queries": len(events),
+        "local_count": local,
+        "cloud_count": len(events) - local,
+        "total_cost": sum(e["cost_usd"] for e in events),
+        "total_saved": sum(e["savings_usd"] for e in events),
+        "domain_breakdown": domains,
+        "recent_history": [
+            {k: e[k] for k in ("id", "query", "route", "confidence", "domain", "latency_ms", "cost_usd", "timestamp")}
+            for e in reversed(events[-limit:])
+        ],
+    }
+
+
+_broadcaster: MetricsBroadcaster | None = None
+
+
+def get_metrics_broadcaster() -> MetricsBroadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = MetricsBroadcaster(get_settings().metrics_stream_max_pending)
+    return _broadcaster
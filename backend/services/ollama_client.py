@@ -3,12 +3,16 @@ import time
 import httpx
 from typing import AsyncGenerator
 from config import get_settings
+from services.telemetry import BackendMetrics
 
 
 class OllamaClient:
     def __init__(self):
         self.settings = get_settings()
         self.base_url = self.settings.ollama_base_url
+        self.metrics = BackendMetrics("ollama")
+        # Kept for the client's lifetime so connections to Ollama are reused
+        self.client = httpx.AsyncClient(timeout=120.0)
 
     async def generate(self, prompt: str, system: str = "") -> dict:
         """
@@ -25,8 +29,8 @@ class OllamaClient:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": prompt})
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            resp = await client.post(
+        with self.metrics.inflight.track_inprogress(), self.metrics.errors.count_exceptions():
+            resp = await self.client.post(
                 f"{self.base_url}/api/chat",
                 json={
                     "model": self.settings.ollama_model,
@@ -38,6 +42,7 @@ class OllamaClient:
             data = resp.json()
 
         elapsed_ms = (time.perf_counter() - start) * 1000
+        self.metrics.generate.observe(elapsed_ms / 1000)
         return {
             "text": data["message"]["content"],
             "latency_ms": elapsed_ms,
@@ -52,8 +57,10 @@ class OllamaClient:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": prompt})
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            async with client.stream(
+        start = time.perf_counter()
+        first = True
+        with self.metrics.inflight.track_inprogress(), self.metrics.errors.count_exceptions():
+            async with self.client.stream(
                 "POST",
                 f"{self.base_url}/api/chat",
                 json={"model": self.settings.ollama_model, "messages": messages, "stream": True},
@@ -63,7 +70,11 @@ class OllamaClient:
                     if line:
                         chunk = json.loads(line)
                         if content := chunk.get("message", {}).get("content", ""):
+                            if first:
+                                self.metrics.ttft.observe(time.perf_counter() - start)
+                                first = False
                             yield content
+        self.metrics.stream.observe(time.perf_counter() - start)
 
 
 _ollama: OllamaClient | None = None
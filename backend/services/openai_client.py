@@ -3,12 +3,17 @@ import time
 from typing import AsyncGenerator
 from openai import AsyncOpenAI
 from config import get_settings
+from services.telemetry import BackendMetrics
 
 
 class OpenAIClient:
     def __init__(self):
         self.settings = get_settings()
-        self.client = AsyncOpenAI(api_key=self.settings.openai_api_key)
+        self.client = AsyncOpenAI(
+            api_key=self.settings.openai_api_key,
+            base_url=self.settings.openai_base_url or None,  # e.g. scripts/stub_llm_server.py
+        )
+        self.metrics = BackendMetrics("openai")
 
     async def generate(self, prompt: str, system: str = "") -> dict:
         """Non-streaming generation."""
@@ -18,11 +23,13 @@ class OpenAIClient:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": prompt})
 
-        resp = await self.client.chat.completions.create(
-            model=self.settings.cloud_model,
-            messages=messages,
-        )
+        with self.metrics.inflight.track_inprogress(), self.metrics.errors.count_exceptions():
+            resp = await self.client.chat.completions.create(
+                model=self.settings.cloud_model,
+                messages=messages,
+            )
         elapsed_ms = (time.perf_counter() - start) * 1000
+        self.metrics.generate.observe(elapsed_ms / 1000)
 
         return {
             "text": resp.choices[0].message.content,
@@ -38,14 +45,24 @@ class OpenAIClient:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": prompt})
 
-        stream = await self.client.chat.completions.create(
-            model=self.settings.cloud_model,
-            messages=messages,
-            stream=True,
-        )
-        async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        start = time.perf_counter()
+        first = True
+        with self.metrics.inflight.track_inprogress(), self.metrics.errors.count_exceptions():
+            stream = await self.client.chat.completions.create(
+                model=self.settings.cloud_model,
+                messages=messages,
+                stream=True,
+            )
+            # Closing the stream drops the HTTP connection, which is what makes
+            # OpenAI stop generating when the consumer goes away early.
+            async with stream:
+                async for chunk in stream:
+                    if chunk.choices[0].delta.content:
+                        if first:
+                            self.metrics.ttft.observe(time.perf_counter() - start)
+                            first = False
+                        yield chunk.choices[0].delta.content
+        self.metrics.stream.observe(time.perf_counter() - start)
 
 
 _openai: OpenAIClient | None = None
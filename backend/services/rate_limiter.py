@@ -0,0 +1,92 @@
+"""
+Token-bucket rate limiter for provider APIs (requests/min + tokens/min).
+
+Used by the bulk judge methods so batch scripts can run near the provider's
+rate ceiling without tripping 429s: callers take a slot with an estimated
+token cost, and settle it with the real usage once the response arrives.
+"""
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from config import get_settings
+
+
+class _Bucket:
+    """Continuously refilling bucket; a single request may overdraw it."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(self.rate, 1.0)  # ~1 second of burst
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        # Requests larger than the bucket only need it full, then overdraw
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.rate)
+
+
+class Ticket:
+    """Handle for one admitted request, used to correct the token estimate."""
+
+    def __init__(self, limiter: "TokenBucketLimiter", estimated_tokens: int):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+
+    def settle(self, actual_tokens: int):
+        self.limiter.tokens.level -= actual_tokens - self.estimated_tokens
+        self.estimated_tokens = actual_tokens
+
+
+class TokenBucketLimiter:
+    def __init__(self, rpm: float, tpm: float, max_concurrency: int):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()  # FIFO admission
+        self._paused_until = 0.0
+
+    def backoff(self, seconds: float):
+        """Pause all admissions, e.g. after the provider returned a 429."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def _admit(self, tokens: int):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                wait = max(
+                    self._paused_until - now,
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens),
+                )
+                if wait <= 0:
+                    self.requests.level -= 1
+                    self.tokens.level -= tokens
+                    return
+                await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int):
+        """Wait for a concurrency slot and rate budget, then hold the slot."""
+        async with self._slots:
+            await self._admit(estimated_tokens)
+            yield Ticket(self, estimated_tokens)
+
+
+_judge_limiter: TokenBucketLimiter | None = None
+
+
+def get_judge_limiter() -> TokenBucketLimiter:
+    global _judge_limiter
+    if _judge_limiter is None:
+        settings = get_settings()
+        _judge_limiter = TokenBucketLimiter(
+            settings.judge_rpm, settings.judge_tpm, settings.judge_max_concurrency
+        )
+    return _judge_limiter
@@ -0,0 +1,103 @@
+"""
+Rendered-response cache for the dashboard endpoints.
+
+Every open dashboard polls /api/metrics and /api/metrics/pareto. Responses
+are cached as rendered JSON bytes with a strong ETag, so a poll is served
+from memory (or answered 304 Not Modified) and backend work stays roughly
+constant however many dashboards are open:
+
+- an entry is fresh for ttl_s, and is dropped early by invalidate() (called
+  after each routing log write), but never before min_age_s, so a burst of
+  writes cannot turn every poll into a recomputation;
+- concurrent misses for the same key share one computation (single flight).
+
+The cache is per process: other replicas' writes only show up after ttl_s.
+"""
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Hashable, NamedTuple, Optional
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from config import get_settings
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    created: float     # time.monotonic()
+    generation: int
+
+
+class ResponseCache:
+    def __init__(self, ttl_s: float, min_age_s: float = 0.0, max_entries: int = 64):
+        self.ttl_s = ttl_s
+        self.min_age_s = min_age_s
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: dict[Hashable, CachedResponse] = {}
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+
+    def invalidate(self):
+        self.generation += 1
+
+    def _fresh(self, entry: CachedResponse) -> bool:
+        age = time.monotonic() - entry.created
+        return age < self.min_age_s or (age < self.ttl_s and entry.generation == self.generation)
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> CachedResponse:
+        """Cached entry for `key`, calling compute() (once for all waiters) when stale."""
+        entry = self._entries.get(key)
+        if entry is not None and self._fresh(entry):
+            return entry
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(self._fill(key, compute))
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: one client disconnecting must not cancel the others' computation
+        return await asyncio.shield(future)
+
+    async def _fill(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> CachedResponse:
+        generation = self.generation
+        body = json.dumps(jsonable_encoder(await compute()), separators=(",", ":")).encode()
+        entry = CachedResponse(
+            body=body,
+            etag='"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest(),
+            created=time.monotonic(),
+            generation=generation,
+        )
+        if len(self._entries) >= self.max_entries and key not in self._entries:
+            self._entries.pop(next(iter(self._entries)))  # oldest inserted
+        self._entries[key] = entry
+        return entry
+
+
+def etag_response(entry: CachedResponse, if_none_match: Optional[str]) -> Response:
+    """200 with the cached body, or 304 when If-None-Match already has this ETag."""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}  # always revalidate
+    if if_none_match:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if entry.etag in tags or "*" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+_metrics_cache: ResponseCache | None = None
+_pareto_cache: ResponseCache | None = None
+
+
+def get_metrics_cache() -> ResponseCache:
+    global _metrics_cache
+    if _metrics_cache is None:
+        settings = get_settings()
+        _metrics_cache = ResponseCache(settings.metrics_cache_ttl_s, settings.metrics_cache_min_age_s)
+    return _metrics_cache
+
+
+def get_pareto_cache() -> ResponseCache:
+    """Keyed on the result files' mtimes, so entries never need to expire."""
+    global _pareto_cache
+    if _pareto_cache is None:
+        _pareto_cache = ResponseCache(ttl_s=float("inf"), max_entries=4)
+    return _pareto_cache
@@ -10,6 +10,7 @@ from transformers import DistilBertTokenizer, DistilBertForSequenceClassificatio
 from services.feature_extractor import extract_features
 from config import get_settings
 from schemas.api import Route, RoutingDecision
+from services.telemetry import ROUTER_BATCH_SIZE, ROUTER_INFERENCE
 
 
 class RouterModel:
@@ -52,6 +53,8 @@ class RouterModel:
             local_confidence = probs[0, 1].item()  # class 1 = local-sufficient
 
         elapsed_ms = (time.perf_counter() - start) * 1000
+        ROUTER_INFERENCE.observe(elapsed_ms / 1000)
+        ROUTER_BATCH_SIZE.observe(inputs["input_ids"].shape[0])
 
         route = Route.LOCAL if local_confidence >= threshold else Route.CLOUD
 
@@ -0,0 +1,20 @@
+"""Helpers for SSE endpoints (sse_starlette's EventSourceResponse)."""
+from typing import AsyncGenerator
+from starlette.background import BackgroundTask
+
+
+def close_on_disconnect(events: AsyncGenerator) -> BackgroundTask:
+    """
+    Background task for EventSourceResponse(events, background=...) that
+    closes the event generator once the response ends.
+
+    On a client disconnect EventSourceResponse stops iterating but can leave
+    the generator suspended at a yield, so its finally blocks (closing an
+    upstream stream, unsubscribing) would wait for garbage collection.
+    BackgroundTask(events.aclose) is not enough: aclose is not a coroutine
+    function, so Starlette calls it in a thread and never awaits the result.
+    """
+    async def aclose():
+        await events.aclose()
+
+    return BackgroundTask(aclose)
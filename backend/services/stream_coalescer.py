@@ -0,0 +1,88 @@
+"""
+Coalesce streamed text chunks into fewer, larger SSE frames.
+
+Backends yield roughly one chunk per token, and serializing + sending each
+one as its own SSE event dominates API CPU at high concurrency. Chunks are
+grouped into frames that are flushed every `interval_ms` or once
+`max_bytes` are buffered, whichever comes first. The first chunk is always
+flushed on its own so time-to-first-token is unchanged. Once `max_bytes`
+are buffered the upstream is not read again until that frame is taken, so a
+slow client holds at most about one frame in memory, not the whole response.
+"""
+import asyncio
+from typing import AsyncGenerator, AsyncIterator
+
+
+async def single_frames(chunks: AsyncIterator[str]) -> AsyncGenerator[list[str], None]:
+    """Pass-through variant: one frame per chunk (coalescing disabled)."""
+    async for chunk in chunks:
+        yield [chunk]
+
+
+async def coalesce_chunks(
+    chunks: AsyncIterator[str], interval_ms: float, max_bytes: int
+) -> AsyncGenerator[list[str], None]:
+    """
+    Yield buffered chunks as frames (lists of chunks).
+
+    The upstream iterator is drained by a single producer task; a timer is
+    armed when the first chunk of a frame arrives, so a frame never waits
+    more than `interval_ms` even if the backend stalls mid-stream. A full
+    frame pauses the producer until the consumer takes it.
+    """
+    loop = asyncio.get_running_loop()
+    interval = interval_ms / 1000
+    buffer: list[str] = []
+    size = 0
+    first = True
+    finished = False
+    error: Exception | None = None
+    timer: asyncio.TimerHandle | None = None
+    wake = asyncio.Event()
+    room = asyncio.Event()  # cleared while a full frame waits for the consumer
+    room.set()
+
+    async def produce():
+        nonlocal size, first, finished, error, timer
+        try:
+            async for chunk in chunks:
+                buffer.append(chunk)
+                size += len(chunk.encode())
+                if first or size >= max_bytes:
+                    first = False
+                    wake.set()
+                    if size >= max_bytes:
+                        room.clear()
+                        await room.wait()
+                elif timer is None:
+                    timer = loop.call_later(interval, wake.set)
+        except Exception as e:
+            error = e
+        finally:
+            finished = True
+            wake.set()
+
+    producer = asyncio.create_task(produce())
+    try:
+        while not (finished and not buffer):
+            await wake.wait()
+            wake.clear()
+            if timer is not None:
+                timer.cancel()
+                timer = None
+            if buffer:
+                frame = buffer[:]
+                buffer.clear()
+                size = 0
+                room.set()
+                yield frame
+        if error is not None:
+            raise error
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if not producer.done():
+            # Cancelling the producer unwinds the upstream generator, which
+            # closes the backend connection (see chat_stream).
+            producer.cancel()
+            await asyncio.wait([producer])
@@ -0,0 +1,96 @@
+"""
+Prometheus instrumentation, exposed at GET /metrics.
+
+Metrics are module-level and label children for the fixed label values are
+bound once (see BackendMetrics), so recording on the hot path is a single
+float add on a per-series value. In the default single-process mode each
+series has its own (uncontended) lock. With several uvicorn workers, set
+PROMETHEUS_MULTIPROC_DIR to an empty directory before the server starts:
+every worker then writes to its own mmap'd files, with no cross-process
+locking, and /metrics merges them at scrape time.
+
+Ratios (e.g. judge cache hit rate) are left to PromQL:
+  sum(rate(judge_cache_lookups_total{result!="miss"}[5m])) / sum(rate(judge_cache_lookups_total[5m]))
+"""
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+# Seconds; generation spans sub-second cloud replies to long local decodes
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+ROUTER_INFERENCE = Histogram(
+    "router_inference_seconds", "Router decision time (features + DistilBERT forward pass)",
+    buckets=FAST_BUCKETS,
+)
+ROUTER_BATCH_SIZE = Histogram(
+    "router_batch_size", "Queries per router forward pass", buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+ROUTED_REQUESTS = Counter("routed_requests_total", "Routing decisions", ["route"])
+
+GENERATION = Histogram(
+    "generation_seconds", "Generation latency per backend (stream = until the last chunk)",
+    ["backend", "mode"], buckets=LATENCY_BUCKETS,
+)
+TTFT = Histogram(
+    "generation_ttft_seconds", "Time to first streamed chunk per backend",
+    ["backend"], buckets=LATENCY_BUCKETS,
+)
+INFLIGHT = Gauge(
+    "generation_inflight_requests", "Generations currently running per backend",
+    ["backend"], multiprocess_mode="livesum",
+)
+GENERATION_ERRORS = Counter("generation_errors_total", "Failed generations per backend", ["backend"])
+
+JUDGE_CALLS = Counter("judge_calls_total", "Judge API calls (cache hits excluded)", ["method"])
+JUDGE_TOKENS = Counter("judge_tokens_total", "Judge API tokens", ["method", "kind"])
+JUDGE_CACHE_LOOKUPS = Counter(
+    "judge_cache_lookups_total", "Judge result cache lookups", ["result"],  # memory_hit, disk_hit, miss
+)
+
+DB_WRITE = Histogram("db_write_seconds", "Routing log insert + rollup update + commit", buckets=FAST_BUCKETS)
+CLOUD_SPEND = Counter("cloud_spend_usd_total", "Spend on the cloud model (USD)")
+CLOUD_SAVINGS = Counter("cloud_savings_usd_total", "Cloud cost avoided by routing locally (USD)")
+
+
+class BackendMetrics:
+    """Label children for one generation backend, bound once per client."""
+
+    def __init__(self, backend: str):
+        self.generate = GENERATION.labels(backend, "generate")
+        self.stream = GENERATION.labels(backend, "stream")
+        self.ttft = TTFT.labels(backend)
+        self.inflight = INFLIGHT.labels(backend)
+        self.errors = GENERATION_ERRORS.labels(backend)
+
+
+JUDGE_CACHE_MEMORY_HIT = JUDGE_CACHE_LOOKUPS.labels("memory_hit")
+JUDGE_CACHE_DISK_HIT = JUDGE_CACHE_LOOKUPS.labels("disk_hit")
+JUDGE_CACHE_MISS = JUDGE_CACHE_LOOKUPS.labels("miss")
+
+
+def render() -> tuple[bytes, str]:
+    """Exposition body and content type for GET /metrics."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead():
+    """Drop this worker's live gauges from the multiprocess view on shutdown."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,80 @@
+"""Archiving routing logs to zstd JSONL partitions and reading them back."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import delete, func, select
+from config import get_settings
+from db import archive
+from db.archive import archive_logs, has_archive, iter_archive, retention_cutoff
+from db.database import get_db
+from db.log_writer import write_logs
+from db.models import RoutingLog
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "archive_dir", str(tmp_path))
+    return tmp_path / "routing_logs"
+
+
+async def insert_logs(monkeypatch) -> list[RoutingLog]:
+    # Noon, so the hours subtracted below never cross into another day's partition
+    noon = datetime.now(timezone.utc).replace(tzinfo=None, hour=12, minute=0, second=0, microsecond=0)
+    logs = [
+        RoutingLog(query=f"q{i}", route="local", confidence=0.5, domain="math", response_text=f"answer {i}",
+                   created_at=noon - timedelta(days=days, hours=i))
+        for i, days in enumerate([40, 40, 35, 1])
+    ]
+    # Compressed and plain responses both come back as response_text
+    monkeypatch.setattr(get_settings(), "compress_response_text", True)
+    async with get_db() as db:
+        await write_logs(db, logs[:2])
+    monkeypatch.setattr(get_settings(), "compress_response_text", False)
+    async with get_db() as db:
+        await write_logs(db, logs[2:])
+    return logs
+
+
+async def live_queries() -> list[str]:
+    async with get_db() as db:
+        return list(await db.scalars(select(RoutingLog.query).order_by(RoutingLog.id)))
+
+
+async def test_archived_rows_round_trip(database, archive_dir, monkeypatch):
+    logs = await insert_logs(monkeypatch)
+    assert await archive_logs(retention_cutoff(30), batch_size=2) == 3
+    assert await live_queries() == ["q3"]
+    assert has_archive()
+
+    records = list(iter_archive())
+    assert [r["query"] for r in records] == ["q1", "q0", "q2"]  # oldest partition first
+    assert [r["response_text"] for r in records] == ["answer 1", "answer 0", "answer 2"]
+    assert records[0]["created_at"] == logs[1].created_at.isoformat()
+    assert "response_zstd" not in records[0]
+
+    since = logs[2].created_at - timedelta(days=1)
+    assert [r["query"] for r in iter_archive(since=since)] == ["q2"]
+    assert [r["query"] for r in iter_archive(until=since)] == ["q1", "q0"]
+
+
+async def test_rerun_after_crash_rewrites_the_same_part(database, archive_dir, monkeypatch):
+    await insert_logs(monkeypatch)
+
+    def crash(*args):
+        raise RuntimeError("killed before the delete")
+
+    # The part files are written, then the process dies before the rows are deleted
+    monkeypatch.setattr(archive, "delete", crash)
+    with pytest.raises(RuntimeError):
+        await archive_logs(retention_cutoff(30))
+    parts = sorted(archive_dir.glob("date=*/*.jsonl.zst"))
+    assert len(parts) == 2
+    assert len(await live_queries()) == 4
+
+    monkeypatch.setattr(archive, "delete", delete)
+    assert await archive_logs(retention_cutoff(30)) == 3
+    assert sorted(archive_dir.glob("date=*/*")) == parts
+    assert sorted(r["query"] for r in iter_archive()) == ["q0", "q1", "q2"]
+    async with get_db() as db:
+        assert await db.scalar(select(func.count()).select_from(RoutingLog)) == 1
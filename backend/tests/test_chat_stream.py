@@ -0,0 +1,128 @@
+"""Client disconnects during /api/chat/stream."""
+import json
+import time
+import asyncio
+import httpx
+import pytest
+
+pytest.importorskip("torch")  # routers.chat imports the router model
+
+from fastapi import FastAPI
+from openai import AsyncOpenAI
+from sse_starlette.sse import AppStatus
+from routers import chat
+from schemas.api import Route, RoutingDecision
+from services.ollama_client import OllamaClient
+from services.openai_client import OpenAIClient
+
+CHUNK_INTERVAL_S = 0.01
+CLOSE_WITHIN_S = 0.2
+
+
+@pytest.fixture(autouse=True)
+def sse_exit_event():
+    # sse-starlette keeps one exit event, bound to the first test's event loop
+    AppStatus.should_exit_event = None
+
+
+class EndlessBody(httpx.AsyncByteStream):
+    """An upstream that never finishes decoding: one chunk every CHUNK_INTERVAL_S until closed."""
+
+    def __init__(self, chunk: bytes):
+        self.chunk = chunk
+        self.sent = 0
+        self.closed_at: float | None = None
+
+    async def __aiter__(self):
+        while self.closed_at is None:
+            await asyncio.sleep(CHUNK_INTERVAL_S)
+            self.sent += 1
+            yield self.chunk
+
+    async def aclose(self):
+        self.closed_at = time.perf_counter()
+
+
+def ollama_upstream() -> tuple[OllamaClient, EndlessBody]:
+    body = EndlessBody(json.dumps({"message": {"content": "tok "}, "done": False}).encode() + b"\n")
+    client = OllamaClient()
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=body)))
+    return client, body
+
+
+def openai_upstream() -> tuple[OpenAIClient, EndlessBody]:
+    delta = {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "m",
+             "choices": [{"index": 0, "delta": {"content": "tok "}, "finish_reason": None}]}
+    body = EndlessBody(f"data: {json.dumps(delta)}\n\n".encode())
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=body)
+    )
+    client = OpenAIClient()
+    client.client = AsyncOpenAI(
+        api_key="test", base_url="http://upstream.test/v1", http_client=httpx.AsyncClient(transport=transport)
+    )
+    return client, body
+
+
+class FixedRouter:
+    def __init__(self, route: Route):
+        self.route = route
+
+    def predict(self, query: str, threshold: float | None = None) -> RoutingDecision:
+        return RoutingDecision(route=self.route, confidence=0.9, features={"domain": "general"}, router_latency_ms=1.0)
+
+
+async def stream_then_disconnect(app: FastAPI, message: str, tokens: int) -> float:
+    """POST /api/chat/stream, stall and disconnect after `tokens` token events; returns the disconnect time."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream", "root_path": "",
+        "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "server": ("test", 80), "client": ("test", 1234),
+    }
+    request = {"type": "http.request", "body": json.dumps({"message": message}).encode(), "more_body": False}
+    disconnect = asyncio.Event()
+    received = 0
+    disconnected_at = None
+
+    async def receive():
+        nonlocal request
+        if request is not None:
+            message, request = request, None
+            return message
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal received, disconnected_at
+        if message["type"] == "http.response.body" and b"event: token" in message.get("body", b""):
+            received += 1
+            if received == tokens:
+                # A client that stops reading, then goes away: the generator is
+                # left suspended at a yield rather than awaiting the upstream
+                disconnected_at = time.perf_counter()
+                disconnect.set()
+                await asyncio.Event().wait()
+
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    assert disconnected_at is not None, f"only {received} token events before the response ended"
+    return disconnected_at
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("route, upstream", [(Route.LOCAL, ollama_upstream), (Route.CLOUD, openai_upstream)])
+async def test_disconnect_closes_upstream_stream(monkeypatch, route, upstream):
+    client, body = upstream()
+    monkeypatch.setattr(chat, "get_router", lambda: FixedRouter(route))
+    monkeypatch.setattr(chat, "get_ollama" if route == Route.LOCAL else "get_openai", lambda: client)
+    app = FastAPI()
+    app.include_router(chat.router)
+
+    disconnected_at = await stream_then_disconnect(app, "Explain quicksort", tokens=3)
+
+    assert body.closed_at is not None, "upstream stream was never closed"
+    assert body.closed_at - disconnected_at < CLOSE_WITHIN_S
+    # Nothing decoded after the close
+    sent = body.sent
+    await asyncio.sleep(5 * CHUNK_INTERVAL_S)
+    assert body.sent == sent
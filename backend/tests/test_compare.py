@@ -0,0 +1,121 @@
+"""Compare mode: per-side scoring, the verdict, and unusable judge replies."""
+import asyncio
+import json
+import httpx
+import pytest
+
+pytest.importorskip("torch")  # routers.compare imports the router model
+
+from fastapi import FastAPI
+from sse_starlette.sse import AppStatus
+from routers import compare
+from schemas.api import Route, RoutingDecision
+from services.judge import JudgeParseError
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeBackend:
+    def __init__(self, text: str, delay_s: float = 0.0):
+        self.text = text
+        self.delay_s = delay_s
+
+    async def generate(self, prompt: str) -> dict:
+        return {"text": self.text, "latency_ms": 10.0, "input_tokens": 5, "output_tokens": 3}
+
+    async def stream(self, prompt: str):
+        for word in self.text.split():
+            await asyncio.sleep(self.delay_s)
+            yield word + " "
+
+
+class UnparseableJudge:
+    async def compare(self, *args, **kwargs):
+        raise JudgeParseError("No JSON object in judge reply: 'I think A'")
+
+    async def score_with_reasoning(self, *args, **kwargs):
+        raise JudgeParseError("No JSON object in judge reply: 'Good'")
+
+
+class ScoringJudge:
+    async def compare(self, query, response_a, response_b, reasoning=True):
+        return {"score_a": 1.0, "score_b": 2.0, "verdict": "B", "swapped": False}
+
+    async def score(self, query, response, mode=None):
+        return 9.0 if response.startswith("local") else 7.0
+
+    async def score_with_reasoning(self, query, response):
+        return {"score": await self.score(query, response), "reasoning": f"Judged {response.split()[0]}."}
+
+
+class FixedRouter:
+    def predict(self, query: str, threshold: float | None = None) -> RoutingDecision:
+        return RoutingDecision(route=Route.LOCAL, confidence=0.9, features={"domain": "general"}, router_latency_ms=1.0)
+
+
+async def read_events(client, **body) -> list[tuple[str, dict]]:
+    events = []
+    async with client.stream("POST", "/api/compare/stream", json={"message": "What is 2+2?", **body}) as response:
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+            elif line.startswith("data:"):
+                events.append((event, json.loads(line.split(":", 1)[1])))
+    return events
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    AppStatus.should_exit_event = None  # sse-starlette binds it to the first test's event loop
+    monkeypatch.setattr(compare, "get_router", FixedRouter)
+    monkeypatch.setattr(compare, "get_ollama", lambda: FakeBackend("local answer"))
+    monkeypatch.setattr(compare, "get_openai", lambda: FakeBackend("cloud answer"))
+    monkeypatch.setattr(compare, "Judge", UnparseableJudge)
+    app = FastAPI()
+    app.include_router(compare.router)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_compare_returns_responses_unscored(client):
+    response = await client.post("/api/compare", json={"message": "What is 2+2?"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["local_response"], body["cloud_response"]) == ("local answer", "cloud answer")
+    assert body["local_score"] is None and body["cloud_score"] is None
+    assert body["judge_verdict"] is None
+
+
+async def test_compare_stream_reports_judge_error(client):
+    events = await read_events(client)
+
+    assert ("error", {"side": "local", "detail": "No JSON object in judge reply: 'Good'"}) in events
+    assert ("error", {"side": "judge", "detail": "No JSON object in judge reply: 'I think A'"}) in events
+    name, done = events[-1]
+    assert name == "done"
+    assert done["local_response"] == "local answer "
+    assert done["local_score"] is None and done["cloud_score"] is None
+    assert done["judge_verdict"] is None
+
+
+async def test_compare_stream_scores_each_side_when_it_finishes(client, monkeypatch):
+    monkeypatch.setattr(compare, "Judge", ScoringJudge)
+    monkeypatch.setattr(compare, "get_openai", lambda: FakeBackend("cloud answer is slower", delay_s=0.05))
+    events = await read_events(client, include_reasoning=True)
+    names = [(name, data.get("side")) for name, data in events]
+
+    # The faster side's score does not wait for the slower side
+    assert names.index(("score", "local")) < names.index(("generation_done", "cloud"))
+    assert ("score", {"side": "local", "score": 9.0}) in events
+    assert ("verdict", {"verdict": "cloud"}) in events
+    name, done = events[-1]
+    assert (done["local_score"], done["cloud_score"]) == (9.0, 7.0)
+    assert done["judge_verdict"] == "cloud"
+    assert done["judge_reasoning"] == "Local model: Judged local.\n\nCloud model: Judged cloud."
+
+
+def test_side_reasoning_names_the_models():
+    text = compare.side_reasoning("Response A is concise, but response B is correct.")
+    assert text == "the local model is concise, but the cloud model is correct."
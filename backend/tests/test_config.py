@@ -0,0 +1,16 @@
+"""Settings validation for the SQLite connection profile."""
+import pytest
+from pydantic import ValidationError
+from config import Settings
+
+
+def test_default_profile_keeps_sqlite_defaults(monkeypatch):
+    monkeypatch.delenv("SQLITE_PROFILE", raising=False)
+    assert Settings().sqlite_profile == "default"
+
+
+@pytest.mark.parametrize("name, value", [("SQLITE_PROFILE", "fast"), ("SQLITE_SYNCHRONOUS", "normal; DROP")])
+def test_unknown_sqlite_settings_are_rejected(monkeypatch, name, value):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ValidationError):
+        Settings()
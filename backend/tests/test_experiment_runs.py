@@ -0,0 +1,44 @@
+"""Experiment run ownership across backend restarts."""
+import os
+import subprocess
+import sys
+import pytest
+from config import get_settings
+from services.experiment_runs import create_run, get_run, reconcile_runs, update_run
+
+pytestmark = pytest.mark.anyio
+
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def instance(monkeypatch):
+    monkeypatch.setattr(get_settings(), "instance_id", "backend-1")
+    return "backend-1"
+
+
+async def test_recreated_container_reconciles_its_runs(database, instance):
+    # Left behind by the previous container of this instance (another hostname, a pid that is gone)
+    pid = dead_pid()
+    queued = await create_run("e1_baselines", {})
+    running = await create_run("e4_evaluation", {})
+    await update_run(queued.id, owner=f"{instance}:{pid}")
+    await update_run(running.id, owner=f"{instance}:{pid}", status="running")
+
+    adopted = await reconcile_runs()
+
+    assert [run.id for run in adopted] == [queued.id]
+    assert (await get_run(queued.id)).owner == f"{instance}:{os.getpid()}"
+    assert (await get_run(running.id)).status == "failed"
+
+
+async def test_other_instances_runs_are_left_alone(database, instance):
+    run = await create_run("e1_baselines", {})
+    await update_run(run.id, owner=f"backend-2:{dead_pid()}", status="running")
+
+    assert await reconcile_runs() == []
+    assert (await get_run(run.id)).status == "running"
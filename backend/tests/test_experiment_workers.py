@@ -0,0 +1,83 @@
+"""Experiment runs in warm worker processes (EXPERIMENT_RUNNER=worker)."""
+import ast
+import json
+import pytest
+from conftest import PROJECT_ROOT
+from routers.experiments import (
+    EXPERIMENT_ENTRYPOINTS, EXPERIMENT_SCRIPTS, ExperimentConfig, _worker_options,
+)
+from services import experiment_workers
+from services.experiment_workers import ExperimentWorkerError, ExperimentWorkerPool
+
+
+def _entry_function(script: str, name: str) -> ast.FunctionDef | ast.AsyncFunctionDef:
+    # Parsed rather than imported: most scripts need torch or sklearn
+    tree = ast.parse((PROJECT_ROOT / script).read_text())
+    return next(
+        node for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name
+    )
+
+
+@pytest.mark.parametrize("experiment_id", sorted(EXPERIMENT_SCRIPTS))
+def test_entry_function_runs_with_config_options_only(experiment_id):
+    # A worker passes only the config overrides and on_progress; every other
+    # parameter needs a default (the script's command-line default)
+    entry = _entry_function(EXPERIMENT_SCRIPTS[experiment_id], EXPERIMENT_ENTRYPOINTS[experiment_id])
+    args = entry.args.posonlyargs + entry.args.args
+    required = {arg.arg for arg in args[:len(args) - len(entry.args.defaults)]}
+    required |= {arg.arg for arg, default in zip(entry.args.kwonlyargs, entry.args.kw_defaults) if default is None}
+    assert not required
+
+
+@pytest.fixture
+def project_root(tmp_path, monkeypatch):
+    """A project root with the real scripts and an empty data/ directory, as the workers' working directory."""
+    for name in ("scripts", "utils", "backend"):
+        (tmp_path / name).symlink_to(PROJECT_ROOT / name)
+    monkeypatch.setattr(experiment_workers, "PROJECT_ROOT", tmp_path)
+    return tmp_path
+
+
+async def _run(pool: ExperimentWorkerPool, experiment_id: str, config: ExperimentConfig) -> list[tuple]:
+    messages = []
+    async for message in pool.run(
+        EXPERIMENT_SCRIPTS[experiment_id], EXPERIMENT_ENTRYPOINTS[experiment_id], _worker_options(config)
+    ):
+        messages.append(message)
+    return messages
+
+
+@pytest.mark.anyio
+async def test_label_data_runs_in_worker_with_cli_defaults(project_root):
+    # Every query already labelled: main() resumes from the output and returns without calling a model
+    queries = [{"instruction": f"Question {i}?"} for i in range(3)]
+    for path, rows in (
+        ("data/raw/mixinstruct_5k.jsonl", queries),
+        ("data/labeled/train_5k.jsonl", [{"query": q["instruction"], "label": 1} for q in queries]),
+    ):
+        (project_root / path).parent.mkdir(parents=True, exist_ok=True)
+        (project_root / path).write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    pool = ExperimentWorkerPool(size=1, grace_s=5)
+    try:
+        logs = [m[1] for m in await _run(pool, "e3_label_data", ExperimentConfig(limit=2))]
+        assert "Total queries: 2" in logs
+        assert "All queries already processed. Nothing to do." in logs
+
+        # The same warm worker takes the next run
+        worker = next(iter(pool._idle))
+        await _run(pool, "e3_label_data", ExperimentConfig())
+        assert pool._idle == [worker]
+    finally:
+        pool.close()
+
+
+@pytest.mark.anyio
+async def test_worker_reports_entry_function_errors(project_root):
+    pool = ExperimentWorkerPool(size=1, grace_s=5)
+    try:
+        with pytest.raises(ExperimentWorkerError, match="FileNotFoundError"):
+            await _run(pool, "e3_label_data", ExperimentConfig())  # no data/raw input
+    finally:
+        pool.close()
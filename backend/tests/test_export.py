@@ -0,0 +1,37 @@
+"""Export serializers agree on every column, including sub-second timestamps."""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+import pytest
+from db.export import to_arrow, to_csv, to_ndjson
+
+pytestmark = pytest.mark.anyio
+
+# Naive UTC as read back from routing_logs (PostgreSQL keeps microseconds)
+CREATED_AT = datetime(2026, 3, 14, 15, 9, 26, 535897)
+
+
+async def chunks():
+    # A fresh record for each serializer: to_ndjson formats created_at in place
+    yield [{
+        "id": 7, "created_at": CREATED_AT, "query": "q", "route": "local", "confidence": 0.8, "domain": None,
+        "features": {"length": 1}, "latency_ms": 12.5, "router_latency_ms": 3.0, "input_tokens": 4,
+        "output_tokens": 9, "cost_usd": 0.0, "cloud_cost_usd": 0.001, "savings_usd": 0.001, "judge_score": None,
+    }]
+
+
+async def collect(serializer) -> bytes:
+    return b"".join([part async for part in serializer(chunks())])
+
+
+async def test_formats_keep_microseconds():
+    ndjson = json.loads(await collect(to_ndjson))
+    assert datetime.fromisoformat(ndjson["created_at"]) == CREATED_AT
+
+    row = next(csv.DictReader(io.StringIO((await collect(to_csv)).decode())))
+    assert datetime.fromisoformat(row["created_at"]) == CREATED_AT
+
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(await collect(to_arrow)).read_all()
+    assert table.column("created_at").to_pylist() == [CREATED_AT.replace(tzinfo=timezone.utc)]
@@ -0,0 +1,55 @@
+"""Judge reply parsing: a reply without a usable score raises, in every mode."""
+import pytest
+from pydantic import ValidationError
+from config import Settings
+from services.judge import Judge, JudgeParseError, parse_compare_json, parse_score_json, parse_verbose_score
+
+
+def test_parse_verbose_score():
+    score, reasoning = parse_verbose_score("Clear and correct.\nMinor omissions.\nScore: 8")
+    assert score == 8.0
+    assert reasoning == "Clear and correct.\nMinor omissions."
+
+
+@pytest.mark.parametrize("reply", ["Looks good overall.", "Score: high", "Score: 11", "", None])
+def test_parse_verbose_score_rejects_unusable_replies(reply):
+    with pytest.raises(JudgeParseError):
+        parse_verbose_score(reply)
+
+
+def test_parse_score_json_tolerates_fences():
+    assert parse_score_json('```json\n{"score": 7}\n```') == 7.0
+
+
+def test_parse_compare_json():
+    assert parse_compare_json('{"score_a": 6, "score_b": 9, "verdict": "b"}') == {
+        "score_a": 6.0, "score_b": 9.0, "verdict": "B",
+    }
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("mode", ["verbose", "score_only"])
+async def test_unparseable_reply_raises_and_is_not_cached(monkeypatch, mode):
+    judge = Judge(use_cache=True, mode=mode)
+
+    async def complete(prompt, method, ticket=None, **params):
+        return "I would rate this response fairly highly."
+
+    monkeypatch.setattr(judge, "_complete", complete)
+    query, response = f"Unparseable {mode}?", "Some answer."
+    with pytest.raises(JudgeParseError):
+        await judge.score(query, response)
+
+    async def complete_ok(prompt, method, ticket=None, **params):
+        return '{"score": 6}' if mode == "score_only" else "Fine.\nScore: 6"
+
+    monkeypatch.setattr(judge, "_complete", complete_ok)
+    assert await judge.score(query, response) == 6.0
+
+
+def test_judge_mode_setting_is_validated(monkeypatch):
+    monkeypatch.setenv("JUDGE_MODE", "score-only")
+    with pytest.raises(ValidationError):
+        Settings()
+    monkeypatch.setenv("JUDGE_MODE", "score_only")
+    assert Settings().judge_mode == "score_only"
@@ -0,0 +1,70 @@
+"""Latency sketches: merging and persistence across replicas."""
+import asyncio
+import pytest
+from sqlalchemy import select
+from db.database import get_db
+from db.models import LatencySketch
+from services.latency_sketch import ALL_TIME, DDSketch, LatencySketchStore
+
+pytestmark = pytest.mark.anyio
+
+NOW = 1_767_225_600.0  # 2026-01-01 00:00 UTC
+
+
+async def stored_counts() -> dict[tuple, int]:
+    async with get_db() as db:
+        rows = (await db.execute(select(LatencySketch))).scalars()
+        return {(row.resolution, row.metric, row.route, row.domain): row.sketch["count"] for row in rows}
+
+
+def test_ddsketch_quantiles_within_relative_accuracy():
+    sketch = DDSketch(0.01)
+    for value in range(1, 1001):
+        sketch.add(float(value))
+    for q in (0.5, 0.9, 0.99):
+        exact = 1 + q * 999
+        assert abs(sketch.quantile(q) - exact) <= 0.01 * exact + 1
+
+
+async def test_replica_snapshots_add_up(database):
+    replicas = [LatencySketchStore(), LatencySketchStore()]
+    for i, store in enumerate(replicas):
+        for value in range(100):
+            store.record("local", "math", now=NOW, latency_ms=100.0 + value + 1000 * i)
+
+    await asyncio.gather(*(store.snapshot() for store in replicas))
+
+    assert (await stored_counts())[(ALL_TIME, "latency_ms", "local", "math")] == 200
+    # Whichever replica merged second now also sees the first one's samples
+    views = sorted(store.merged()[("latency_ms", "local", "math")].count for store in replicas)
+    assert views == [100, 200]
+
+
+async def test_repeated_snapshots_write_only_new_samples(database):
+    store = LatencySketchStore()
+    store.record("cloud", "coding", now=NOW, router_latency_ms=3.0)
+    await store.snapshot()
+    await store.snapshot()  # nothing new
+    store.record("cloud", "coding", now=NOW, router_latency_ms=5.0)
+    await store.snapshot()
+
+    assert (await stored_counts())[(ALL_TIME, "router_latency_ms", "cloud", "coding")] == 2
+
+
+async def test_restart_restores_merged_sketches(database):
+    first, second = LatencySketchStore(), LatencySketchStore()
+    for value in (10.0, 20.0, 30.0):
+        first.record("local", "", now=NOW, ttft_ms=value)
+    second.record("local", "", now=NOW, ttft_ms=40.0)
+    await first.snapshot()
+    await second.snapshot()
+
+    restarted = LatencySketchStore()
+    await restarted.load()
+    restarted.record("local", "", now=NOW, ttft_ms=50.0)
+    await restarted.snapshot()
+
+    sketch = restarted.merged()[("ttft_ms", "local", "")]
+    assert sketch.count == 5
+    assert sketch.max == 50.0
+    assert (await stored_counts())[(ALL_TIME, "ttft_ms", "local", "")] == 5
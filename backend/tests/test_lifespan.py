@@ -0,0 +1,29 @@
+"""App startup and shutdown (main.lifespan)."""
+import sys
+import subprocess
+import pytest
+from conftest import BACKEND_DIR, backend_env
+
+pytest.importorskip("torch")  # main imports the router model
+
+LIFESPAN = """
+import asyncio
+from main import app, lifespan
+
+async def main():
+    async with lifespan(app):
+        pass
+
+asyncio.run(main())
+"""
+
+
+@pytest.mark.parametrize("profile", ["tuned", "default"])
+def test_lifespan_exits_after_shutdown(tmp_path, profile):
+    # In its own process: the engine is built from the environment at import,
+    # and a connection thread left behind by shutdown keeps the process alive
+    env = backend_env(SQLITE_PROFILE=profile, DATABASE_URL=f"sqlite+aiosqlite:///{tmp_path}/routing_logs.db")
+    result = subprocess.run(
+        [sys.executable, "-c", LIFESPAN], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
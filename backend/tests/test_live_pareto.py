@@ -0,0 +1,36 @@
+"""Incremental folding of routing_logs into the live Pareto histograms."""
+from datetime import datetime, timezone
+import pytest
+from db.database import get_db
+from db.models import RoutingLog
+from services.live_pareto import LiveParetoStore
+
+pytestmark = pytest.mark.anyio
+
+
+async def insert(*ids: int):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    async with get_db() as db:
+        for i in ids:
+            db.add(RoutingLog(id=i, query=f"q{i}", route="local", confidence=0.5, cloud_cost_usd=0.01, created_at=now))
+        await db.commit()
+
+
+def counted(store: LiveParetoStore) -> int:
+    return int(store.histogram(1)[0].sum())
+
+
+async def test_late_committed_rows_are_counted_once(database):
+    store = LiveParetoStore()
+    await insert(1, 2, 4, 5)
+    await store.refresh()
+    assert counted(store) == 4
+
+    # id 3 was taken before id 4 but committed after the last refresh
+    await insert(3)
+    await store.refresh()
+    assert counted(store) == 5
+    assert store.last_id == 5
+
+    await store.refresh()
+    assert counted(store) == 5
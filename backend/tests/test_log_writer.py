@@ -0,0 +1,70 @@
+"""metrics_rollup maintenance: incremental updates, rebuild and retention."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import func, select
+from db.database import get_db
+from db.log_writer import prune_rollup, rebuild_rollup, write_log, write_logs
+from db.models import MetricsRollup, RoutingLog
+from routers.metrics import WINDOWS, metrics_summary
+
+pytestmark = pytest.mark.anyio
+
+
+def make_log(age: timedelta, route: str = "local", domain: str | None = "coding") -> RoutingLog:
+    return RoutingLog(
+        query="q", route=route, confidence=0.8, domain=domain, latency_ms=100.0, router_latency_ms=5.0,
+        cost_usd=0.0 if route == "local" else 0.002, cloud_cost_usd=0.002,
+        savings_usd=0.002 if route == "local" else 0.0,
+        created_at=datetime.now(timezone.utc).replace(tzinfo=None) - age,
+    )
+
+
+async def rollup_counts() -> dict[str, int]:
+    async with get_db() as db:
+        rows = await db.execute(
+            select(MetricsRollup.resolution, func.sum(MetricsRollup.count)).group_by(MetricsRollup.resolution)
+        )
+        return dict(rows.all())
+
+
+async def totals() -> dict:
+    """The /api/metrics totals for all time and every window."""
+    out = {}
+    for window in (None, *WINDOWS):
+        summary = await metrics_summary(window=window)
+        out[window] = {k: v for k, v in summary.items() if k not in ("latency_percentiles", "recent_history")}
+    return out
+
+
+async def test_written_rollup_matches_rebuild(database):
+    ages = [timedelta(0), timedelta(minutes=30), timedelta(hours=5), timedelta(days=3), timedelta(days=20)]
+    async with get_db() as db:
+        for i, age in enumerate(ages):
+            await write_log(db, make_log(age, route="cloud" if i % 2 else "local"))
+    async with get_db() as db:
+        logs = [
+            make_log(age, route=route, domain=domain)
+            for age in ages
+            for route in ("local", "cloud")
+            for domain in ("coding", "math", None)
+        ]
+        logs[0].latency_ms = logs[1].router_latency_ms = None
+        await write_logs(db, logs)
+
+    written = await totals()
+    assert written[None]["total_queries"] == 35
+    assert written["hour"]["total_queries"] == 14
+    async with database.begin() as conn:
+        await rebuild_rollup(conn)
+    assert await totals() == written
+
+
+async def test_prune_drops_expired_buckets_and_keeps_all_time(database):
+    async with get_db() as db:
+        for age in (timedelta(0), timedelta(hours=3), timedelta(days=10)):
+            await write_log(db, make_log(age))
+    assert await rollup_counts() == {"minute": 3, "hour": 3, "all": 3}
+
+    async with get_db() as db:
+        assert await prune_rollup(db) == 3  # 2 minute buckets, 1 hour bucket
+    assert await rollup_counts() == {"minute": 1, "hour": 2, "all": 3}
@@ -0,0 +1,58 @@
+"""/api/metrics/stream: snapshot plus deltas count every log exactly once."""
+import json
+import pytest
+import routers.metrics as metrics
+from db.database import get_db
+from db.log_writer import write_log
+from db.models import RoutingLog
+from services import metrics_broadcaster, response_cache
+from services.metrics_broadcaster import get_metrics_broadcaster
+from services.response_cache import get_metrics_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def fresh_singletons(monkeypatch):
+    monkeypatch.setattr(response_cache, "_metrics_cache", None)
+    monkeypatch.setattr(metrics_broadcaster, "_broadcaster", None)
+    monkeypatch.setattr(metrics.get_settings(), "metrics_stream_coalesce_ms", 0)
+
+
+async def log_request(query: str) -> RoutingLog:
+    """What /api/chat does after answering."""
+    log = RoutingLog(query=query, route="local", confidence=0.9, cost_usd=0.0, savings_usd=0.01)
+    async with get_db() as db:
+        await write_log(db, log)
+    get_metrics_cache().invalidate()
+    get_metrics_broadcaster().publish(log)
+    return log
+
+
+async def test_logs_around_the_snapshot_are_counted_once(database, monkeypatch):
+    # A dashboard poll caches the metrics, then a log lands before the stream subscribes
+    await get_metrics_cache().get((10, 0, None), lambda: metrics.metrics_summary(10, 0, None))
+    await log_request("before subscribe")
+
+    summary = metrics.metrics_summary
+
+    async def publish_during_snapshot(*args):
+        await log_request("during snapshot")
+        return await summary(*args)
+
+    monkeypatch.setattr(metrics, "metrics_summary", publish_during_snapshot)
+    response = await metrics.stream_metrics(limit=10)
+    events = response.body_iterator
+    try:
+        snapshot = await anext(events)
+        assert snapshot["event"] == "snapshot"
+        await log_request("after snapshot")
+        delta = await anext(events)
+        assert delta["event"] == "delta"
+    finally:
+        await events.aclose()
+
+    snapshot, delta = json.loads(snapshot["data"]), json.loads(delta["data"])
+    assert snapshot["total_queries"] == 2
+    assert delta["total_queries"] == 1
+    assert [row["query"] for row in delta["recent_history"]] == ["after snapshot"]
@@ -0,0 +1,104 @@
+"""ResponseCache freshness, single flight and ETag revalidation."""
+import asyncio
+import json
+import pytest
+from routers.metrics import get_metrics
+from services import response_cache
+from services.response_cache import ResponseCache, etag_response
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def counter():
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        return {"n": len(calls)}
+
+    return compute, calls
+
+
+async def test_invalidated_entry_is_kept_for_min_age(clock):
+    cache = ResponseCache(ttl_s=10.0, min_age_s=1.0)
+    compute, calls = counter()
+    first = await cache.get("k", compute)
+    cache.invalidate()
+
+    clock.now += 0.5
+    assert await cache.get("k", compute) is first
+    clock.now += 0.6
+    assert json.loads((await cache.get("k", compute)).body) == {"n": 2}
+    assert len(calls) == 2
+
+
+async def test_entry_expires_after_ttl(clock):
+    cache = ResponseCache(ttl_s=10.0, min_age_s=1.0)
+    compute, calls = counter()
+    await cache.get("k", compute)
+    clock.now += 9.9
+    await cache.get("k", compute)
+    assert len(calls) == 1
+    clock.now += 0.2
+    await cache.get("k", compute)
+    assert len(calls) == 2
+
+
+async def test_concurrent_misses_share_one_compute():
+    cache = ResponseCache(ttl_s=10.0)
+    release = asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        await release.wait()
+        return {"ok": True}
+
+    waiters = [asyncio.create_task(cache.get("k", compute)) for _ in range(5)]
+    await asyncio.sleep(0)
+    # One client going away does not cancel the computation for the rest
+    waiters[0].cancel()
+    release.set()
+    entries = await asyncio.gather(*waiters[1:])
+    assert len(calls) == 1
+    assert all(entry is entries[0] for entry in entries)
+    assert await cache.get("k", compute) is entries[0]
+
+
+def test_if_none_match_gets_304():
+    entry = response_cache.CachedResponse(body=b'{"a":1}', etag='"abc"', created=0.0, generation=0)
+    assert etag_response(entry, None).status_code == 200
+    assert etag_response(entry, '"other"').status_code == 200
+
+    for header in ('"abc"', 'W/"abc"', '"other", "abc"', "*"):
+        response = etag_response(entry, header)
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["etag"] == '"abc"'
+
+    response = etag_response(entry, None)
+    assert response.body == b'{"a":1}'
+    assert response.headers["cache-control"] == "no-cache"
+
+
+async def test_metrics_poll_revalidates(database, monkeypatch):
+    monkeypatch.setattr(response_cache, "_metrics_cache", None)
+    first = await get_metrics(limit=10, offset=0, window=None, if_none_match=None)
+    assert first.status_code == 200
+    again = await get_metrics(limit=10, offset=0, window=None, if_none_match=first.headers["etag"])
+    assert again.status_code == 304
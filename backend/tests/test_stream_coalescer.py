@@ -0,0 +1,65 @@
+"""Frame coalescing for /api/chat/stream."""
+import asyncio
+import time
+import pytest
+from services.stream_coalescer import coalesce_chunks
+
+pytestmark = pytest.mark.anyio
+
+
+async def timed_frames(frames) -> list[tuple[float, list[str]]]:
+    start = time.perf_counter()
+    return [(time.perf_counter() - start, frame) async for frame in frames]
+
+
+async def upstream(chunks: list[str], delay_s: float = 0.0, pulled: list[str] | None = None):
+    for chunk in chunks:
+        await asyncio.sleep(delay_s)
+        if pulled is not None:
+            pulled.append(chunk)
+        yield chunk
+
+
+async def test_first_chunk_is_sent_alone_then_frames_flush_on_time():
+    frames = await timed_frames(coalesce_chunks(upstream(["a", "b", "c", "d", "e"], 0.02), 50, 1024))
+
+    assert frames[0][1] == ["a"]
+    assert frames[0][0] < 0.04  # not held for the interval
+    assert [chunk for _, frame in frames for chunk in frame] == ["a", "b", "c", "d", "e"]
+    assert len(frames) < 5  # chunks 20 ms apart share 50 ms frames
+    assert max(len(frame) for _, frame in frames[1:]) >= 2
+
+
+async def test_frame_flushes_at_max_bytes_without_waiting():
+    frames = await timed_frames(coalesce_chunks(upstream(["a", "bb", "cc", "dd", "e"]), 10_000, 4))
+
+    assert [frame for _, frame in frames] == [["a"], ["bb", "cc"], ["dd", "e"]]
+    assert frames[1][0] < 1.0  # size, not the 10 s interval, flushed it
+
+
+async def test_upstream_error_is_raised_after_buffered_chunks():
+    async def failing():
+        yield "a"
+        yield "b"
+        raise ConnectionError("backend went away")
+
+    received = []
+    with pytest.raises(ConnectionError, match="backend went away"):
+        async for frame in coalesce_chunks(failing(), 10_000, 1024):
+            received.extend(frame)
+    assert received == ["a", "b"]
+
+
+async def test_slow_consumer_stops_reading_upstream():
+    pulled: list[str] = []
+    frames = coalesce_chunks(upstream([f"chunk{i:03d}" for i in range(1000)], pulled=pulled), 10_000, 64)
+    try:
+        assert await anext(frames) == ["chunk000"]
+        # The client stops reading: the producer fills one frame and waits
+        await asyncio.sleep(0.05)
+        assert len(pulled) <= 10
+        frame = await anext(frames)
+        assert sum(len(chunk) for chunk in frame) >= 64
+    finally:
+        await frames.aclose()
+    assert len(pulled) < 1000
@@ -94,7 +94,7 @@ export default function ComparePage() {
                   score={result.local_score}
                   latencyMs={result.local_latency_ms}
                   tokens={result.local_tokens}
-                  isWinner={result.local_score >= result.cloud_score}
+                  isWinner={(result.local_score ?? 0) >= (result.cloud_score ?? 0)}
                 />
                 <ComparePanel
                   type="cloud"
@@ -102,7 +102,7 @@ export default function ComparePage() {
                   score={result.cloud_score}
                   latencyMs={result.cloud_latency_ms}
                   tokens={result.cloud_tokens}
-                  isWinner={result.cloud_score > result.local_score}
+                  isWinner={(result.cloud_score ?? 0) > (result.local_score ?? 0)}
                 />
               </div>
 
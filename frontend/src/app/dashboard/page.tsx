@@ -50,7 +50,7 @@ export default function DashboardPage() {
       <div className="flex items-center justify-between">
         <h1 className="text-2xl font-semibold">Dashboard</h1>
         <span className="text-sm text-[var(--muted-foreground)]">
-          Auto-refreshing every 5s
+          Live
         </span>
       </div>
 
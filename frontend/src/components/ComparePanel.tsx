@@ -6,7 +6,7 @@ import { formatLatency, formatCost } from "@/lib/utils"
 interface ComparePanelProps {
   type: "local" | "cloud"
   response: string
-  score: number
+  score: number | null
   latencyMs: number
   tokens: number
   isWinner?: boolean
@@ -65,13 +65,13 @@ export default function ComparePanel({
         <div className="flex items-center justify-between mb-2">
           <span className="text-sm text-[var(--muted-foreground)]">Judge Score</span>
           <span className={`font-mono font-medium text-lg ${colorClass}`}>
-            {score.toFixed(1)}/10
+            {score === null ? "–" : `${score.toFixed(1)}/10`}
           </span>
         </div>
         <div className="h-2 bg-[var(--border)] rounded-full overflow-hidden">
           <div
             className={`h-full ${bgColorClass} transition-all duration-500`}
-            style={{ width: `${score * 10}%` }}
+            style={{ width: `${(score ?? 0) * 10}%` }}
           />
         </div>
       </div>
@@ -1,7 +1,7 @@
 "use client"
 
 import { useState, type ReactNode } from "react"
-import { Play, ChevronDown, ChevronUp, DollarSign } from "lucide-react"
+import { Play, Square, ChevronDown, ChevronUp, DollarSign } from "lucide-react"
 import type { ExperimentId, ExperimentConfig } from "@/lib/types"
 import { useExperiment } from "@/hooks/useExperiment"
 import StatusBadge from "./StatusBadge"
@@ -31,7 +31,8 @@ export default function ExperimentCard({
   disabledReason,
   renderResults,
 }: ExperimentCardProps) {
-  const { status, progress, results, error, run, isRunning } = useExperiment(id)
+  const { status, progress, results, error, run, cancel, isRunning } =
+    useExperiment(id)
   const [showDetails, setShowDetails] = useState(false)
 
   const handleRun = async () => {
@@ -122,13 +123,23 @@ export default function ExperimentCard({
               </button>
             )}
 
+            {isRunning && (
+              <button
+                onClick={cancel}
+                className="flex items-center gap-1 px-3 py-1.5 rounded border border-[var(--border)] text-sm text-[var(--muted-foreground)] hover:text-white transition-colors"
+              >
+                <Square className="w-3 h-3" />
+                Cancel
+              </button>
+            )}
+
             <button
               onClick={handleRun}
               disabled={isRunning || disabled}
               className="flex items-center gap-1 px-3 py-1.5 rounded bg-[var(--cloud)] text-white text-sm hover:bg-[var(--cloud)]/80 disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
             >
               {isRunning ? (
-                "Running..."
+                status === "queued" ? "Queued..." : "Running..."
               ) : (
                 <>
                   <Play className="w-3 h-3" />
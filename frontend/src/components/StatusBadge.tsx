@@ -1,6 +1,6 @@
 "use client"
 
-import { Check, X, Loader2, Circle } from "lucide-react"
+import { Check, X, Loader2, Circle, Clock, Ban } from "lucide-react"
 import type { ExperimentStatus } from "@/lib/types"
 import { cn } from "@/lib/utils"
 
@@ -16,6 +16,12 @@ const statusConfig = {
     bg: "bg-[var(--muted)]",
     text: "text-[var(--muted-foreground)]",
   },
+  queued: {
+    icon: Clock,
+    label: "Queued",
+    bg: "bg-[var(--muted)]",
+    text: "text-[var(--cloud)]",
+  },
   running: {
     icon: Loader2,
     label: "Running",
@@ -34,6 +40,12 @@ const statusConfig = {
     bg: "bg-[var(--error)]/10",
     text: "text-[var(--error)]",
   },
+  cancelled: {
+    icon: Ban,
+    label: "Cancelled",
+    bg: "bg-[var(--muted)]",
+    text: "text-[var(--muted-foreground)]",
+  },
 }
 
 export default function StatusBadge({ status, className }: StatusBadgeProps) {
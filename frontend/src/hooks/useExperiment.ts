@@ -2,7 +2,7 @@
 
 import { useState, useCallback, useEffect, useRef } from "react"
 import type { ExperimentId, ExperimentState, ExperimentConfig } from "@/lib/types"
-import { runExperiment, getExperimentStatus } from "@/lib/api"
+import { runExperiment, cancelExperiment, getExperimentStatus } from "@/lib/api"
 
 interface UseExperimentReturn {
   status: ExperimentState["status"]
@@ -10,6 +10,7 @@ interface UseExperimentReturn {
   results: ExperimentState["results"]
   error: ExperimentState["error"]
   run: (config?: ExperimentConfig) => Promise<void>
+  cancel: () => Promise<void>
   isRunning: boolean
   startedAt: string | null
   completedAt: string | null
@@ -43,7 +44,7 @@ export function useExperiment(id: ExperimentId): UseExperimentReturn {
         const status = await getExperimentStatus(id)
         setState(status)
 
-        if (status.status === "completed" || status.status === "failed") {
+        if (status.status !== "queued" && status.status !== "running") {
           stopPolling()
         }
       } catch (err) {
@@ -69,6 +70,15 @@ export function useExperiment(id: ExperimentId): UseExperimentReturn {
     [id, startPolling]
   )
 
+  const cancel = useCallback(async () => {
+    try {
+      setState(await cancelExperiment(id))
+      stopPolling()
+    } catch (err) {
+      console.error("Failed to cancel experiment:", err)
+    }
+  }, [id, stopPolling])
+
   // Cleanup on unmount
   useEffect(() => {
     return () => stopPolling()
@@ -79,7 +89,7 @@ export function useExperiment(id: ExperimentId): UseExperimentReturn {
     getExperimentStatus(id)
       .then((status) => {
         setState(status)
-        if (status.status === "running") {
+        if (status.status === "queued" || status.status === "running") {
           startPolling()
         }
       })
@@ -94,7 +104,8 @@ export function useExperiment(id: ExperimentId): UseExperimentReturn {
     results: state.results,
     error: state.error,
     run,
-    isRunning: state.status === "running",
+    cancel,
+    isRunning: state.status === "queued" || state.status === "running",
     startedAt: state.started_at,
     completedAt: state.completed_at,
   }
@@ -36,6 +36,8 @@ export function useExperimentLogs(
         const data = JSON.parse(line)
         if (data.type === "log" && data.message) {
           setLogs((prev) => [...prev.slice(-999), data.message])
+        } else if (data.type === "gap") {
+          setLogs((prev) => [...prev.slice(-999), `... ${data.dropped} lines not shown ...`])
         }
       } catch {
         // If not JSON, add as plain text
@@ -1,8 +1,8 @@
 "use client"
 
 import { useState, useEffect, useCallback } from "react"
-import type { MetricsSummary, ParetoData } from "@/lib/types"
-import { getMetrics, getParetoData } from "@/lib/api"
+import type { MetricsDelta, MetricsSummary, ParetoData } from "@/lib/types"
+import { getMetrics, getParetoData, streamMetrics } from "@/lib/api"
 
 interface UseMetricsReturn {
   metrics: MetricsSummary | null
@@ -12,34 +12,81 @@ interface UseMetricsReturn {
   refresh: () => Promise<void>
 }
 
-export function useMetrics(pollInterval = 5000): UseMetricsReturn {
+function applyDelta(metrics: MetricsSummary, delta: MetricsDelta): MetricsSummary {
+  const domains = { ...metrics.domain_breakdown }
+  for (const [domain, counts] of Object.entries(delta.domain_breakdown)) {
+    const current = domains[domain] ?? { local: 0, cloud: 0 }
+    domains[domain] = {
+      local: current.local + counts.local,
+      cloud: current.cloud + counts.cloud,
+    }
+  }
+  return {
+    ...metrics,
+    total_queries: metrics.total_queries + delta.total_queries,
+    local_count: metrics.local_count + delta.local_count,
+    cloud_count: metrics.cloud_count + delta.cloud_count,
+    total_cost: metrics.total_cost + delta.total_cost,
+    total_saved: metrics.total_saved + delta.total_saved,
+    domain_breakdown: domains,
+    recent_history: [...delta.recent_history, ...metrics.recent_history].slice(
+      0,
+      Math.max(metrics.recent_history.length, delta.recent_history.length)
+    ),
+  }
+}
+
+// Metrics are pushed over SSE (/api/metrics/stream); the Pareto data only
+// changes when an evaluation is re-run, so it is revalidated (ETag) on a timer.
+export function useMetrics(paretoInterval = 60000): UseMetricsReturn {
   const [metrics, setMetrics] = useState<MetricsSummary | null>(null)
   const [pareto, setPareto] = useState<ParetoData | null>(null)
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
 
+  const fetchPareto = useCallback(async () => {
+    setPareto(await getParetoData().catch(() => null)) // Pareto might not be available
+  }, [])
+
   const fetchData = useCallback(async () => {
     try {
-      const [metricsData, paretoData] = await Promise.all([
-        getMetrics(),
-        getParetoData().catch(() => null), // Pareto might not be available
-      ])
+      const [metricsData] = await Promise.all([getMetrics(), fetchPareto()])
       setMetrics(metricsData)
-      setPareto(paretoData)
       setError(null)
     } catch (err) {
       setError(err instanceof Error ? err.message : "Failed to fetch metrics")
     } finally {
       setLoading(false)
     }
-  }, [])
+  }, [fetchPareto])
 
   useEffect(() => {
-    fetchData()
+    fetchPareto()
+    let received = false
+    const close = streamMetrics({
+      onSnapshot: (snapshot) => {
+        received = true
+        setMetrics(snapshot)
+        setError(null)
+        setLoading(false)
+      },
+      onDelta: (delta) =>
+        setMetrics((current) => (current ? applyDelta(current, delta) : current)),
+      // After the first snapshot, keep showing the last state while EventSource reconnects
+      onError: () => {
+        if (!received) {
+          setError("Failed to connect to the metrics stream")
+          setLoading(false)
+        }
+      },
+    })
 
-    const interval = setInterval(fetchData, pollInterval)
-    return () => clearInterval(interval)
-  }, [fetchData, pollInterval])
+    const interval = setInterval(fetchPareto, paretoInterval)
+    return () => {
+      close()
+      clearInterval(interval)
+    }
+  }, [fetchPareto, paretoInterval])
 
   return {
     metrics,
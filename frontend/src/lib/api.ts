@@ -4,9 +4,14 @@ import type {
   CompareRequest,
   CompareResponse,
   MetricsSummary,
+  MetricsDelta,
+  RoutingHistoryPage,
+  RoutingHistoryQuery,
   ParetoData,
+  LiveParetoData,
   ExperimentId,
   ExperimentState,
+  ExperimentRun,
   ExperimentConfig,
   CostEstimate,
 } from "./types"
@@ -66,10 +71,43 @@ export async function getMetrics(): Promise<MetricsSummary> {
   return fetchJSON<MetricsSummary>("/api/metrics")
 }
 
+export async function getRoutingHistory(
+  query: RoutingHistoryQuery = {}
+): Promise<RoutingHistoryPage> {
+  const params = new URLSearchParams()
+  for (const [key, value] of Object.entries(query)) {
+    if (value !== undefined) params.set(key, String(value))
+  }
+  const qs = params.toString()
+  return fetchJSON<RoutingHistoryPage>(`/api/metrics/history${qs ? `?${qs}` : ""}`)
+}
+
+// Live dashboard updates: a snapshot first (and periodically), then deltas.
+// EventSource reconnects on its own; the server resends a snapshot on reconnect.
+export function streamMetrics(handlers: {
+  onSnapshot: (snapshot: MetricsSummary) => void
+  onDelta: (delta: MetricsDelta) => void
+  onError?: () => void
+}): () => void {
+  const source = new EventSource(`${API_URL}/api/metrics/stream`)
+  source.addEventListener("snapshot", (e) =>
+    handlers.onSnapshot(JSON.parse((e as MessageEvent).data))
+  )
+  source.addEventListener("delta", (e) =>
+    handlers.onDelta(JSON.parse((e as MessageEvent).data))
+  )
+  source.onerror = () => handlers.onError?.()
+  return () => source.close()
+}
+
 export async function getParetoData(): Promise<ParetoData> {
   return fetchJSON<ParetoData>("/api/metrics/pareto")
 }
 
+export async function getLiveParetoData(days = 7, step = 0.05): Promise<LiveParetoData> {
+  return fetchJSON<LiveParetoData>(`/api/metrics/pareto/live?days=${days}&step=${step}`)
+}
+
 // Experiments API
 export async function runExperiment(
   id: ExperimentId,
@@ -81,12 +119,30 @@ export async function runExperiment(
   })
 }
 
+export async function cancelExperiment(
+  id: ExperimentId
+): Promise<ExperimentState> {
+  return fetchJSON<ExperimentState>(`/api/experiments/${id}/cancel`, {
+    method: "POST",
+  })
+}
+
 export async function getExperimentStatus(
   id: ExperimentId
 ): Promise<ExperimentState> {
   return fetchJSON<ExperimentState>(`/api/experiments/${id}/status`)
 }
 
+export async function getExperimentRuns(
+  id: ExperimentId,
+  limit = 20,
+  before?: number
+): Promise<ExperimentRun[]> {
+  const params = new URLSearchParams({ limit: String(limit) })
+  if (before !== undefined) params.set("before", String(before))
+  return fetchJSON<ExperimentRun[]>(`/api/experiments/${id}/runs?${params}`)
+}
+
 export async function getAllResults(): Promise<
   Record<ExperimentId, ExperimentState>
 > {
@@ -99,43 +155,64 @@ export async function getCostEstimates(): Promise<CostEstimate[]> {
   return fetchJSON<CostEstimate[]>("/api/experiments/cost-estimate")
 }
 
-// SSE stream for experiment logs
+// SSE stream for experiment logs. If the connection drops before the
+// `complete` message, reconnect with Last-Event-ID to continue after the
+// last line received.
 export function streamExperimentLogs(
   id: ExperimentId,
   onLog: (line: string) => void
 ): AbortController {
   const controller = new AbortController()
+  let lastEventId: string | null = null
+  let complete = false
 
-  fetch(`${API_URL}/api/experiments/${id}/logs`, {
-    signal: controller.signal,
-  })
-    .then(async (response) => {
-      if (!response.ok || !response.body) return
-
-      const reader = response.body.getReader()
-      const decoder = new TextDecoder()
-      let buffer = ""
-
-      while (true) {
-        const { done, value } = await reader.read()
-        if (done) break
-
-        buffer += decoder.decode(value, { stream: true })
-        const lines = buffer.split("\n")
-        buffer = lines.pop() || ""
-
-        for (const line of lines) {
-          if (line.startsWith("data: ")) {
-            onLog(line.slice(6))
+  const connect = async () => {
+    const response = await fetch(`${API_URL}/api/experiments/${id}/logs`, {
+      signal: controller.signal,
+      headers: lastEventId ? { "Last-Event-ID": lastEventId } : undefined,
+    })
+    if (!response.ok || !response.body) return
+
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ""
+
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split(/\r?\n/)
+      buffer = lines.pop() || ""
+
+      for (const line of lines) {
+        if (line.startsWith("id: ")) {
+          lastEventId = line.slice(4)
+        } else if (line.startsWith("data: ")) {
+          const data = line.slice(6)
+          try {
+            if (JSON.parse(data).type === "complete") complete = true
+          } catch {
+            // plain text line
           }
+          onLog(data)
         }
       }
-    })
-    .catch((err) => {
-      if (err.name !== "AbortError") {
+    }
+  }
+
+  const run = async () => {
+    while (!complete && !controller.signal.aborted) {
+      try {
+        await connect()
+      } catch (err) {
+        if ((err as Error).name === "AbortError") return
         console.error("Log stream error:", err)
       }
-    })
+      if (!complete) await new Promise((resolve) => setTimeout(resolve, 1000))
+    }
+  }
+  run()
 
   return controller
 }
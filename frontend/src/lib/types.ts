@@ -51,13 +51,14 @@ export interface CompareResponse {
   query: string
   local_response: string
   cloud_response: string
-  local_score: number
-  cloud_score: number
+  local_score: number | null  // null when the judge reply could not be used
+  cloud_score: number | null
   local_latency_ms: number
   cloud_latency_ms: number
   local_tokens: number
   cloud_tokens: number
   judge_reasoning: string
+  judge_verdict?: 'local' | 'cloud' | 'tie' | null
 }
 
 // Dashboard
@@ -69,9 +70,36 @@ export interface MetricsSummary {
   total_saved: number
   avg_router_latency_ms: number
   domain_breakdown: Record<string, { local: number; cloud: number }>
+  latency_percentiles?: LatencyPercentiles
+  recent_history: RoutingLogEntry[]
+}
+
+// /api/metrics/stream "delta" event: counters to add, rows to prepend (newest first)
+export interface MetricsDelta {
+  total_queries: number
+  local_count: number
+  cloud_count: number
+  total_cost: number
+  total_saved: number
+  domain_breakdown: Record<string, { local: number; cloud: number }>
   recent_history: RoutingLogEntry[]
 }
 
+export interface LatencyQuantiles {
+  p50: number
+  p90: number
+  p99: number
+  count: number
+}
+
+// Keyed by metric: router_latency_ms, latency_ms, ttft_ms (absent until sampled)
+export type LatencyBreakdown = Partial<Record<"router_latency_ms" | "latency_ms" | "ttft_ms", LatencyQuantiles>>
+
+export type LatencyPercentiles = LatencyBreakdown & {
+  by_route: Record<string, LatencyBreakdown>
+  by_domain: Record<string, LatencyBreakdown>
+}
+
 export interface RoutingLogEntry {
   id: number
   query: string
@@ -83,6 +111,20 @@ export interface RoutingLogEntry {
   timestamp: string
 }
 
+export interface RoutingHistoryPage {
+  entries: RoutingLogEntry[]
+  next_cursor: string | null
+}
+
+export interface RoutingHistoryQuery {
+  limit?: number
+  cursor?: string
+  route?: "local" | "cloud"
+  domain?: string
+  since?: string
+  until?: string
+}
+
 export interface ParetoPoint {
   threshold: number
   quality: number
@@ -98,6 +140,28 @@ export interface ParetoData {
   recommended_threshold: number
 }
 
+// /api/metrics/pareto/live: the sweep over production routing logs
+export interface LiveParetoPoint {
+  threshold: number
+  quality: number | null
+  cost_pct: number
+  local_pct: number
+  pgr: number | null
+  projected_cost_usd: number
+}
+
+export interface LiveParetoData {
+  queries: number
+  sweep: LiveParetoPoint[]
+  cloud_quality: number | null
+  local_quality: number | null
+  recommended_threshold: number | null
+  days: number
+  judged_queries: number
+  quality_source: "judge" | "mixed" | "offline"
+  current_threshold: number
+}
+
 // Experiments
 export type ExperimentId =
   | "e1_baselines"
@@ -109,7 +173,13 @@ export type ExperimentId =
   | "e4_evaluation"
   | "e6_error_analysis"
 
-export type ExperimentStatus = "idle" | "running" | "completed" | "failed"
+export type ExperimentStatus =
+  | "idle"
+  | "queued"
+  | "running"
+  | "completed"
+  | "failed"
+  | "cancelled"
 
 export interface ExperimentState {
   experiment_id: ExperimentId
@@ -119,12 +189,32 @@ export interface ExperimentState {
   completed_at: string | null
   results: Record<string, unknown> | null
   error: string | null
+  run_id?: number | null
+}
+
+export interface ExperimentRun {
+  run_id: number
+  experiment_id: ExperimentId
+  status: ExperimentStatus
+  config: ExperimentConfig | null
+  priority: number
+  timeout_s: number | null
+  progress: { current: number; total: number; percent: number } | null
+  queued_at: string | null
+  started_at: string | null
+  completed_at: string | null
+  exit_code: number | null
+  error: string | null
+  result_files: string[] | null
+  log_lines: number
 }
 
 export interface ExperimentConfig {
   judge_model?: string
   limit?: number
   threshold?: number
+  priority?: number
+  timeout_s?: number
 }
 
 export interface CostEstimate {
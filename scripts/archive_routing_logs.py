@@ -0,0 +1,79 @@
+"""
+Archive old routing logs, or stream archived ones back out.
+
+Rows older than --days move from routing_logs into zstd-compressed JSON Lines
+partitions under ARCHIVE_DIR (default data/archive/routing_logs/date=YYYY-MM-DD/).
+The backend does the same on a schedule when LOG_RETENTION_DAYS is set.
+Dashboard totals come from metrics_rollup and are unaffected. SQLite does not
+shrink its file after deletes; --vacuum rewrites it afterwards (takes an
+exclusive lock, so run it while the backend is stopped or idle).
+
+--cat writes archived rows to stdout as NDJSON, for piping into analysis.
+
+Usage:
+  python scripts/archive_routing_logs.py --days 30 --dry-run
+  python scripts/archive_routing_logs.py --days 30 --vacuum
+  python scripts/archive_routing_logs.py --cat --since 2026-01-01 --until 2026-02-01 > january.jsonl
+"""
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Add parent to path for imports (works both locally and in Docker)
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
+sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
+
+# Always via the backend/ path: importing the models as both backend.db.models
+# and db.models (init_db) would register the tables twice
+from sqlalchemy import text
+from config import get_settings
+from db.archive import archive_logs, count_archivable, iter_archive, retention_cutoff
+from db.database import engine, init_db
+
+
+async def archive(days: int, batch_size: int, dry_run: bool, vacuum: bool):
+    await init_db()
+    cutoff = retention_cutoff(days)
+    if dry_run:
+        print(f"{await count_archivable(cutoff)} routing logs older than {cutoff:%Y-%m-%d %H:%M:%S} UTC")
+    else:
+        start = time.perf_counter()
+        moved = await archive_logs(cutoff, batch_size=batch_size)
+        print(f"Archived {moved} routing logs in {time.perf_counter() - start:.1f}s")
+        if vacuum and engine.dialect.name == "sqlite":
+            start = time.perf_counter()
+            async with engine.connect() as conn:
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text("VACUUM"))
+            print(f"VACUUM took {time.perf_counter() - start:.1f}s")
+    await engine.dispose()
+
+
+def cat(since: datetime | None, until: datetime | None):
+    for record in iter_archive(since, until):
+        sys.stdout.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old routing logs / read the archive")
+    parser.add_argument("--days", type=int, default=None,
+                        help="Archive rows older than this many days (default: LOG_RETENTION_DAYS)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be archived")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the SQLite database afterwards")
+    parser.add_argument("--cat", action="store_true", help="Write archived rows to stdout as NDJSON")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="--cat: from this UTC time")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="--cat: before this UTC time")
+    args = parser.parse_args()
+
+    if args.cat:
+        cat(args.since, args.until)
+    else:
+        days = args.days if args.days is not None else get_settings().log_retention_days
+        if days <= 0:
+            parser.error("pass --days N (or set LOG_RETENTION_DAYS)")
+        asyncio.run(archive(days, args.batch_size, args.dry_run, args.vacuum))
@@ -0,0 +1,171 @@
+"""
+Benchmark: /api/metrics latency against routing_logs tables of different sizes.
+
+For each size a synthetic SQLite database is generated under --out (default
+<tmp>/router-bench, reused on later runs), upgraded with init_db() (so it has the current
+indexes and migrations), and metrics_summary() (the uncached /api/metrics
+payload) is called repeatedly in-process. Each size runs in its own
+subprocess because the engine is bound to DATABASE_URL at import time.
+
+Usage:
+  python scripts/bench_metrics.py
+  python scripts/bench_metrics.py --rows 10000 1000000 10000000 --repeat 20
+  python scripts/bench_metrics.py --rows 1000000 --drop-indexes  # pre-index baseline
+  python scripts/bench_metrics.py --out /mnt/scratch/bench
+"""
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+ROOT = Path(__file__).parent.parent
+# Outside the repo: the generated databases reach several GB
+BENCH_DIR = Path(tempfile.gettempdir()) / "router-bench"
+DOMAINS = ["coding", "math", "reasoning", "writing", "roleplay", "extraction", "stem", "humanities", None]
+
+
+def build_database(path: Path, rows: int, seed: int = 0):
+    """Create routing_logs with `rows` synthetic entries spread over the last 30 days."""
+    rng = random.Random(seed)
+    tmp = path.with_suffix(".tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("""
+        CREATE TABLE routing_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            query VARCHAR NOT NULL, route VARCHAR NOT NULL, confidence FLOAT NOT NULL,
+            features JSON, response_text VARCHAR, latency_ms FLOAT, router_latency_ms FLOAT,
+            input_tokens INTEGER, output_tokens INTEGER, cost_usd FLOAT, cloud_cost_usd FLOAT,
+            savings_usd FLOAT, domain VARCHAR, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP)
+        )
+    """)
+    start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=30)  # naive UTC like CURRENT_TIMESTAMP
+    step = 30 * 86400 / max(rows, 1)
+
+    def generate():
+        for i in range(rows):
+            local = rng.random() < 0.6
+            input_tokens, output_tokens = rng.randint(10, 400), rng.randint(20, 800)
+            cloud_cost = (input_tokens * 0.15 + output_tokens * 0.60) / 1e6
+            yield (
+                f"synthetic query {i} about {rng.choice(DOMAINS) or 'general'} topics",
+                "local" if local else "cloud",
+                rng.random(),
+                None,
+                "synthetic response " * 8,
+                rng.uniform(200, 4000),
+                rng.uniform(2, 15),
+                input_tokens,
+                output_tokens,
+                0.0 if local else cloud_cost,
+                cloud_cost,
+                cloud_cost if local else 0.0,
+                rng.choice(DOMAINS),
+                (start + timedelta(seconds=i * step)).strftime("%Y-%m-%d %H:%M:%S"),
+            )
+
+    conn.executemany(
+        "INSERT INTO routing_logs (query, route, confidence, features, response_text, latency_ms, "
+        "router_latency_ms, input_tokens, output_tokens, cost_usd, cloud_cost_usd, savings_usd, "
+        "domain, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        generate(),
+    )
+    conn.commit()
+    conn.close()
+    tmp.rename(path)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def measure(repeat: int, drop_indexes: bool) -> dict:
+    # Imported here: DATABASE_URL must be set first
+    from sqlalchemy import text
+    from db.database import init_db, engine
+    from db.models import RoutingLog
+    from routers.metrics import metrics_summary
+
+    await init_db()
+    indexes = RoutingLog.__table__.indexes
+    if drop_indexes:
+        async with engine.begin() as conn:
+            for index in indexes:
+                await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+    await metrics_summary(limit=100, offset=0)  # warm the page cache
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await metrics_summary(limit=100, offset=0)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if drop_indexes:
+        # Leave the cached database indexed for the next run
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: [i.create(sync_conn, checkfirst=True) for i in indexes])
+    await engine.dispose()
+    return {
+        "p50_ms": percentile(timings, 50),
+        "p95_ms": percentile(timings, 95),
+        "min_ms": min(timings),
+    }
+
+
+def run_one(rows: int, repeat: int, drop_indexes: bool):
+    """Child process: benchmark one database size and print a JSON result line."""
+    sys.path.insert(0, str(ROOT / "backend"))
+    sys.path.insert(0, str(ROOT))
+    result = asyncio.run(measure(repeat, drop_indexes))
+    print(json.dumps({"rows": rows, **result}))
+
+
+def main(sizes: list[int], repeat: int, drop_indexes: bool, out: Path = BENCH_DIR):
+    out.mkdir(parents=True, exist_ok=True)
+    label = "without indexes" if drop_indexes else "with indexes"
+    print(f"metrics_summary() latency, {repeat} calls per size ({label})\n")
+    print(f"{'rows':>12} {'p50 ms':>9} {'p95 ms':>9} {'min ms':>9}")
+    print("-" * 42)
+    for rows in sizes:
+        path = out / f"routing_logs_{rows}.db"
+        if not path.exists():
+            print(f"  generating {rows:,} rows -> {path} ...", file=sys.stderr)
+            build_database(path, rows)
+        env = dict(os.environ, DATABASE_URL=f"sqlite+aiosqlite:///{path}")
+        cmd = [sys.executable, __file__, "--child", str(rows), "--repeat", str(repeat)]
+        if drop_indexes:
+            cmd.append("--drop-indexes")
+        result = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr, file=sys.stderr)
+            raise SystemExit(f"Benchmark failed for {rows} rows")
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{rows:>12,} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['min_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark /api/metrics latency vs table size")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000],
+                        help="routing_logs sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed calls per size")
+    parser.add_argument("--drop-indexes", action="store_true",
+                        help="Drop the routing_logs indexes before timing (baseline)")
+    parser.add_argument("--out", type=Path, default=BENCH_DIR,
+                        help=f"Directory for the generated databases (default: {BENCH_DIR})")
+    parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child is not None:
+        run_one(args.child, args.repeat, args.drop_indexes)
+    else:
+        main(args.rows, args.repeat, args.drop_indexes, args.out)
@@ -0,0 +1,156 @@
+"""
+Benchmark: SQLite connection profiles under a mixed write/read load.
+
+For each profile (SQLITE_PROFILE=default: WAL only; tuned: the PRAGMAs in
+db/database.py) a fresh copy of a synthetic routing_logs database is
+loaded concurrently for --duration seconds by
+  - writers: write_log() of one routing log per transaction (the /api/chat path)
+  - readers: metrics_summary() and keyset pages of get_history() (the dashboard)
+with background WAL checkpoints running as in the API. Each profile runs in
+its own subprocess because the engine is bound at import time. Databases go
+under --out (default <tmp>/router-bench, shared with bench_metrics.py).
+
+Usage:
+  python scripts/bench_sqlite_profile.py
+  python scripts/bench_sqlite_profile.py --rows 1000000 --writers 8 --readers 4 --duration 20
+  python scripts/bench_sqlite_profile.py --out /mnt/scratch/bench
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+from bench_metrics import BENCH_DIR, build_database
+
+ROOT = Path(__file__).parent.parent
+PROFILES = ["default", "tuned"]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def measure(duration: float, writers: int, readers: int) -> dict:
+    # Imported here: DATABASE_URL / SQLITE_PROFILE must be set first
+    from db.database import engine, get_db, init_db
+    from db.checkpoint import run_checkpoints, storage_status
+    from db.log_writer import write_log
+    from db.models import RoutingLog
+    from routers.metrics import get_history, metrics_summary
+
+    await init_db()
+    checkpoints = asyncio.create_task(run_checkpoints(1.0))
+    write_ms: list[float] = []
+    read_ms: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def writer(seed: int):
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with get_db() as db:
+                    await write_log(db, RoutingLog(
+                        query="bench query " * rng.randint(1, 20),
+                        route=rng.choice(["local", "cloud"]),
+                        confidence=rng.random(),
+                        response_text="bench response " * rng.randint(10, 100),
+                        latency_ms=rng.uniform(200, 4000),
+                        router_latency_ms=rng.uniform(2, 15),
+                        cost_usd=0.0,
+                        domain=rng.choice(["coding", "math", "writing", None]),
+                    ))
+                write_ms.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                errors += 1
+
+    async def reader():
+        nonlocal errors
+        cursor = None
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                await metrics_summary(limit=100, offset=0)
+                page = await get_history(limit=100, cursor=cursor, route=None, domain=None, since=None, until=None)
+                cursor = page["next_cursor"]
+                read_ms.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                errors += 1
+
+    await asyncio.gather(*[writer(i) for i in range(writers)], *[reader() for _ in range(readers)])
+    checkpoints.cancel()
+    status = await storage_status()
+    await engine.dispose()
+    return {
+        "writes_per_s": len(write_ms) / duration,
+        "write_p50_ms": percentile(write_ms, 50),
+        "write_p99_ms": percentile(write_ms, 99),
+        "reads_per_s": len(read_ms) / duration,
+        "read_p50_ms": percentile(read_ms, 50),
+        "read_p99_ms": percentile(read_ms, 99),
+        "wal_mb": (status["wal_size_bytes"] or 0) / 1e6,
+        "errors": errors,
+    }
+
+
+def run_one(duration: float, writers: int, readers: int):
+    """Child process: benchmark one profile and print a JSON result line."""
+    sys.path.insert(0, str(ROOT / "backend"))
+    sys.path.insert(0, str(ROOT))
+    print(json.dumps(asyncio.run(measure(duration, writers, readers))))
+
+
+def main(rows: int, duration: float, writers: int, readers: int, out: Path = BENCH_DIR):
+    out.mkdir(parents=True, exist_ok=True)
+    base = out / f"routing_logs_{rows}.db"
+    if not base.exists():
+        print(f"  generating {rows:,} rows -> {base} ...", file=sys.stderr)
+        build_database(base, rows)
+
+    print(f"{writers} writers + {readers} readers for {duration:.0f}s on {rows:,} rows\n")
+    print(f"{'profile':>8} {'writes/s':>9} {'w p50':>7} {'w p99':>7} {'reads/s':>8} "
+          f"{'r p50':>7} {'r p99':>7} {'WAL MB':>7} {'errors':>7}")
+    print("-" * 78)
+    for profile in PROFILES:
+        path = out / f"profile_{profile}.db"
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+        shutil.copyfile(base, path)
+        env = dict(os.environ, DATABASE_URL=f"sqlite+aiosqlite:///{path}", SQLITE_PROFILE=profile)
+        cmd = [sys.executable, __file__, "--child", "--duration", str(duration),
+               "--writers", str(writers), "--readers", str(readers)]
+        result = subprocess.run(cmd, env=env, cwd=ROOT, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr, file=sys.stderr)
+            raise SystemExit(f"Benchmark failed for profile {profile}")
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{profile:>8} {r['writes_per_s']:>9.0f} {r['write_p50_ms']:>7.1f} {r['write_p99_ms']:>7.1f} "
+              f"{r['reads_per_s']:>8.0f} {r['read_p50_ms']:>7.1f} {r['read_p99_ms']:>7.1f} "
+              f"{r['wal_mb']:>7.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SQLite connection profiles (mixed load)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Starting routing_logs size")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per profile")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--out", type=Path, default=BENCH_DIR,
+                        help=f"Directory for the generated databases (default: {BENCH_DIR})")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_one(args.duration, args.writers, args.readers)
+    else:
+        main(args.rows, args.duration, args.writers, args.readers, args.out)
@@ -0,0 +1,126 @@
+"""
+Benchmark: API-process CPU per 1,000 streamed tokens with SSE frame coalescing.
+
+Simulates N concurrent /api/chat/stream responses in-process: each stream
+emits tokens at a fixed decode rate, goes through the same framing path as
+chat_stream (coalesce_chunks -> json.dumps -> SSE encode) and is written to
+a socket so per-event syscalls are included. CPU is measured with
+time.process_time() for each coalescing setting.
+
+Usage:
+  python scripts/bench_stream_coalescing.py
+  python scripts/bench_stream_coalescing.py --streams 200 --tokens 300 --intervals 0 20 50
+"""
+import json
+import time
+import socket
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add parent to path for imports (works both locally and in Docker)
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
+sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
+
+from sse_starlette.sse import ServerSentEvent
+
+try:
+    from backend.services.stream_coalescer import coalesce_chunks, single_frames
+except ModuleNotFoundError:
+    # Running inside Docker where backend code is at /app directly
+    from services.stream_coalescer import coalesce_chunks, single_frames
+
+
+async def fake_token_stream(n_tokens: int, tokens_per_sec: float):
+    """Emit short word-piece tokens at a steady decode rate."""
+    delay = 1.0 / tokens_per_sec
+    for i in range(n_tokens):
+        await asyncio.sleep(delay)
+        yield f" tok{i % 97}"
+
+
+async def drain(reader: asyncio.StreamReader):
+    while await reader.read(65536):
+        pass
+
+
+async def run_stream(n_tokens, tokens_per_sec, interval_ms, max_bytes, writer, stats):
+    gen = fake_token_stream(n_tokens, tokens_per_sec)
+    frames = coalesce_chunks(gen, interval_ms, max_bytes) if interval_ms > 0 else single_frames(gen)
+    async for frame in frames:
+        event = ServerSentEvent(event="token", data=json.dumps({"text": "".join(frame)}))
+        writer.write(event.encode())
+        await writer.drain()
+        stats["events"] += 1
+        stats["tokens"] += len(frame)
+
+
+async def bench(streams, n_tokens, tokens_per_sec, interval_ms, max_bytes):
+    stats = {"events": 0, "tokens": 0}
+    pairs, readers, peers = [], [], []
+    for _ in range(streams):
+        a, b = socket.socketpair()
+        _, writer = await asyncio.open_connection(sock=a)
+        reader, peer = await asyncio.open_connection(sock=b)
+        pairs.append(writer)
+        peers.append(peer)  # keep the read side open
+        readers.append(asyncio.create_task(drain(reader)))
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[
+        run_stream(n_tokens, tokens_per_sec, interval_ms, max_bytes, w, stats) for w in pairs
+    ])
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    for w in pairs + peers:
+        w.close()
+    await asyncio.gather(*readers, return_exceptions=True)
+
+    return {
+        "interval_ms": interval_ms,
+        "events": stats["events"],
+        "tokens": stats["tokens"],
+        "cpu_s": cpu,
+        "wall_s": wall,
+        "cpu_ms_per_1k_tokens": cpu / stats["tokens"] * 1000 * 1000,
+        "tokens_per_event": stats["tokens"] / stats["events"],
+    }
+
+
+async def baseline(streams, n_tokens, tokens_per_sec):
+    """CPU spent by the simulated backends alone (no framing / sending)."""
+    async def consume():
+        async for _ in fake_token_stream(n_tokens, tokens_per_sec):
+            pass
+    cpu_start = time.process_time()
+    await asyncio.gather(*[consume() for _ in range(streams)])
+    return time.process_time() - cpu_start
+
+
+async def main(streams, n_tokens, tokens_per_sec, intervals, max_bytes):
+    total_tokens = streams * n_tokens
+    base_cpu = await baseline(streams, n_tokens, tokens_per_sec)
+    print(f"{streams} concurrent streams x {n_tokens} tokens @ {tokens_per_sec:.0f} tok/s")
+    print(f"Token source baseline: {base_cpu / total_tokens * 1e6:.1f} ms CPU per 1k tokens (subtracted)\n")
+    print(f"{'interval':>9} {'events':>8} {'tok/event':>10} {'CPU ms/1k tok':>14} {'wall s':>7}")
+    print("-" * 52)
+    for interval_ms in intervals:
+        r = await bench(streams, n_tokens, tokens_per_sec, interval_ms, max_bytes)
+        net = (r["cpu_s"] - base_cpu) / r["tokens"] * 1e6
+        label = "off" if interval_ms == 0 else f"{interval_ms} ms"
+        print(f"{label:>9} {r['events']:>8} {r['tokens_per_event']:>10.1f} {net:>14.1f} {r['wall_s']:>7.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SSE token frame coalescing")
+    parser.add_argument("--streams", type=int, default=200, help="Concurrent streams")
+    parser.add_argument("--tokens", type=int, default=300, help="Tokens per stream")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="Decode rate per stream")
+    parser.add_argument("--intervals", type=int, nargs="+", default=[0, 20, 50, 100],
+                        help="Coalescing intervals in ms (0 = off)")
+    parser.add_argument("--max-bytes", type=int, default=512, help="Max frame size in bytes")
+    args = parser.parse_args()
+    asyncio.run(main(args.streams, args.tokens, args.tokens_per_sec, args.intervals, args.max_bytes))
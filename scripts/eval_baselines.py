@@ -9,9 +9,15 @@ conversation. Multi-turn routing (re-routing mid-conversation or
 maintaining model consistency across turns) is noted as future work.
 This approach is standard for routing evaluation in the literature.
 
+Both responses to a question are judged in one comparative call, which
+returns both scores plus the pairwise verdict (stored as "pairwise_verdict",
+A = local, B = cloud) so scripts/eval_router.py can reuse it instead of
+judging the pair again.
+
 Usage:
   python scripts/eval_baselines.py
   python scripts/eval_baselines.py --resume  # Resume from existing results
+  python scripts/eval_baselines.py --no-cache  # Re-judge even if cached
 """
 import json
 import asyncio
@@ -26,15 +32,17 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
 sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
 
 try:
-    from backend.services.ollama_client import OllamaClient
-    from backend.services.openai_client import OpenAIClient
+    from backend.services.ollama_client import get_ollama
+    from backend.services.openai_client import get_openai
     from backend.services.judge import Judge
 except ModuleNotFoundError:
     # Running inside Docker where backend code is at /app directly
-    from services.ollama_client import OllamaClient
-    from services.openai_client import OpenAIClient
+    from services.ollama_client import get_ollama
+    from services.openai_client import get_openai
     from services.judge import Judge
 
+from utils.progress import ProgressCallback, print_progress
+
 # MT-Bench 80 questions (download from FastChat repo or load local copy)
 MTBENCH_PATH = "data/raw/mt_bench_questions.jsonl"
 
@@ -48,10 +56,11 @@ def load_existing_results():
     return []
 
 
-async def run_baselines(resume: bool = False):
-    ollama = OllamaClient()
-    openai_client = OpenAIClient()
-    judge = Judge()
+async def run_baselines(resume: bool = False, use_cache: bool = True,
+                        on_progress: ProgressCallback = print_progress):
+    ollama = get_ollama()
+    openai_client = get_openai()
+    judge = Judge(use_cache=use_cache)
 
     # Load MT-Bench questions
     if not Path(MTBENCH_PATH).exists():
@@ -85,43 +94,65 @@ async def run_baselines(resume: bool = False):
     questions_to_process = [q for q in questions if q.get("question_id") not in processed_ids]
     print(f"Processing {len(questions_to_process)} questions...")
 
-    for q in tqdm(questions_to_process, desc="Running baselines"):
-        # Fix 7: Use first turn only
-        query = q["turns"][0]
-        category = q.get("category", "general")
+    # Judge items are (query, local response, cloud response) triples
+    pending = []  # judge item index -> question index
+    generated = {}  # question index -> (local result, cloud result)
+    progress = tqdm(total=len(questions_to_process), desc="Running baselines")
+
+    def advance():
+        progress.update(1)
+        on_progress(progress.n, len(questions_to_process))
+
+    async def judge_items():
+        for qi, q in enumerate(questions_to_process):
+            # Fix 7: Use first turn only
+            query = q["turns"][0]
+            try:
+                # Run both models
+                local_result, cloud_result = await asyncio.gather(
+                    ollama.generate(query), openai_client.generate(query)
+                )
+            except Exception as e:
+                print(f"  Error on question {q.get('question_id', qi)}: {e}")
+                advance()
+                continue
+            generated[qi] = (local_result, cloud_result)
+            pending.append(qi)
+            yield query, local_result["text"], cloud_result["text"]
+
+    # One comparative judge call per question, paced by the judge rate limiter
+    async for idx, judged in judge.compare_many(judge_items()):
+        qi = pending[idx]
+        local_result, cloud_result = generated.pop(qi)
+        q = questions_to_process[qi]
         question_id = q.get("question_id", len(results))
-
-        try:
-            # Run both models
-            local_result = await ollama.generate(query)
-            cloud_result = await openai_client.generate(query)
-
-            # Judge both
-            l_score = await judge.score(query, local_result["text"])
-            c_score = await judge.score(query, cloud_result["text"])
-
-            local_scores.append(l_score)
-            cloud_scores.append(c_score)
-            results.append({
-                "question_id": question_id,
-                "category": category,
-                "query": query,
-                "local_score": l_score,
-                "cloud_score": c_score,
-                "local_response": local_result["text"][:500],
-                "cloud_response": cloud_result["text"][:500],
-                "local_latency_ms": local_result["latency_ms"],
-                "cloud_latency_ms": cloud_result["latency_ms"],
-            })
-
-            # Checkpoint every 10
-            if len(results) % 10 == 0:
-                _save_results(results, local_scores, cloud_scores)
-
-        except Exception as e:
-            print(f"  Error on question {question_id}: {e}")
+        advance()
+        if isinstance(judged, Exception):
+            print(f"  Error on question {question_id}: {judged}")
             continue
 
+        l_score = judged["score_a"]
+        c_score = judged["score_b"]
+        local_scores.append(l_score)
+        cloud_scores.append(c_score)
+        results.append({
+            "question_id": question_id,
+            "category": q.get("category", "general"),
+            "query": q["turns"][0],
+            "local_score": l_score,
+            "cloud_score": c_score,
+            "pairwise_verdict": judged["verdict"],  # A = local, B = cloud
+            "local_response": local_result["text"][:500],
+            "cloud_response": cloud_result["text"][:500],
+            "local_latency_ms": local_result["latency_ms"],
+            "cloud_latency_ms": cloud_result["latency_ms"],
+        })
+
+        # Checkpoint every 10
+        if len(results) % 10 == 0:
+            _save_results(results, local_scores, cloud_scores)
+    progress.close()
+
     # Final save
     _save_results(results, local_scores, cloud_scores)
 
@@ -144,7 +175,9 @@ async def run_baselines(resume: bool = False):
         l, c = np.mean(scores["local"]), np.mean(scores["cloud"])
         print(f"  {cat:15s} {l:6.2f} {c:6.2f} {c-l:6.2f}")
 
-    print(f"\nResults saved to data/results/")
+    print(f"\nJudge cache: {judge.cache.stats()}")
+    print(f"Judge usage: {judge.usage}")
+    print(f"Results saved to data/results/")
 
 
 def _save_results(results, local_scores, cloud_scores):
@@ -163,5 +196,7 @@ def _save_results(results, local_scores, cloud_scores):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--resume", action="store_true", help="Resume from existing results")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the judge result cache (always call the judge)")
     args = parser.parse_args()
-    asyncio.run(run_baselines(resume=args.resume))
+    asyncio.run(run_baselines(resume=args.resume, use_cache=not args.no_cache))
@@ -20,10 +20,12 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
 sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
 
 try:
-    from backend.services.router_model import RouterModel
+    from backend.services.router_model import get_router
 except ModuleNotFoundError:
     # Running inside Docker where backend code is at /app directly
-    from services.router_model import RouterModel
+    from services.router_model import get_router
+
+from utils.progress import ProgressCallback, print_progress
 
 
 def _classify_failure(question, features, gap):
@@ -54,7 +56,7 @@ def _classify_false_negative(question, features, local_score, cloud_score):
     return "Router conservatism — local model could have handled this query"
 
 
-def main():
+def main(on_progress: ProgressCallback = print_progress):
     # Check if required files exist
     required_files = [
         "data/results/mtbench_questions.json",
@@ -83,7 +85,8 @@ def main():
             eval_results = json.load(f)
         threshold = eval_results.get("threshold", 0.6)
 
-    router = RouterModel()
+    # Loaded once per process (kept warm across runs in an experiment worker)
+    router = get_router()
     print(f"Analyzing errors at threshold: {threshold}")
 
     false_positives = []
@@ -133,6 +136,9 @@ def main():
                 ),
             })
 
+        if (i + 1) % 10 == 0 or i + 1 == len(questions):
+            on_progress(i + 1, len(questions))
+
     # Sort false positives by severity (largest quality gap first)
     false_positives.sort(key=lambda x: x["quality_gap"], reverse=True)
     for i, e in enumerate(false_positives):
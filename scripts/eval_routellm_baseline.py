@@ -24,9 +24,10 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.data_splits import load_and_split_data, verify_test_hash
+from utils.progress import ProgressCallback, print_progress
 
 
-def main(data_path: str):
+def main(data_path: str = "data/labeled/train_5k.jsonl", on_progress: ProgressCallback = print_progress):
     # Load data using shared split function (Fix 6)
     print(f"Loading data from {data_path}")
     (train_texts, train_labels,
@@ -79,8 +80,8 @@ def main(data_path: str):
     probabilities = []
 
     for i, query in enumerate(test_texts):
-        if (i + 1) % 100 == 0:
-            print(f"  Progress: {i + 1}/{len(test_texts)}")
+        if (i + 1) % 100 == 0 or i + 1 == len(test_texts):
+            on_progress(i + 1, len(test_texts))
 
         try:
             # Get routing decision from RouteLLM
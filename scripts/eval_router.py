@@ -11,9 +11,11 @@ Assumes you have already run MT-Bench baselines (E1) and have:
 
 Usage:
   python scripts/eval_router.py
+  python scripts/eval_router.py --no-cache  # Re-judge even if cached
 """
 import json
 import asyncio
+import argparse
 import numpy as np
 from pathlib import Path
 from collections import defaultdict
@@ -24,14 +26,15 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
 sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
 
 try:
-    from backend.services.router_model import RouterModel
+    from backend.services.router_model import get_router
     from backend.services.judge import Judge
 except ModuleNotFoundError:
     # Running inside Docker where backend code is at /app directly
-    from services.router_model import RouterModel
+    from services.router_model import get_router
     from services.judge import Judge
 
 from utils.bootstrap import bootstrap_ci, bootstrap_pgr
+from utils.progress import ProgressCallback, print_progress
 from utils.visualize import plot_pareto_curve, plot_domain_breakdown
 
 
@@ -46,46 +49,62 @@ def load_mtbench():
     return questions, local_scores, cloud_scores
 
 
-async def run_pairwise_judging(questions, routed_responses, cloud_responses, decisions):
+async def run_pairwise_judging(questions, routed_responses, cloud_responses, decisions,
+                               use_cache: bool = True, on_progress: ProgressCallback = print_progress):
     """
     Fix 2: Run actual pairwise judging for win rate calculation.
     Returns (wins, ties, losses) for routed vs cloud.
+
+    A local-routed question compares the same (local, cloud) pair that
+    eval_baselines.py already judged, so its stored "pairwise_verdict" is
+    reused; only questions without one (older results) are judged here.
     """
-    judge = Judge()
+    judge = Judge(use_cache=use_cache)
     wins, ties, losses = 0, 0, 0
 
-    print("\nRunning pairwise judging (Fix 2)...")
-    for i, q in enumerate(questions):
-        if (i + 1) % 20 == 0:
-            print(f"  Progress: {i + 1}/{len(questions)}")
-
-        # If routed to cloud, it's a tie by definition
-        if decisions[i].route.value == "cloud":
+    def tally(verdict: str):
+        nonlocal wins, ties, losses
+        if verdict == "A":  # A = routed response wins
+            wins += 1
+        elif verdict == "B":  # B = cloud response wins
+            losses += 1
+        else:  # TIE
             ties += 1
-            continue
-
-        try:
-            # Compare routed (local) response vs cloud response
-            result = await judge.pairwise(
-                q["query"],
-                routed_responses[i],
-                cloud_responses[i]
-            )
-
-            if result == "A":  # A = routed response wins
-                wins += 1
-            elif result == "B":  # B = cloud response wins
-                losses += 1
-            else:  # TIE
-                ties += 1
-        except Exception as e:
-            print(f"  Warning: Pairwise judging failed for question {i}: {e}")
+
+    # If routed to cloud, it's a tie by definition
+    local_routed = [i for i in range(len(questions)) if decisions[i].route.value != "cloud"]
+    ties += len(questions) - len(local_routed)
+
+    to_judge = []
+    for i in local_routed:
+        if questions[i].get("pairwise_verdict") in ("A", "B", "TIE"):
+            tally(questions[i]["pairwise_verdict"])
+        else:
+            to_judge.append(i)
+    print(f"\nPairwise verdicts reused from baselines: {len(local_routed) - len(to_judge)}")
+    if not to_judge:
+        return wins, ties, losses
+
+    # Compare routed (local) response vs cloud response
+    items = [(questions[i]["query"], routed_responses[i], cloud_responses[i]) for i in to_judge]
+
+    def report(done, total):
+        if done % 20 == 0 or done == total:
+            on_progress(done, total)
+
+    print(f"Running pairwise judging (Fix 2) for {len(to_judge)} questions...")
+    async for idx, result in judge.pairwise_many(items, on_progress=report):
+        if isinstance(result, Exception):
+            print(f"  Warning: Pairwise judging failed for question {to_judge[idx]}: {result}")
             ties += 1
+        else:
+            tally(result)
 
+    print(f"  Judge cache: {judge.cache.stats()}")
     return wins, ties, losses
 
 
-def main():
+async def main(use_cache: bool = True, on_progress: ProgressCallback = print_progress):
     # Check if baseline data exists
     if not Path("data/results/mtbench_questions.json").exists():
         print("ERROR: MT-Bench baseline results not found.")
@@ -93,7 +112,8 @@ def main():
         return
 
     questions, local_scores, cloud_scores = load_mtbench()
-    router = RouterModel()
+    # Loaded once per process (kept warm across runs in an experiment worker)
+    router = get_router()
     n = len(questions)
 
     cloud_avg = np.mean(cloud_scores)
@@ -211,8 +231,8 @@ def main():
     print(f"M5 (approx) — Win Rate: {win_rate_approx:.1f}% (W:{wins_approx} T:{ties_approx} L:{losses_approx})")
 
     # M5b: Win rate (pairwise judging) — Fix 2
-    wins_pair, ties_pair, losses_pair = asyncio.run(
-        run_pairwise_judging(questions, routed_responses, cloud_responses, decisions)
+    wins_pair, ties_pair, losses_pair = await run_pairwise_judging(
+        questions, routed_responses, cloud_responses, decisions, use_cache, on_progress
     )
     win_rate_pairwise = (wins_pair + 0.5 * ties_pair) / n * 100
     print(f"M5 (pairwise) — Win Rate: {win_rate_pairwise:.1f}% (W:{wins_pair} T:{ties_pair} L:{losses_pair})")
@@ -288,4 +308,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the judge result cache (always call the judge)")
+    # parse_known_args: the experiments API may pass flags this script ignores
+    args, _ = parser.parse_known_args()
+    asyncio.run(main(use_cache=not args.no_cache))
@@ -0,0 +1,115 @@
+"""
+Export routing logs as NDJSON, CSV or Arrow IPC for offline analysis.
+
+Reads the database in chunks (backend/db/export.py, the same code as
+GET /api/metrics/export), so memory use does not grow with the table.
+--resume continues an interrupted NDJSON export: it drops a partly written
+last line, reads the last exported id and appends from there. For CSV and
+Arrow, start a new file with --after-id set to the last id exported.
+
+Usage:
+  python scripts/export_routing_logs.py --output logs.ndjson
+  python scripts/export_routing_logs.py --format csv --since 2026-01-01 --route cloud --output cloud.csv
+  python scripts/export_routing_logs.py --format arrow --include-response --output logs.arrows
+  python scripts/export_routing_logs.py --output logs.ndjson --resume
+"""
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# Add parent to path for imports (works both locally and in Docker)
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
+sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
+
+# Always via the backend/ path: importing the models as both backend.db.models
+# and db.models (init_db) would register the tables twice
+from db.database import engine, init_db
+from db.export import CHUNK_SIZE, arrow_available, iter_chunks, to_arrow, to_csv, to_ndjson
+
+
+def resume_point(path: Path) -> int:
+    """Last id in an existing NDJSON export, after truncating a partly written last line; 0 if none."""
+    if not path.exists():
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, 2)
+        block = 65536
+        while True:
+            start = max(0, size - block)
+            f.seek(start)
+            tail = f.read()
+            end = tail.rfind(b"\n")  # end of the last complete line
+            begin = tail.rfind(b"\n", 0, end) if end > 0 else -1
+            if begin != -1 or start == 0:
+                break
+            block *= 2
+        f.truncate(start + end + 1)
+    return json.loads(tail[begin + 1:end])["id"] if end > begin + 1 else 0
+
+
+async def main(args):
+    output = args.output
+    after_id = args.after_id
+    if args.resume:
+        # CSV fields may span lines and Arrow streams cannot be appended to:
+        # resume those by starting a new file with --after-id <last id>
+        if args.format != "ndjson" or output is None:
+            raise SystemExit("--resume needs an NDJSON --output file; use --after-id otherwise")
+        after_id = max(after_id, resume_point(output))
+        if after_id:
+            print(f"Resuming after id {after_id}", file=sys.stderr)
+
+    await init_db()
+    chunks = iter_chunks(after_id, args.route, args.domain, args.since, args.until,
+                         args.include_response, args.chunk_size)
+    exported = 0
+
+    async def counted():
+        nonlocal exported
+        async for chunk in chunks:
+            yield chunk
+            exported += len(chunk)
+            print(f"  {exported:,} rows (id {chunk[-1]['id']})", end="\r", file=sys.stderr)
+
+    if args.format == "ndjson":
+        body = to_ndjson(counted())
+    elif args.format == "csv":
+        body = to_csv(counted(), args.include_response)
+    else:
+        body = to_arrow(counted(), args.include_response)
+
+    start = time.perf_counter()
+    out = open(output, "ab" if args.resume else "wb") if output else sys.stdout.buffer
+    try:
+        async for data in body:
+            out.write(data)
+            out.flush()
+    finally:
+        if output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Exported {exported:,} routing logs in {elapsed:.1f}s "
+          f"({exported / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export routing logs as NDJSON, CSV or Arrow IPC")
+    parser.add_argument("--format", choices=["ndjson", "csv", "arrow"], default="ndjson")
+    parser.add_argument("--output", type=Path, help="Output file (default: stdout)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="created_at >= this (UTC)")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="created_at < this (UTC)")
+    parser.add_argument("--route", choices=["local", "cloud"])
+    parser.add_argument("--domain")
+    parser.add_argument("--after-id", type=int, default=0, help="Only rows with a larger id")
+    parser.add_argument("--resume", action="store_true", help="Append to --output after its last id")
+    parser.add_argument("--include-response", action="store_true", help="Also export response_text")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    if args.format == "arrow" and not arrow_available():
+        raise SystemExit("Arrow export needs pyarrow: pip install pyarrow")
+    asyncio.run(main(args))
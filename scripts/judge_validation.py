@@ -8,8 +8,13 @@ Pre-requisite: Manually annotate ~100 query-response pairs.
 Create a JSONL file at data/judge_validation/human_annotations.jsonl
 with entries containing: query, local_response (optional), human_score (1-10)
 
+--compare-modes validates the low-token score-only judge mode against the
+verbose (reasoning + score) mode on the same pairs: rank agreement between
+the two modes and with the human scores, plus tokens and cost per 1k labels.
+
 Usage:
   python scripts/judge_validation.py --annotations data/judge_validation/human_annotations.jsonl
+  python scripts/judge_validation.py --annotations data/judge_validation/human_annotations.jsonl --compare-modes
 """
 import json
 import asyncio
@@ -25,16 +30,96 @@ sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
 
 try:
     from backend.services.judge import Judge
-    from backend.services.ollama_client import OllamaClient
+    from backend.services.ollama_client import get_ollama
+    from backend.config import get_settings
 except ModuleNotFoundError:
     # Running inside Docker where backend code is at /app directly
     from services.judge import Judge
-    from services.ollama_client import OllamaClient
+    from services.ollama_client import get_ollama
+    from config import get_settings
+
+from utils.progress import ProgressCallback, print_progress
+
+
+async def judge_all(judge: Judge, items: list, mode: str, use_cache: bool = True,
+                    on_progress: ProgressCallback = print_progress) -> list[float]:
+    """Score (query, response) pairs in the given judge mode, preserving input order."""
+    scores = [None] * len(items)
+
+    def report(done, total):
+        print(f"  [{done}/{total}] judged ({mode})")
+        on_progress(done, total)
+
+    async for i, result in judge.score_many(items, use_cache=use_cache, mode=mode, on_progress=report):
+        if isinstance(result, Exception):
+            raise result
+        scores[i] = result["score"]
+    return scores
+
+
+async def compare_judge_modes(judge: Judge, items: list, human_scores: list,
+                              on_progress: ProgressCallback = print_progress):
+    """Validate score-only judging against verbose judging on the same pairs."""
+    settings = get_settings()
+    n = len(items)
+    # Bypass the cache so token usage reflects real calls in both modes
+    verbose = await judge_all(judge, items, "verbose", use_cache=False, on_progress=on_progress)
+    score_only = await judge_all(judge, items, "score_only", use_cache=False,
+                                 on_progress=lambda done, total: on_progress(n + done, n + total))
+
+    rho_modes, p_modes = spearmanr(verbose, score_only)
+    rho_verbose, _ = spearmanr(human_scores, verbose)
+    rho_score_only, _ = spearmanr(human_scores, score_only)
+    binary_agreement = sum(
+        1 for v, s in zip(verbose, score_only) if (v >= 7) == (s >= 7)
+    ) / len(items) * 100
+
+    def per_1k(usage: dict) -> dict:
+        calls = usage.get("calls", 0) or 1
+        input_tokens = usage.get("input_tokens", 0) / calls * 1000
+        output_tokens = usage.get("output_tokens", 0) / calls * 1000
+        cost = (input_tokens * settings.cloud_input_cost_per_1m
+                + output_tokens * settings.cloud_output_cost_per_1m) / 1_000_000
+        return {"input_tokens": round(input_tokens), "output_tokens": round(output_tokens),
+                "cost_usd": round(cost, 4)}
+
+    verbose_1k = per_1k(judge.usage.get("score", {}))
+    score_only_1k = per_1k(judge.usage.get("score_only", {}))
+    saved_tokens = (verbose_1k["input_tokens"] + verbose_1k["output_tokens"]
+                    - score_only_1k["input_tokens"] - score_only_1k["output_tokens"])
+    saved_cost = verbose_1k["cost_usd"] - score_only_1k["cost_usd"]
+
+    print(f"\n=== Judge Mode Comparison (n={len(items)}) ===")
+    print(f"Spearman ρ verbose vs score-only = {rho_modes:.3f} (p = {p_modes:.4f})")
+    print(f"Spearman ρ vs human: verbose = {rho_verbose:.3f}, score-only = {rho_score_only:.3f}")
+    print(f"Binary agreement (threshold=7): {binary_agreement:.1f}%")
+    print(f"\n{'Per 1k labels':15s} {'Input tok':>10s} {'Output tok':>11s} {'Cost':>8s}")
+    for name, row in (("verbose", verbose_1k), ("score-only", score_only_1k)):
+        print(f"{name:15s} {row['input_tokens']:>10d} {row['output_tokens']:>11d} ${row['cost_usd']:>7.4f}")
+    print(f"Saved per 1k labels: {saved_tokens} tokens, ${saved_cost:.4f}")
 
+    results = {
+        "n": len(items),
+        "spearman_rho_modes": rho_modes,
+        "p_value_modes": p_modes,
+        "spearman_rho_human_verbose": rho_verbose,
+        "spearman_rho_human_score_only": rho_score_only,
+        "binary_agreement_pct": binary_agreement,
+        "per_1k_labels": {"verbose": verbose_1k, "score_only": score_only_1k},
+        "saved_per_1k_labels": {"tokens": saved_tokens, "cost_usd": round(saved_cost, 4)},
+        "verbose_scores": verbose,
+        "score_only_scores": score_only,
+    }
+    Path("data/results").mkdir(parents=True, exist_ok=True)
+    with open("data/results/judge_mode_comparison.json", "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to data/results/judge_mode_comparison.json")
 
-async def main(annotations_path: str):
-    judge = Judge()
-    ollama = OllamaClient()
+
+async def main(annotations_path: str = "data/judge_validation/human_annotations.jsonl", use_cache: bool = True,
+               compare_modes: bool = False, on_progress: ProgressCallback = print_progress):
+    judge = Judge(use_cache=use_cache)
+    ollama = get_ollama()
 
     # Check if annotations file exists
     if not Path(annotations_path).exists():
@@ -55,28 +140,27 @@ async def main(annotations_path: str):
 
     print(f"Loaded {len(data)} human annotations")
 
-    human_scores = []
-    judge_scores = []
-
+    responses = []
     for i, item in enumerate(data):
-        query = item["query"]
-        human_score = item["human_score"]
-
         # Get local model response if not cached
         if "local_response" not in item:
             print(f"  [{i+1}/{len(data)}] Generating local response...")
-            result = await ollama.generate(query)
-            response = result["text"]
+            result = await ollama.generate(item["query"])
+            responses.append(result["text"])
         else:
-            response = item["local_response"]
+            responses.append(item["local_response"])
 
-        # Get judge score
-        print(f"  [{i+1}/{len(data)}] Judging response...")
-        j_score = await judge.score(query, response)
+    items = [(item["query"], response) for item, response in zip(data, responses)]
+    human_scores = [item["human_score"] for item in data]
+    if compare_modes:
+        await compare_judge_modes(judge, items, human_scores, on_progress)
+        return
 
-        human_scores.append(human_score)
-        judge_scores.append(j_score)
-        print(f"    Human: {human_score:.0f}  Judge: {j_score:.0f}  Query: {query[:60]}...")
+    # Get judge scores (concurrently, paced by the judge rate limiter)
+    print(f"Judging {len(data)} responses...")
+    judge_scores = await judge_all(judge, items, "verbose", on_progress=on_progress)
+    for item, h_score, j_score in zip(data, human_scores, judge_scores):
+        print(f"    Human: {h_score:.0f}  Judge: {j_score:.0f}  Query: {item['query'][:60]}...")
 
     # Compute Spearman ρ
     rho, p_value = spearmanr(human_scores, judge_scores)
@@ -120,12 +204,17 @@ async def main(annotations_path: str):
     with open("data/results/judge_validation.json", "w") as f:
         json.dump(results, f, indent=2)
 
-    print(f"\nResults saved to data/results/judge_validation.json")
+    print(f"\nJudge cache: {judge.cache.stats()}")
+    print(f"Results saved to data/results/judge_validation.json")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--annotations", required=True,
+    parser.add_argument("--annotations", default="data/judge_validation/human_annotations.jsonl",
                         help="Path to human annotations JSONL file")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the judge result cache (always call the judge)")
+    parser.add_argument("--compare-modes", action="store_true",
+                        help="Compare score-only vs verbose judge modes (rank agreement, tokens, cost)")
     args = parser.parse_args()
-    asyncio.run(main(args.annotations))
+    asyncio.run(main(args.annotations, use_cache=not args.no_cache, compare_modes=args.compare_modes))
@@ -7,6 +7,10 @@ Fix 8 Applied:
 - Added --judge-model flag for model override
 - Added resume capability from existing output file
 
+Labels only need the number, so judging defaults to the low-token
+score-only mode (JSON score, capped max_tokens). Use --judge-mode verbose
+for the original reasoning-then-score prompt.
+
 Usage:
   python scripts/label_data.py --input data/raw/mixinstruct_5k.jsonl \
                                 --output data/labeled/train_5k.jsonl \
@@ -28,19 +32,21 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
 sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
 
 try:
-    from backend.services.ollama_client import OllamaClient
+    from backend.services.ollama_client import get_ollama
     from backend.services.judge import Judge
     from backend.config import get_settings
 except ModuleNotFoundError:
     # Running inside Docker where backend code is at /app directly
-    from services.ollama_client import OllamaClient
+    from services.ollama_client import get_ollama
     from services.judge import Judge
     from config import get_settings
 
+from utils.progress import ProgressCallback, print_progress
+
 
 # Cost estimates per call (tokens estimated)
 ESTIMATED_INPUT_TOKENS = 500
-ESTIMATED_OUTPUT_TOKENS = 100
+ESTIMATED_OUTPUT_TOKENS = {"verbose": 100, "score_only": 6}
 
 # Pricing per 1M tokens
 PRICING = {
@@ -49,11 +55,11 @@ PRICING = {
 }
 
 
-def estimate_cost(num_calls: int, model: str) -> float:
+def estimate_cost(num_calls: int, model: str, judge_mode: str = "score_only") -> float:
     """Estimate API cost for judge calls."""
     pricing = PRICING.get(model, PRICING["gpt-4o-mini"])
     input_cost = (num_calls * ESTIMATED_INPUT_TOKENS / 1_000_000) * pricing["input"]
-    output_cost = (num_calls * ESTIMATED_OUTPUT_TOKENS / 1_000_000) * pricing["output"]
+    output_cost = (num_calls * ESTIMATED_OUTPUT_TOKENS[judge_mode] / 1_000_000) * pricing["output"]
     return input_cost + output_cost
 
 
@@ -76,24 +82,21 @@ def load_existing_results(output_path: str) -> tuple[list, set]:
     return results, processed_queries
 
 
-async def label_one(query: str, ollama: OllamaClient, judge: Judge) -> dict:
-    """Generate local response, judge it, return labeled example."""
-    try:
-        local_result = await ollama.generate(query)
-        score = await judge.score(query, local_result["text"])
-        return {
-            "query": query,
-            "local_response": local_result["text"],
-            "judge_score": score,
-            "label": 1 if score >= 7.0 else 0,  # 1 = local sufficient
-            "latency_ms": local_result["latency_ms"],
-        }
-    except Exception as e:
-        return {"query": query, "error": str(e)}
+def make_label(query: str, local_result: dict, score: float) -> dict:
+    """Build a labeled example from a local response and its judge score."""
+    return {
+        "query": query,
+        "local_response": local_result["text"],
+        "judge_score": score,
+        "label": 1 if score >= 7.0 else 0,  # 1 = local sufficient
+        "latency_ms": local_result["latency_ms"],
+    }
 
 
-async def main(input_path: str, output_path: str, limit: int, batch_size: int = 5,
-               dry_run: bool = False, judge_model: str = None):
+async def main(input_path: str = "data/raw/mixinstruct_5k.jsonl", output_path: str = "data/labeled/train_5k.jsonl",
+               limit: int = 5000, batch_size: int = 5,
+               dry_run: bool = False, judge_model: str = None, use_cache: bool = True,
+               judge_mode: str = "score_only", on_progress: ProgressCallback = print_progress):
 
     # Determine judge model
     settings = get_settings()
@@ -115,7 +118,7 @@ async def main(input_path: str, output_path: str, limit: int, batch_size: int =
     print(f"Total queries: {len(queries)}")
     print(f"Already processed: {len(processed_queries)}")
     print(f"Remaining: {len(queries_to_process)}")
-    print(f"Judge model: {model}")
+    print(f"Judge model: {model} ({judge_mode})")
 
     # Dry run: estimate costs and exit
     if dry_run:
@@ -123,10 +126,11 @@ async def main(input_path: str, output_path: str, limit: int, batch_size: int =
         num_calls = len(queries_to_process)
 
         for m in ["gpt-4o-mini", "gpt-4"]:
-            cost = estimate_cost(num_calls, m)
+            cost = estimate_cost(num_calls, m, judge_mode)
             print(f"  {m}: ~${cost:.2f} for {num_calls} judge calls")
 
-        print(f"\nEstimate based on ~{ESTIMATED_INPUT_TOKENS} input + ~{ESTIMATED_OUTPUT_TOKENS} output tokens per call")
+        print(f"\nEstimate based on ~{ESTIMATED_INPUT_TOKENS} input + "
+              f"~{ESTIMATED_OUTPUT_TOKENS[judge_mode]} output tokens per call")
         print("Add --judge-model gpt-4o-mini to use the cheaper model")
         print("\nTo proceed, remove --dry-run flag")
         return
@@ -136,34 +140,61 @@ async def main(input_path: str, output_path: str, limit: int, batch_size: int =
         return
 
     # Confirm before proceeding (skip if --yes flag is set)
-    cost_estimate = estimate_cost(len(queries_to_process), model)
+    cost_estimate = estimate_cost(len(queries_to_process), model, judge_mode)
     print(f"\nEstimated cost: ~${cost_estimate:.2f}")
 
     # Initialize clients
-    ollama = OllamaClient()
-    judge = Judge()
+    ollama = get_ollama()
+    judge = Judge(use_cache=use_cache, mode=judge_mode)
     # Override judge model if specified
     if judge_model:
         judge.judge_model = judge_model
 
     print(f"\nLabeling {len(queries_to_process)} queries (batch size: {batch_size})")
 
-    # Process in batches (avoid OOM on GPU)
     results = existing_results.copy()
-    for i in tqdm(range(0, len(queries_to_process), batch_size)):
-        batch = queries_to_process[i:i + batch_size]
-        tasks = [label_one(q, ollama, judge) for q in batch]
-        batch_results = await asyncio.gather(*tasks)
-        results.extend(batch_results)
+    generated = []  # judge item index -> (query, local_result)
+    progress = tqdm(total=len(queries_to_process))
+
+    def advance():
+        progress.update(1)
+        on_progress(progress.n, len(queries_to_process))
+
+    async def judge_items():
+        """Generate local responses in small batches (avoid OOM on GPU) and feed the judge."""
+        for i in range(0, len(queries_to_process), batch_size):
+            batch = queries_to_process[i:i + batch_size]
+            outputs = await asyncio.gather(*[ollama.generate(q) for q in batch], return_exceptions=True)
+            for query, output in zip(batch, outputs):
+                if isinstance(output, Exception):
+                    results.append({"query": query, "error": str(output)})
+                    advance()
+                    continue
+                generated.append((query, output))
+                yield query, output["text"]
+
+    # Judging runs concurrently with generation, paced by the judge rate limiter
+    last_checkpoint = len(results)
+    async for idx, score in judge.score_many(judge_items()):
+        query, local_result = generated[idx]
+        if isinstance(score, Exception):
+            results.append({"query": query, "error": str(score)})
+        else:
+            results.append(make_label(query, local_result, score["score"]))
+        advance()
 
         # Checkpoint every 500
-        if len(results) % 500 < batch_size:
+        if len(results) - last_checkpoint >= 500:
             _save(results, output_path)
+            last_checkpoint = len(results)
+    progress.close()
 
     _save(results, output_path)
     valid = [r for r in results if "error" not in r]
     local_pct = sum(1 for r in valid if r["label"] == 1) / len(valid) * 100 if valid else 0
     print(f"Done: {len(valid)} labeled ({local_pct:.0f}% local-sufficient)")
+    print(f"Judge cache: {judge.cache.stats()}")
+    print(f"Judge usage: {judge.usage}")
 
 
 def _save(results, path):
@@ -175,13 +206,17 @@ def _save(results, path):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Label training data for router")
-    parser.add_argument("--input", required=True, help="Input JSONL file path")
-    parser.add_argument("--output", required=True, help="Output JSONL file path")
+    parser.add_argument("--input", default="data/raw/mixinstruct_5k.jsonl", help="Input JSONL file path")
+    parser.add_argument("--output", default="data/labeled/train_5k.jsonl", help="Output JSONL file path")
     parser.add_argument("--limit", type=int, default=5000, help="Max queries to process")
     parser.add_argument("--batch-size", type=int, default=5, help="Batch size for parallel processing")
     parser.add_argument("--dry-run", action="store_true", help="Estimate cost without running")
     parser.add_argument("--judge-model", type=str, default=None,
                         help="Override judge model (default: from .env)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the judge result cache (always call the judge)")
+    parser.add_argument("--judge-mode", choices=["score_only", "verbose"], default="score_only",
+                        help="score_only: JSON score, capped tokens (default); verbose: reasoning + score")
     args = parser.parse_args()
     asyncio.run(main(args.input, args.output, args.limit, args.batch_size,
-                     args.dry_run, args.judge_model))
+                     args.dry_run, args.judge_model, not args.no_cache, args.judge_mode))
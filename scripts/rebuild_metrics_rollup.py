@@ -0,0 +1,50 @@
+"""
+Rebuild the metrics_rollup table from routing_logs.
+
+The rollup is kept up to date by db/log_writer.py and backfilled once by the
+startup migration; run this after editing or importing routing_logs rows
+directly (anything that bypasses write_log).
+
+The rebuild only sees live rows, so it refuses to run once routing logs have
+been archived (db/archive.py); --force rebuilds from the live rows anyway.
+
+Usage:
+  python scripts/rebuild_metrics_rollup.py
+  DATABASE_URL=sqlite+aiosqlite:///data/other.db python scripts/rebuild_metrics_rollup.py
+"""
+import time
+import argparse
+import asyncio
+from pathlib import Path
+
+# Add parent to path for imports (works both locally and in Docker)
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
+sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
+
+# Always via the backend/ path: importing the models as both backend.db.models
+# and db.models (init_db) would register the tables twice
+from db.archive import has_archive
+from db.database import engine, init_db
+from db.log_writer import rebuild_rollup
+
+
+async def main(force: bool):
+    if has_archive() and not force:
+        raise SystemExit(
+            "Routing logs have been archived; a rebuild would drop them from the totals. "
+            "Pass --force to rebuild from the live rows only."
+        )
+    await init_db()
+    start = time.perf_counter()
+    async with engine.begin() as conn:
+        rows = await rebuild_rollup(conn)
+    print(f"Rebuilt metrics_rollup: {rows} rows in {time.perf_counter() - start:.1f}s")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild metrics_rollup from routing_logs")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if some logs are archived")
+    args = parser.parse_args()
+    asyncio.run(main(args.force))
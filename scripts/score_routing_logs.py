@@ -0,0 +1,74 @@
+"""
+Judge a random sample of recent production responses.
+
+Sets routing_logs.judge_score (1-10) on up to --sample logs from the last
+--days that have a stored response and no score yet. /api/metrics/pareto/live
+uses these scores to estimate the quality of each model per confidence band
+on real traffic; without them it falls back to the offline MT-Bench scores.
+Run it periodically (e.g. nightly): each run adds a fresh sample.
+
+Usage:
+  python scripts/score_routing_logs.py
+  python scripts/score_routing_logs.py --days 7 --sample 500 --judge-mode verbose
+"""
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent to path for imports (works both locally and in Docker)
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
+sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
+
+# Always via the backend/ path: importing the models as both backend.db.models
+# and db.models (init_db) would register the tables twice
+from sqlalchemy import func, or_, select, update
+from db.database import engine, get_db, init_db
+from db.models import RoutingLog
+from services.judge import Judge
+
+
+async def main(days: int, sample: int, judge_mode: str):
+    await init_db()
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    async with get_db() as db:
+        logs = (await db.scalars(
+            select(RoutingLog).where(
+                RoutingLog.created_at >= since,
+                RoutingLog.judge_score.is_(None),
+                or_(RoutingLog.response_text.is_not(None), RoutingLog.response_zstd.is_not(None)),
+            ).order_by(func.random()).limit(sample)
+        )).all()
+    if not logs:
+        print("Nothing to score")
+        await engine.dispose()
+        return
+
+    print(f"Scoring {len(logs)} routing logs from the last {days} days ({judge_mode})...")
+    judge = Judge(mode=judge_mode)
+    scored = failed = 0
+    async for i, result in judge.score_many([(log.query, log.response) for log in logs]):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"  log {logs[i].id}: {result}", file=sys.stderr)
+            continue
+        async with get_db() as db:
+            await db.execute(
+                update(RoutingLog).where(RoutingLog.id == logs[i].id).values(judge_score=result["score"])
+            )
+            await db.commit()
+        scored += 1
+        print(f"  {scored}/{len(logs)}", end="\r", file=sys.stderr)
+
+    print(f"Scored {scored} logs ({failed} failed)")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Judge a sample of recent routing logs")
+    parser.add_argument("--days", type=int, default=7, help="Sample from logs newer than this")
+    parser.add_argument("--sample", type=int, default=200, help="Logs to score per run")
+    parser.add_argument("--judge-mode", choices=["score_only", "verbose"], default="score_only")
+    args = parser.parse_args()
+    asyncio.run(main(args.days, args.sample, args.judge_mode))
@@ -0,0 +1,272 @@
+"""
+Local stub for the Ollama and OpenAI APIs, for offline load/latency benchmarks.
+
+Implements the subset the backend and scripts use:
+  POST /api/chat               Ollama chat (NDJSON streaming and non-streaming)
+  GET  /api/tags               Ollama health check
+  POST /v1/chat/completions    OpenAI chat completions (SSE streaming and non-streaming)
+
+Generation is simulated with a lognormal time-to-first-token and a fixed
+decode rate per backend ("local" = Ollama, "cloud" = OpenAI). Judge prompts
+(the ones sent by backend/services/judge.py) are recognised and answered
+with deterministic scores/verdicts derived from a hash of the prompt, so
+repeated runs are reproducible. Errors (500) and rate limits (429 with
+Retry-After) can be injected at configurable rates.
+
+Point the backend/scripts at it via .env:
+  OLLAMA_BASE_URL=http://localhost:11500
+  OPENAI_BASE_URL=http://localhost:11500/v1
+  OPENAI_API_KEY=stub
+
+Usage:
+  python scripts/stub_llm_server.py
+  python scripts/stub_llm_server.py --port 11500 --local-ttft-ms 200 --local-tps 40 \\
+                                    --cloud-ttft-ms 500 --cloud-tps 90 --error-rate 0.01 --rate-limit-rate 0.02
+"""
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "the model answer is based on a careful reading of your question and "
+    "covers key points with clear steps examples and a short summary"
+).split()
+
+
+class Profile:
+    """Latency model for one backend."""
+
+    def __init__(self, ttft_ms: float, ttft_sigma: float, tokens_per_sec: float,
+                 min_tokens: int, max_tokens: int):
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+
+    def ttft(self, rng: random.Random) -> float:
+        """Lognormal TTFT in seconds with median `ttft_ms`."""
+        if self.ttft_ms <= 0:
+            return 0.0
+        return rng.lognormvariate(0.0, self.ttft_sigma) * self.ttft_ms / 1000
+
+
+class Config:
+    local = Profile(200, 0.3, 40, 40, 200)
+    cloud = Profile(400, 0.4, 90, 40, 300)
+    error_rate = 0.0
+    rate_limit_rate = 0.0
+    retry_after_s = 1
+    judge_score: float | None = None  # fixed score instead of hash-derived
+
+
+app = FastAPI(title="Stub LLM server")
+stats = {"requests": 0, "errors": 0, "rate_limited": 0, "tokens": 0}
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha256(text.encode()).hexdigest()[:8], 16)
+
+
+def _prompt_text(messages: list[dict]) -> str:
+    return "\n".join(m.get("content", "") for m in messages)
+
+
+def _judge_reply(prompt: str) -> str | None:
+    """Deterministic answer for judge prompts, None for ordinary chat."""
+    h = _digest(prompt)
+    if '"verdict"' in prompt:
+        score_a, score_b = 1 + h % 10, 1 + (h >> 8) % 10
+        verdict = "A" if score_a > score_b else "B" if score_b > score_a else "TIE"
+        reply = {"score_a": score_a, "score_b": score_b, "verdict": verdict}
+        if '"reasoning"' in prompt:
+            reply = {"reasoning": "Response A is more complete than Response B.", **reply}
+        return json.dumps(reply)
+    if "[Response A]" in prompt and "[Response B]" in prompt:
+        return "Both responses address the query; one is more complete.\n" + ("A", "B", "TIE")[h % 3]
+    score = Config.judge_score if Config.judge_score is not None else 1 + h % 10
+    if '{"score": X}' in prompt:
+        return json.dumps({"score": score})
+    if "Score: X" in prompt:
+        return f"The response is relevant and mostly accurate.\nScore: {score:g}"
+    return None
+
+
+def _completion_tokens(prompt: str, profile: Profile) -> list[str]:
+    rng = random.Random(_digest(prompt))
+    n = rng.randint(profile.min_tokens, profile.max_tokens)
+    return [(" " if i else "") + rng.choice(WORDS) for i in range(n)]
+
+
+def _plan(messages: list[dict], profile: Profile) -> tuple[str, list[str], bool]:
+    prompt = _prompt_text(messages)
+    judge = _judge_reply(prompt)
+    if judge is not None:
+        # Judge replies are short; split on spaces so streaming still works
+        parts = judge.split(" ")
+        return prompt, [(" " if i else "") + p for i, p in enumerate(parts)], True
+    return prompt, _completion_tokens(prompt, profile), False
+
+
+def _inject_failure() -> JSONResponse | None:
+    stats["requests"] += 1
+    roll = random.random()
+    if roll < Config.rate_limit_rate:
+        stats["rate_limited"] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error"}},
+            status_code=429,
+            headers={"Retry-After": str(Config.retry_after_s)},
+        )
+    if roll < Config.rate_limit_rate + Config.error_rate:
+        stats["errors"] += 1
+        return JSONResponse({"error": {"message": "Injected failure (stub)"}}, status_code=500)
+    return None
+
+
+async def _decode(tokens: list[str], profile: Profile):
+    """Yield tokens at the profile's decode rate after a sampled TTFT."""
+    rng = random.Random()
+    await asyncio.sleep(profile.ttft(rng))
+    delay = 1.0 / profile.tokens_per_sec if profile.tokens_per_sec > 0 else 0.0
+    for i, token in enumerate(tokens):
+        if i:
+            await asyncio.sleep(delay)
+        stats["tokens"] += 1
+        yield token
+
+
+# ── Ollama ──
+
+@app.get("/api/tags")
+async def ollama_tags():
+    return {"models": [{"name": "stub:latest"}]}
+
+
+@app.post("/api/chat")
+async def ollama_chat(request: Request):
+    body = await request.json()
+    if (failure := _inject_failure()) is not None:
+        return failure
+    prompt, tokens, _ = _plan(body.get("messages", []), Config.local)
+    model = body.get("model", "stub")
+    prompt_tokens = len(prompt) // 4
+
+    if not body.get("stream", True):
+        text = "".join([t async for t in _decode(tokens, Config.local)])
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": text},
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(tokens),
+        }
+
+    async def ndjson():
+        async for token in _decode(tokens, Config.local):
+            yield json.dumps({"model": model, "message": {"role": "assistant", "content": token}, "done": False}) + "\n"
+        yield json.dumps({
+            "model": model, "message": {"role": "assistant", "content": ""}, "done": True,
+            "prompt_eval_count": prompt_tokens, "eval_count": len(tokens),
+        }) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+# ── OpenAI ──
+
+@app.post("/v1/chat/completions")
+async def openai_chat(request: Request):
+    body = await request.json()
+    if (failure := _inject_failure()) is not None:
+        return failure
+    prompt, tokens, is_judge = _plan(body.get("messages", []), Config.cloud)
+    # Judge calls are short completions: answer them with the cloud TTFT only
+    profile = Profile(Config.cloud.ttft_ms, Config.cloud.ttft_sigma, 0, 0, 0) if is_judge else Config.cloud
+    if body.get("max_tokens"):
+        tokens = tokens[:body["max_tokens"]]
+    model = body.get("model", "stub")
+    created = int(time.time())
+    completion_id = f"chatcmpl-stub{_digest(prompt + str(time.time_ns())):08x}"
+    usage = {
+        "prompt_tokens": len(prompt) // 4,
+        "completion_tokens": len(tokens),
+        "total_tokens": len(prompt) // 4 + len(tokens),
+    }
+
+    if not body.get("stream"):
+        text = "".join([t async for t in _decode(tokens, profile)])
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+    def chunk(delta: dict, finish_reason=None, chunk_usage=None) -> str:
+        payload = {
+            "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if chunk_usage is None else [],
+        }
+        if chunk_usage is not None:
+            payload["usage"] = chunk_usage
+        return f"data: {json.dumps(payload)}\n\n"
+
+    async def sse():
+        yield chunk({"role": "assistant", "content": ""})
+        async for token in _decode(tokens, profile):
+            yield chunk({"content": token})
+        yield chunk({}, finish_reason="stop")
+        if include_usage:
+            yield chunk({}, chunk_usage=usage)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(sse(), media_type="text/event-stream")
+
+
+@app.get("/stub/stats")
+async def stub_stats():
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Ollama/OpenAI server for offline benchmarks")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--local-ttft-ms", type=float, default=200, help="Median Ollama TTFT")
+    parser.add_argument("--local-tps", type=float, default=40, help="Ollama decode tokens/sec")
+    parser.add_argument("--cloud-ttft-ms", type=float, default=400, help="Median OpenAI TTFT")
+    parser.add_argument("--cloud-tps", type=float, default=90, help="OpenAI decode tokens/sec")
+    parser.add_argument("--ttft-sigma", type=float, default=0.3, help="Lognormal sigma of TTFT (0 = fixed)")
+    parser.add_argument("--min-tokens", type=int, default=40, help="Min completion length")
+    parser.add_argument("--max-tokens", type=int, default=250, help="Max completion length")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests rejected with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on 429")
+    parser.add_argument("--judge-score", type=float, default=None,
+                        help="Fixed judge score (default: deterministic hash of the prompt, 1-10)")
+    args = parser.parse_args()
+
+    Config.local = Profile(args.local_ttft_ms, args.ttft_sigma, args.local_tps, args.min_tokens, args.max_tokens)
+    Config.cloud = Profile(args.cloud_ttft_ms, args.ttft_sigma, args.cloud_tps, args.min_tokens, args.max_tokens)
+    Config.error_rate = args.error_rate
+    Config.rate_limit_rate = args.rate_limit_rate
+    Config.retry_after_s = args.retry_after
+    Config.judge_score = args.judge_score
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
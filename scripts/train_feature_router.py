@@ -23,6 +23,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))  # Docker container
 sys.path.insert(0, str(Path(__file__).parent.parent / "backend"))  # local dev
 
 from utils.data_splits import load_and_split_data, verify_test_hash
+from utils.progress import ProgressCallback, print_progress
 
 try:
     from backend.services.feature_extractor import extract_features, features_to_vector
@@ -31,7 +32,7 @@ except ModuleNotFoundError:
     from services.feature_extractor import extract_features, features_to_vector
 
 
-def main(data_path: str):
+def main(data_path: str = "data/labeled/train_5k.jsonl", on_progress: ProgressCallback = print_progress):
     # Load data using shared split function (Fix 6)
     print(f"Loading data from {data_path}")
     (train_texts, train_labels,
@@ -57,11 +58,18 @@ def main(data_path: str):
         print("Note: DistilBERT results not found. Run train_router.py first for hash verification.")
 
     # Featurize all data
+    total = len(train_texts) + len(val_texts) + len(test_texts)
+    done = 0
+
     def featurize(texts):
+        nonlocal done
         vectors = []
         for text in texts:
             features = extract_features(text)
             vectors.append(features_to_vector(features))
+            done += 1
+            if done % 500 == 0 or done == total:
+                on_progress(done, total)
         return np.array(vectors)
 
     print("\nExtracting features...")
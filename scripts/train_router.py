@@ -21,6 +21,7 @@ from transformers import (
     DistilBertTokenizer,
     DistilBertForSequenceClassification,
     Trainer,
+    TrainerCallback,
     TrainingArguments,
     EarlyStoppingCallback,
 )
@@ -30,6 +31,7 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from utils.data_splits import load_and_split_data
+from utils.progress import ProgressCallback, print_progress
 
 
 class RouterDataset(Dataset):
@@ -47,6 +49,18 @@ class RouterDataset(Dataset):
         return item
 
 
+class ProgressReporter(TrainerCallback):
+    """Reports training steps to on_progress every `every` steps."""
+
+    def __init__(self, on_progress: ProgressCallback, every: int = 10):
+        self.on_progress = on_progress
+        self.every = every
+
+    def on_step_end(self, args, state, control, **kwargs):
+        if state.global_step % self.every == 0 or state.global_step == state.max_steps:
+            self.on_progress(state.global_step, state.max_steps)
+
+
 def compute_metrics(eval_pred):
     logits, labels = eval_pred
     preds = np.argmax(logits, axis=-1)
@@ -60,7 +74,8 @@ def compute_metrics(eval_pred):
     }
 
 
-def main(data_path: str, output_path: str):
+def main(data_path: str = "data/labeled/train_5k.jsonl", output_path: str = "data/models/distilbert_router",
+         on_progress: ProgressCallback = print_progress):
     # Load data using shared split function (Fix 6)
     print(f"Loading data from {data_path}")
     (train_texts, train_labels,
@@ -107,7 +122,7 @@ def main(data_path: str, output_path: str):
         train_dataset=train_ds,
         eval_dataset=val_ds,
         compute_metrics=compute_metrics,
-        callbacks=[EarlyStoppingCallback(early_stopping_patience=2)],
+        callbacks=[EarlyStoppingCallback(early_stopping_patience=2), ProgressReporter(on_progress)],
     )
 
     trainer.train()
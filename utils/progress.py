@@ -0,0 +1,16 @@
+"""
+Progress reporting for the experiment scripts.
+
+Entry functions take an `on_progress(current, total)` callback. The default
+prints a "[PROGRESS] current/total" line, which is what the experiments API
+parses from a script run as a subprocess. A script run in-process by an
+experiment worker (backend/services/experiment_workers.py) gets a callback
+that sends the numbers to the backend directly.
+"""
+from typing import Callable
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def print_progress(current: int, total: int):
+    print(f"[PROGRESS] {current}/{total}", flush=True)